@@ -0,0 +1,200 @@
+"""Shared helpers for the benchmark scripts: timing and generated data.
+Scripts are run from anywhere ('python benchmarks/bench_x.py [size]');
+the repository root is put first on 'sys.path' so that the working copy
+of 'corflow' is measured."""
+import os,sys,time,random
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0,ROOT)
+
+def best(f,n=3):
+    """Returns the best wall time (s) of 'n' calls to 'f()' (and its
+    last result)."""
+    l_t = []; res = None
+    for a in range(n):
+        t = time.perf_counter(); res = f(); l_t.append(time.perf_counter()-t)
+    return min(l_t),res
+def arg(i,default):
+    """Returns the 'i'-th command-line argument as an int, or 'default'."""
+    return int(sys.argv[i]) if len(sys.argv) > i else default
+
+    # EAF
+L_EAF = [("ref",None,"ref"),("tx","ref","tx"),("ft","ref","ft"),
+         ("wd","ref","wd"),("mb","wd","mb"),("gl","mb","gl"),
+         ("ph","wd","ph")]                  # tier, parent, type
+S_TYPES = """    <LINGUISTIC_TYPE GRAPHIC_REFERENCES="false" LINGUISTIC_TYPE_ID="ref" TIME_ALIGNABLE="true"/>
+    <LINGUISTIC_TYPE CONSTRAINTS="Symbolic_Association" GRAPHIC_REFERENCES="false" LINGUISTIC_TYPE_ID="tx" TIME_ALIGNABLE="false"/>
+    <LINGUISTIC_TYPE CONSTRAINTS="Symbolic_Association" CONTROLLED_VOCABULARY_REF="cv1" GRAPHIC_REFERENCES="false" LINGUISTIC_TYPE_ID="ft" TIME_ALIGNABLE="false"/>
+    <LINGUISTIC_TYPE CONSTRAINTS="Included_In" GRAPHIC_REFERENCES="false" LINGUISTIC_TYPE_ID="wd" TIME_ALIGNABLE="true"/>
+    <LINGUISTIC_TYPE CONSTRAINTS="Symbolic_Subdivision" GRAPHIC_REFERENCES="false" LINGUISTIC_TYPE_ID="mb" TIME_ALIGNABLE="false"/>
+    <LINGUISTIC_TYPE CONSTRAINTS="Symbolic_Association" GRAPHIC_REFERENCES="false" LINGUISTIC_TYPE_ID="gl" TIME_ALIGNABLE="false"/>
+    <LINGUISTIC_TYPE CONSTRAINTS="Time_Subdivision" GRAPHIC_REFERENCES="false" LINGUISTIC_TYPE_ID="ph" TIME_ALIGNABLE="true"/>
+    <LANGUAGE LANG_DEF="http://cdb.iso.org/lg/CDB-00130975-001" LANG_ID="eng" LANG_LABEL="English (eng)"/>
+    <CONTROLLED_VOCABULARY CV_ID="cv1">
+        <DESCRIPTION LANG_REF="eng">A vocab &amp; more</DESCRIPTION>
+        <CV_ENTRY_ML CVE_ID="cve1">
+            <CVE_VALUE DESCRIPTION="first" LANG_REF="eng">one</CVE_VALUE>
+        </CV_ENTRY_ML>
+    </CONTROLLED_VOCABULARY>
+"""
+def genEAF(path,n_ref=2000,l_spk=("A","B"),seed=1):
+    """Writes a DoReCo-like EAF (ref/tx/ft/wd/mb/gl/ph per speaker).
+    ARGUMENTS:
+    - path      :   (str) the file to write
+    - n_ref     :   (int) 'ref' annotations per speaker
+    RETURNS:
+    - the number of annotations.
+    Note: n_ref=2000 gives ~101k annotations (22MB), 10000 ~509k.
+    Note: one 'ph' time slot in two has no value (time subdivision)."""
+    rnd = random.Random(seed); l_ts = []; d_ann = {}; c = [0]
+    def slot(v):
+        l_ts.append(v); return "ts%d" % len(l_ts)
+    def nid():
+        c[0] += 1; return "a%d" % c[0]
+    fa = ("<ALIGNABLE_ANNOTATION ANNOTATION_ID=\"%s\" TIME_SLOT_REF1=\"%s\" "
+          "TIME_SLOT_REF2=\"%s\"><ANNOTATION_VALUE>%s</ANNOTATION_VALUE>"
+          "</ALIGNABLE_ANNOTATION>")
+    fr = ("<REF_ANNOTATION ANNOTATION_ID=\"%s\" ANNOTATION_REF=\"%s\"%s>"
+          "<ANNOTATION_VALUE>%s</ANNOTATION_VALUE></REF_ANNOTATION>")
+    for spk in l_spk:
+        for tn,pn,typ in L_EAF:
+            d_ann[tn+"@"+spk] = []
+    t = 0
+    for i in range(n_ref):
+        for spk in l_spk:
+            add = lambda tn,txt: d_ann[tn+"@"+spk].append(txt)
+            dur = rnd.randint(1000,4000); nw = rnd.randint(1,5)
+            l_wb = [t+(dur*k)//nw for k in range(nw)]+[t+dur]
+            l_ws = [slot(v) for v in l_wb]
+            rid = nid()
+            add("ref",fa % (rid,l_ws[0],l_ws[-1],"%04d" % i))
+            add("tx",fr % (nid(),rid,"","some &lt;text&gt; &amp; "
+                           "&quot;quoted&quot; é %d" % i))
+            add("ft",fr % (nid(),rid," CVE_REF=\"cve1\"","free %d" % i))
+            for k in range(nw):
+                wid = nid(); prev = ""
+                add("wd",fa % (wid,l_ws[k],l_ws[k+1],"w%d" % k))
+                for m in range(rnd.randint(1,3)):
+                    mid = nid()
+                    add("mb",fr % (mid,wid,prev,"m%d" % m))
+                    add("gl",fr % (nid(),mid,"","G%d" % m))
+                    prev = " PREVIOUS_ANNOTATION=\"%s\"" % mid
+                np = rnd.randint(1,4)
+                l_ps = ([l_ws[k]]+[slot(None if p%2 else l_wb[k]+p)
+                                   for p in range(1,np)]+[l_ws[k+1]])
+                for p in range(np):
+                    add("ph",fa % (nid(),l_ps[p],l_ps[p+1],"p"))
+            t += dur+rnd.randint(0,500)
+    l_txt = ["<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"
+             "<ANNOTATION_DOCUMENT AUTHOR=\"me\" DATE=\"2020-01-01T00:00:00"
+             "+01:00\" FORMAT=\"3.0\" VERSION=\"3.0\">\n"
+             "    <HEADER MEDIA_FILE=\"\" TIME_UNITS=\"milliseconds\">\n"
+             "        <MEDIA_DESCRIPTOR MEDIA_URL=\"file:///x.wav\" "
+             "MIME_TYPE=\"audio/x-wav\" RELATIVE_MEDIA_URL=\"./x.wav\"/>\n"
+             "        <PROPERTY NAME=\"lastUsedAnnotationId\">%d</PROPERTY>\n"
+             "    </HEADER>\n    <TIME_ORDER>\n" % c[0]]
+    for a,v in enumerate(l_ts,1):
+        l_txt.append("        <TIME_SLOT TIME_SLOT_ID=\"ts%d\"%s/>\n"
+                     % (a,"" if v == None else " TIME_VALUE=\"%d\"" % v))
+    l_txt.append("    </TIME_ORDER>\n")
+    for spk in l_spk:
+        for tn,pn,typ in L_EAF:
+            l_txt.append("    <TIER LINGUISTIC_TYPE_REF=\"%s\"%s PARTICIPANT="
+                         "\"%s\" TIER_ID=\"%s@%s\">\n" % (typ,
+                         " PARENT_REF=\"%s@%s\"" % (pn,spk) if pn else "",
+                         spk,tn,spk))
+            for txt in d_ann[tn+"@"+spk]:
+                l_txt.append("        <ANNOTATION>\n            "+txt+
+                             "\n        </ANNOTATION>\n")
+            l_txt.append("    </TIER>\n")
+    l_txt.append(S_TYPES+"</ANNOTATION_DOCUMENT>\n")
+    with open(path,"w",encoding="utf_8") as f:
+        f.write("".join(l_txt))
+    return c[0]
+
+    # TextGrid
+L_WORDS = ["a","ba","\"q\"","é è","x\ny","ŋ","","w \"w\" w","k"]
+def genTGrid(n=100000,n_tiers=3,seed=1):
+    """Returns a Transcription of 'n_tiers' interval tiers ('n' intervals
+    of 0.1s each, mixed texts) and a 50-point tier."""
+    from corflow.Transcription import Transcription
+    rnd = random.Random(seed); trans = Transcription(name="tg")
+    for a in range(n_tiers):
+        tier = trans.create(-1,"tier%d" % a,0.,n*0.1)
+        for i in range(n):
+            tier.create(-1,"",round(i*0.1,3),round((i+1)*0.1,3),
+                        rnd.choice(L_WORDS))
+    tier = trans.create(-1,"points",0.,n*0.1)
+    for i in range(min(n,50)):
+        tier.create(-1,"",round(i*0.1+0.05,3),round(i*0.1+0.05,3),"p%d" % i)
+    trans.setBounds()
+    return trans
+
+    # Pangloss
+L_LANG = ["en","de","es","it","ru","zh","ja","ko","ar","pt","nl","sv"]
+def genNotes(path,n_s=3000):
+    """Writes a note-heavy Pangloss TEXT: per S, 3 FORMs, 12 TRANSLs,
+    10 NOTEs and 3 W (FORM, 4 TRANSLs, 2 NOTEs); n_s=3000 gives 20 tiers,
+    90k segments and 48k NOTEs."""
+    w = ("<W><FORM>w</FORM>"+"".join("<TRANSL xml:lang=\"%s\">g</TRANSL>"
+         % lang for lang in L_LANG[:4])+
+         "<NOTE message=\"x\"/><NOTE message=\"y\"/></W>")
+    l_txt = ["<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n<TEXT id=\"t1\">\n"
+             "<HEADER><TITLE>T</TITLE></HEADER>\n"]
+    for i in range(n_s):
+        l_txt.append("<S id=\"s%d\"><AUDIO start=\"%.3f\" end=\"%.3f\"/>"
+                     % (i,i*2.,i*2.+2.))
+        l_txt.extend("<FORM kindOf=\"k%d\">f%d</FORM>" % (k,i)
+                     for k in range(3))
+        l_txt.extend("<TRANSL xml:lang=\"%s\">t</TRANSL>" % lang
+                     for lang in L_LANG)
+        l_txt.extend("<NOTE message=\"n%d\"/>" % k for k in range(10))
+        l_txt.append(w*3+"</S>\n")
+    l_txt.append("<NOTE message=\"end\"/></TEXT>\n")
+    with open(path,"w",encoding="utf_8") as f:
+        f.write("".join(l_txt))
+def genSWM(n_s=3000,seed=1):
+    """Returns a Pangloss-like Transcription: S/W/M levels ('S-0','S-en',
+    'W-0','W-en','M-0','M-en'), 1-5 W per S and 1-3 M per W sharing
+    boundaries, plus a whole-text 'TEXT-0' tier.
+    Note: n_s=3000 gives ~60k segments, 20000 ~400k."""
+    from corflow.Transcription import Transcription,Tier,Segment
+    rnd = random.Random(seed)
+    trans = Transcription(name="swm",start=0.,end=0.,metadata={})
+    def _tier(name):
+        tier = Tier(name,0.,0.,trans)
+        trans.d_elem[tier] = [len(trans.elem),None]; trans.elem.append(tier)
+        return tier
+    l_names = ["S-0","S-en","W-0","W-en","M-0","M-en"]
+    d_tiers = {n:_tier(n) for n in l_names}; d_segs = {n:[] for n in l_names}
+    for n in ("S-en","W-en","M-en"):
+        d_tiers[n].setMeta("xml:lang","en","pangloss")
+    d_tiers["W-0"].setMeta("kindOf","phono","pangloss")
+    t = 0.
+    for i in range(n_s):
+        s,e = t,round(t+round(rnd.uniform(1,4),3),3)
+        d_segs["S-0"].append((s,e,"phrase %d & <co>" % i))
+        d_segs["S-en"].append((s,e,"transl %d" % i))
+        nw = rnd.randint(1,5)
+        l_wb = [round(s+(e-s)*k/nw,3) for k in range(nw)]+[e]
+        for w in range(nw):
+            ws,we = l_wb[w],l_wb[w+1]
+            d_segs["W-0"].append((ws,we,"w%d" % w))
+            d_segs["W-en"].append((ws,we,"gw%d" % w))
+            nm = rnd.randint(1,3)
+            l_mb = [round(ws+(we-ws)*k/nm,4) for k in range(nm)]+[we]
+            for m in range(nm):
+                d_segs["M-0"].append((l_mb[m],l_mb[m+1],"m%d" % m))
+                d_segs["M-en"].append((l_mb[m],l_mb[m+1],"GL%d" % m))
+        t = round(e+rnd.choice([0,0,0.5]),3)
+    for n,l_seg in d_segs.items():
+        tier = d_tiers[n]
+        tier.elem = [Segment("a",s,e,c,tier,{}) for s,e,c in l_seg]
+        tier.d_elem = {seg:[b,None] for b,seg in enumerate(tier.elem)}
+        tier.start,tier.end = tier.elem[0].start,tier.elem[-1].end
+    tier = _tier("TEXT-0")
+    tier.elem.append(Segment("a",0.,t,"whole text",tier,{}))
+    tier.d_elem = {tier.elem[0]:[0,None]}; tier.start,tier.end = 0.,t
+    trans.start,trans.end = 0.,t
+    return trans
@@ -0,0 +1,22 @@
+"""Reading a note-heavy Pangloss file [user-042].
+    python benchmarks/bench_fromPangloss.py [n_s]
+Writes a TEXT of 'n_s' S units (default 3000: 20 tiers, 90k segments,
+48k NOTEs) and times 'fromPangloss()', best of 3, and the share spent
+attaching notes ('attribNotes()')."""
+import os,tempfile,cProfile,pstats
+from _bench import best,arg,genNotes
+from corflow.fromPangloss import fromPangloss
+
+def main():
+    n_s = arg(1,3000)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp,"notes.xml"); genNotes(path,n_s)
+        t,trans = best(lambda: fromPangloss(path))
+        print("%d tiers, %d segments: %.2fs"
+              % (len(trans),sum(len(ti) for ti in trans),t))
+        prof = cProfile.Profile(); prof.runcall(fromPangloss,path)
+        for (fi,ln,fn),st in pstats.Stats(prof).stats.items():
+            if fn == "attribNotes":
+                print("attribNotes (profiled): %.2fs" % st[3])
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""Reading a binary TextGrid [user-036].
+    python benchmarks/bench_fromPraat.py [n]
+Writes a binary TextGrid of 3 tiers of 'n' intervals (default 100000,
+300k intervals, ~6.5MB) plus a point tier, then times 'fromPraat()'
+(best of 3)."""
+import os,tempfile
+from _bench import best,arg,genTGrid
+from corflow.fromPraat import fromPraat
+from corflow.toPraat import toPraat
+
+def main():
+    n = arg(1,100000)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp,"bench.TextGrid")
+        toPraat(path,genTGrid(n),type="binary")
+        t,trans = best(lambda: fromPraat(path))
+        print("binary, %d tiers, %d segments, %.1fMB: %.2fs"
+              % (len(trans),sum(len(ti) for ti in trans),
+                 os.path.getsize(path)/1e6,t))
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Pickling a Transcription: flat state vs the default protocol [user-027].
+    python benchmarks/bench_pickle.py [n_ref]
+Reads a generated EAF ('n_ref' ref annotations per speaker, default 2000,
+~101k segments) and times 'pickle.dumps()'/'loads()' with the flat state
+('Transcription.__getstate__') and with the default '__dict__' protocol.
+Also prints the size of a single Segment's pickle: it carries the whole
+Transcription (and its Corpus, if any)."""
+import os,io,sys,pickle,copyreg,tempfile
+from _bench import best,arg,genEAF
+from corflow.Transcription import Conteneur,Corpus
+from corflow.fromElan import fromElan
+
+def _setDict(obj,state):
+    obj.__dict__.update(state)
+class _DefaultPickler(pickle.Pickler):
+    """Pickles elements with their '__dict__', ignoring the hooks."""
+    def reducer_override(self,obj):
+        if isinstance(obj,Conteneur):
+            return (copyreg.__newobj__,(type(obj),),obj.__dict__,
+                    None,None,_setDict)
+        return NotImplemented
+def _dumpDefault(obj):
+    f = io.BytesIO()
+    _DefaultPickler(f,protocol=pickle.HIGHEST_PROTOCOL).dump(obj)
+    return f.getvalue()
+def _dumpFlat(obj):
+    return pickle.dumps(obj,protocol=pickle.HIGHEST_PROTOCOL)
+
+def main():
+    sys.setrecursionlimit(1000000)              # default protocol nests
+    n_ref = arg(1,2000)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp,"bench.eaf"); genEAF(path,n_ref)
+        trans = fromElan(path)
+    print("%d tiers, %d segments" % (len(trans),sum(len(t) for t in trans)))
+    for lbl,f_dump in (("default",_dumpDefault),("flat",_dumpFlat)):
+        t_dump,b = best(lambda: f_dump(trans))
+        t_load,_ = best(lambda: pickle.loads(b))
+        print("%-8s dump %.2fs  load %.2fs  %.1fMB"
+              % (lbl,t_dump,t_load,len(b)/1e6))
+    seg = trans.elem[1].elem[0]
+    print("one segment            : %.1fMB" % (len(_dumpFlat(seg))/1e6))
+    corpus = Corpus("c")
+    ntrans = corpus.add(-1,trans); corpus.add(-1,trans)
+    print("one segment, in Corpus : %.1fMB (2 Transcriptions)"
+          % (len(_dumpFlat(ntrans.elem[1].elem[0]))/1e6))
+    print("one segment, 'copy()'  : %dB" % len(_dumpFlat(seg.copy())))
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Writing a large EAF [user-044].
+    python benchmarks/bench_toElan.py [n_ref]
+Reads a generated EAF ('n_ref' ref annotations per speaker, default
+10000, ~509k annotations; 2000 gives ~101k) and times 'toElan()' (best
+of 3), then traces the peak memory of the writers alone ('tracemalloc',
+after the copy and type inference). Last, alternates calls with and
+without the collection pause ('_noGC()') in the same process."""
+import os,tempfile,tracemalloc,contextlib
+from _bench import best,arg,genEAF
+from corflow.fromElan import fromElan
+import corflow.toElan as te
+
+def main():
+    n_ref = arg(1,10000)
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp,"src.eaf"); n = genEAF(src,n_ref)
+        trans = fromElan(src); out = os.path.join(tmp,"out.eaf")
+        t,_ = best(lambda: te.toElan(out,trans))
+        print("%d annotations: %.2fs" % (n,t))
+        ntrans = trans.copy(); d_footer = te._getMeta(ntrans)[2]
+        d_maps = te._tierMaps(ntrans); te._setTypes(ntrans,d_maps)
+        with open(out,"w",encoding="utf_8") as f:
+            tracemalloc.start()
+            d_timetable = te._writeTimeTable(f,ntrans)
+            for a,tier in enumerate(ntrans):
+                te._writeTier(f,a,tier,d_timetable,d_maps)
+            te._writeFooter(f,ntrans,d_footer)
+            peak = tracemalloc.get_traced_memory()[1]; tracemalloc.stop()
+        print("writer peak traced memory: %.1fMB" % (peak/2**20))
+        d_t = {"pause":[],"no pause":[]}; f_gc = te._noGC
+        for a in range(3):
+            for lbl,f in (("no pause",contextlib.nullcontext),("pause",f_gc)):
+                te._noGC = f
+                d_t[lbl].append(best(lambda: te.toElan(out,trans),1)[0])
+        te._noGC = f_gc
+        for lbl,l_t in d_t.items():
+            print("%-8s: %s" % (lbl,", ".join("%.2fs" % t for t in l_t)))
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+"""Writing a Pangloss S/W/M file [user-049].
+    python benchmarks/bench_toPangloss.py [n_s ...]
+Times 'toPangloss()' on generated S/W/M Transcriptions of 'n_s' S units
+each (default 3000, 6000 and 20000; ~60k, 120k and 400k segments)."""
+import os,sys,time,tempfile
+from _bench import genSWM
+from corflow.toPangloss import toPangloss
+
+def main():
+    l_n = [int(a) for a in sys.argv[1:]] or [3000,6000,20000]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp,"swm.xml")
+        for n_s in l_n:
+            trans = genSWM(n_s)
+            t = time.perf_counter(); toPangloss(path,trans)
+            print("%d S units, %d segments: %.2fs" % (n_s,
+                  sum(len(ti) for ti in trans),time.perf_counter()-t))
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Writing text/short TextGrids [user-038].
+    python benchmarks/bench_toPraat.py [n]
+Times the tier writer ('_writeSegs()') on one tier of 'n' intervals
+(default 300000, mixed texts with quotes and entities), then a whole
+'toPraat()' call on 3 such tiers and a point tier; best of 3 each."""
+import os,tempfile
+from _bench import best,arg,genTGrid
+from corflow.toPraat import toPraat,_writeSegs
+
+L_ENT = ["&amp;lt;","&quot;x&quot;","a &apos; b","&gt;\""]
+
+def main():
+    n = arg(1,300000)
+    trans = genTGrid(n,1); tier = trans.elem[0]
+    for a,seg in enumerate(tier):                   # entity-laden content
+        if a % 4 == 0:
+            seg.content = L_ENT[(a//4)%4]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp,"bench.TextGrid")
+        def _tier(typ):
+            with open(path,"w",encoding="utf_8") as f:
+                _writeSegs(f,tier,"IntervalTier",typ)
+        for typ in ("text","short"):
+            t,_ = best(lambda: _tier(typ))
+            print("%-5s one tier, %d intervals: %.2fs" % (typ,len(tier),t))
+        trans = genTGrid(n//3)
+        for typ in ("text","short"):
+            t,_ = best(lambda: toPraat(path,trans,type=typ))
+            print("%-5s toPraat(), %d segments: %.2fs"
+                  % (typ,sum(len(ti) for ti in trans),t))
+if __name__ == "__main__":
+    main()
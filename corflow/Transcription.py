@@ -31,7 +31,7 @@ Note:   'metadata' is a structure "dict<str:dict<str:list<str>>>", or:
         /!\ 'speakers' has another layer of dict' for each speaker.
 """
  
-import sys,os,re,copy
+import sys,os,re,gc,copy,threading,contextlib
 
 class Conteneur:
     """Parent class to be inherited by all main classes."""
@@ -46,8 +46,8 @@ class Conteneur:
             # structure variables
         self.struct = struct        # (pntr) its container
         self.d_elem = d_elem        # (dct<pntr:lst<pntr>>) its elements
-            # metadata variables
-        self.metadata = copy.deepcopy(metadata) # (dict<str:lst<str>>) open metadata
+            # metadata variables (dict<str:lst<str>>), copied if not empty
+        self.metadata = copy.deepcopy(metadata) if metadata else {}
 
         # default functions
     def __bool__(self):
@@ -61,6 +61,13 @@ class Conteneur:
         """Same as '__iter__()' but for references (name,index,pointer)."""
         for a in range(0,len(self.elem)):
             yield (self.elem[a].name,a,self.elem[a])
+    def __getstate__(self):
+        """Pickles the attributes, without a 'struct' no longer holding it.
+        Note: such an element (e.g. replaced by 'fixOverlaps()') would
+              otherwise pull in its old Transcription mid-rebuild."""
+        if self.struct != None and self not in self.struct.d_elem:
+            return dict(self.__dict__,struct=None)
+        return self.__dict__
 
         # Technical functions
         ## Not meant to be accessed by the user
@@ -410,7 +417,7 @@ class Conteneur:
         return self.metadata[div][spk]
     def setSpk(self,spk,k,v,div="speakers",key="speaker",el="tiers"):
         """Edits a speaker. Like 'addSpk' but for only one value."""
-        d_vals = {k,v}
+        d_vals = {k:v}
         if not k == el:     # No need to update elements?
             el = ""
         return self.addSpk(spk,d_vals,div,key,el)
@@ -705,6 +712,17 @@ class Segment(Conteneur):
         """Returns a copy of the Segment."""
         return Segment(self.name,self.start,self.end,self.content,
                        tier,self.metadata.copy())
+    def __reduce_ex__(self,protocol):
+        """Pickles as an index if in a Transcription (see '_getElem()').
+        Note: the pickle carries the whole Transcription (and its Corpus);
+              a 'copy()' (no pointers in its metadata) pickles alone."""
+        tier = self.struct
+        if (tier != None and self in tier.d_elem and
+            isinstance(tier.struct,Transcription) and
+            tier in tier.struct.d_elem):
+            return (_getElem,(tier.struct,tier.struct.d_elem[tier][0],
+                              tier.d_elem[self][0]))
+        return Conteneur.__reduce_ex__(self,protocol)
 
         # navigation
     @property
@@ -790,6 +808,13 @@ class Tier(Conteneur):
                 seg_par = parent.getTime(seg.start)
                 cp_tier.add(-1,seg,seg_par)
         return cp_tier
+    def __reduce_ex__(self,protocol):
+        """Pickles as an index if in a Transcription (see '_getElem()').
+        Note: the pickle carries the whole Transcription (and its Corpus)."""
+        trans = self.struct
+        if isinstance(trans,Transcription) and self in trans.d_elem:
+            return (_getElem,(trans,trans.d_elem[self][0]))
+        return Conteneur.__reduce_ex__(self,protocol)
         # navigation
     @property
     def seg(self):
@@ -833,11 +858,10 @@ class Tier(Conteneur):
                     s2.start = s1.end
                 else:
                     s1.end = s2.start
-        for a in range(ls-1,-1,-1): # second path, only valid segments
-            s = self.elem[a]
+        for s in self.elem: # second path, only valid segments (appended)
             if s.end <= s.start:
                 continue
-            atier.add(0,s)
+            atier.add(-1,s)
         self.elem,self.d_elem = atier.elem,atier.d_elem
     def fixGaps(self,sym="_"):
         """Adds segments in gaps."""
@@ -916,35 +940,60 @@ class Transcription(Conteneur):
         Conteneur.__init__(self,name,start,end,"",[],corpus,{},metadata)
     
         # default functions
+    def __getstate__(self):
+        """Pickles as flat lists (see '_packTrans()').
+        Note: keeps the Corpus pointer, so the whole Corpus comes along
+              (see 'benchmarks/bench_pickle.py')."""
+        return (_packTrans(self),self.struct)
+    def __setstate__(self,state):
+        t_pack,corpus = state
+        Conteneur.__init__(self,"",-1.,-1.,"",[],corpus,{},{})
+        _unpackTrans(t_pack,self)
     def copy(self,corpus=None,empty=False):
+        """Returns a copy of the Transcription (tiers, segments, parents).
+        Note: built directly (no 'add()'), each metadata copied once."""
         cop = Transcription(self.name,self.start,self.end,corpus,
                              self.metadata.copy())
         if empty:
             return cop
-        d_cop = {None:None}
-        for a,tier in enumerate(self):                      # elem
-            pn,pi,ptier = tier.parent(det=True)
-            d_cop[tier] = cop.add(-1,tier.copy(cop,empty=True))
-        for tier in self:                                   # tiers
-            ntier = d_cop[tier]; ptier = tier.parent()
-            try:
-                nptier = d_cop[ptier]
-            except KeyError:
-                pn = ptier.name if ptier else "None"
-                raise("Parent tier instance not in Transcription:\n"
-                      "Tier: {}, Parent tier: {}\n".format(tier.name,pn))
-            ntier.setParent(nptier)                         # parent tier
-            for seg in tier:                                # add segments
-                nseg = ntier.add(-1,seg.copy(ntier))
-                nseg.setMeta("par",seg.parent(),"tech")
-        for tier in cop:                                    # parent segs'
-            for seg in tier:
-                pseg = seg.meta("par","tech")
-                if pseg and pseg.struct:
-                    nptier = cop.elem[pseg.struct.index()]
-                    npseg = nptier.elem[pseg.index()]
-                    seg.setParent(npseg)
+        with _noGC():                           # no collection while filling
+            self._copyTo(cop)
         return cop
+    def _copyTo(self,cop):
+        """Fills an empty Transcription 'cop' (see 'copy()')."""
+        d_ti = {}                                           # tier: index
+        for a,tier in enumerate(self.elem):                 # tiers
+            ntier = Tier(tier.name,tier.start,tier.end,cop,tier.metadata)
+            cop.elem.append(ntier); cop.d_elem[ntier] = [a,None]
+            d_ti[tier] = a
+        for a,tier in enumerate(self.elem):
+            ntier = cop.elem[a]; ptier = tier.parent()
+            if ptier:                                       # parent tier
+                if ptier not in d_ti:
+                    raise ValueError("Parent tier instance not in "
+                                     "Transcription:\nTier: {}, Parent "
+                                     "tier: {}\n".format(tier.name,
+                                                         ptier.name))
+                nptier = cop.elem[d_ti[ptier]]
+                cop.d_elem[ntier][1] = nptier
+                cop.d_elem[nptier].append(ntier)
+            l_elem,d_elem = ntier.elem,ntier.d_elem         # segments
+            for b,seg in enumerate(tier.elem):
+                nseg = Segment(seg.name,seg.start,seg.end,seg.content,
+                               ntier,seg.metadata)
+                l_elem.append(nseg); d_elem[nseg] = [b,None]
+        for a,tier in enumerate(self.elem):                 # parent segs'
+            l_elem,d_elem = cop.elem[a].elem,cop.elem[a].d_elem
+            for b,seg in enumerate(tier.elem):
+                pseg = tier.d_elem[seg][1]
+                if not pseg or not pseg.struct:
+                    continue
+                ti = d_ti.get(pseg.struct)
+                if ti == None:
+                    ti = pseg.struct.index()
+                npseg = cop.elem[ti].elem[pseg.index()]
+                nseg = l_elem[b]; d_elem[nseg][1] = npseg
+                npseg.struct.d_elem[npseg].append(nseg)
     
         # Iter functions
     def iterSeg(self,l_tiers=[],det=False):
@@ -1024,21 +1073,17 @@ class Transcription(Conteneur):
         # set functions
     def timetable(self,l_tiers=[]):
         """Returns a list of ordered time boundaries from all Segments."""
-            # Set up the lists to parse tiers
-        l_time = []
+            # Set up the set to parse tiers
+        s_time = set()
         if not l_tiers:
             l_tiers = self.elem
         for tier in l_tiers:
             typ = tier.meta('type','tech')  # check type
             if typ and (not typ == "time" and not typ == "subtime"):
                 continue
-            for seg in tier:
-                if seg.start not in l_time:
-                    l_time.append(seg.start)
-                if seg.end not in l_time:
-                    l_time.append(seg.end)
-        l_time.sort()
-        return l_time
+            s_time.update(seg.start for seg in tier.elem)
+            s_time.update(seg.end for seg in tier.elem)
+        return sorted(s_time)
     def setBounds(self,allow=True):
         """Updates everyone to adopt the segments' lowest/highest times."""
         start,end = -1.,-1.
@@ -1135,7 +1180,7 @@ class Corpus(Conteneur):
 
     def __init__(self,name=""):
             # main variables
-        Conteneur.__init__(self,name,start,end,"",[],corpus,{},metadata)
+        Conteneur.__init__(self,name,-1.,-1.,"",[],None,{},{})
         
         # default functions
     def copy(self):
@@ -1163,6 +1208,241 @@ class Corpus(Conteneur):
         return self.elem
 
     # Support Functions #
+class _Ref(tuple):
+    """A (tier,segment) index pair replacing a pointer in packed metadata."""
+def _packMeta(obj,d_ind):
+    """Copies metadata, replacing pointers to 'd_ind' elements by '_Ref's."""
+    if isinstance(obj,dict):
+        return {k:_packMeta(v,d_ind) for k,v in obj.items()}
+    elif isinstance(obj,list):
+        return [_packMeta(v,d_ind) for v in obj]
+    elif isinstance(obj,Conteneur) and obj in d_ind:
+        return _Ref(d_ind[obj])
+    return obj
+def _unpackMeta(obj,trans):
+    """Restores pointers from '_Ref's (see '_packMeta()')."""
+    if isinstance(obj,dict):
+        return {k:_unpackMeta(v,trans) for k,v in obj.items()}
+    elif isinstance(obj,list):
+        return [_unpackMeta(v,trans) for v in obj]
+    elif isinstance(obj,_Ref):
+        ti,si = obj
+        return trans.elem[ti] if si < 0 else trans.elem[ti].elem[si]
+    return obj
+def _packTrans(trans):
+    """Returns a Transcription as flat, index-based lists.
+    RETURNS:
+    - t_pack    : (tpl) (name,start,end,metadata,l_tiers) with, per tier,
+                        (name,start,end,metadata,parent,l_name,l_start,
+                         l_end,l_cont,l_meta,l_par)
+    Note: 'parent' is the parent tier's index, 'l_par' the parent segments'
+          global index (counting segments across tiers), '-1' for none.
+    Note: Empty segment metadata is stored as 'None'."""
+
+    d_ind,d_glob = {},{}; i = 0
+    for ti,tier in enumerate(trans):                    # indexes
+        d_ind[tier] = (ti,-1)
+        for si,seg in enumerate(tier.elem):
+            d_ind[seg] = (ti,si); d_glob[seg] = i; i += 1
+    l_tiers = []
+    for tier in trans:
+        ptier = trans.d_elem[tier][1]
+        l_name,l_start,l_end,l_cont,l_meta,l_par = [],[],[],[],[],[]
+        for seg in tier.elem:
+            l_name.append(seg.name); l_start.append(seg.start)
+            l_end.append(seg.end); l_cont.append(seg.content)
+            l_meta.append(_packMeta(seg.metadata,d_ind) if seg.metadata
+                          else None)
+            l_par.append(d_glob.get(tier.d_elem[seg][1],-1))
+        l_tiers.append((tier.name,tier.start,tier.end,
+                        _packMeta(tier.metadata,d_ind),
+                        d_ind[ptier][0] if ptier in d_ind else -1,
+                        l_name,l_start,l_end,l_cont,l_meta,l_par))
+    return (trans.name,trans.start,trans.end,
+            _packMeta(trans.metadata,d_ind),l_tiers)
+def _unpackTrans(t_pack,trans=None):
+    """Rebuilds a Transcription from '_packTrans()'.
+    Note: fills 'trans' if provided, otherwise creates a new instance.
+    Note: children follow tier/segment order."""
+
+    name,start,end,metadata,l_tiers = t_pack
+    if trans == None:
+        trans = Transcription()
+    trans.name,trans.start,trans.end = name,start,end
+    trans.elem,trans.d_elem = [],{}
+    l_segs,l_meta = [],[]
+    for ti,tpl in enumerate(l_tiers):                   # tiers and segments
+        (tname,ts,te,tmeta,pi,ll_name,ll_start,ll_end,
+         ll_cont,ll_meta,ll_par) = tpl
+        tier = Tier(tname,ts,te,trans)
+        trans.elem.append(tier); trans.d_elem[tier] = [ti,None]
+        l_meta.append((tier,tmeta))
+        l_elem,d_elem = tier.elem,tier.d_elem
+        for si,sname in enumerate(ll_name):
+            seg = Segment(sname,ll_start[si],ll_end[si],ll_cont[si],tier)
+            l_elem.append(seg); d_elem[seg] = [si,None]
+            if ll_meta[si]:
+                l_meta.append((seg,ll_meta[si]))
+        l_segs.extend(l_elem)
+    for ti,tpl in enumerate(l_tiers):                   # parents
+        pi = tpl[4]
+        if pi >= 0:
+            tier,ptier = trans.elem[ti],trans.elem[pi]
+            trans.d_elem[tier][1] = ptier; trans.d_elem[ptier].append(tier)
+        tier = trans.elem[ti]
+        for si,p in enumerate(tpl[10]):
+            if p < 0:
+                continue
+            seg,pseg = tier.elem[si],l_segs[p]
+            tier.d_elem[seg][1] = pseg; pseg.struct.d_elem[pseg].append(seg)
+    trans.metadata = _unpackMeta(metadata,trans)        # metadata
+    for obj,meta in l_meta:
+        obj.metadata = _unpackMeta(meta,trans)
+    return trans
+def shareTrans(trans):
+    """Copies a Transcription into a shared memory block.
+    ARGUMENTS:
+    - trans     :   (pntr) the Transcription to share
+    RETURNS:
+    - handle    :   (tpl) a picklable (block name,sizes) for 'attachTrans()'
+    Note: the block holds, for all segments in tier order, start/end times
+          ('float64'), parent indexes ('int32'), name/content offsets
+          ('int64') and the joined names/contents (UTF-8), then the
+          pickled tier information and metadata.
+    Note: the block outlives the process, 'attachTrans()' unlinks it; it
+          is not left to this process' resource tracker, which would
+          unlink it when a worker (or its pool) shuts down."""
+    from multiprocessing import shared_memory,resource_tracker
+    import array,pickle,itertools
+
+    name,start,end,metadata,l_tiers = _packTrans(trans)
+    a_time,a_par = array.array('d'),array.array('i')
+    l_str,l_head = [],[]
+    for (tname,ts,te,tmeta,pi,l_name,l_start,l_end,l_cont,l_meta,
+         l_par) in l_tiers:
+        a_time.extend(l_start); a_time.extend(l_end); a_par.extend(l_par)
+        l_str.extend(l_name); l_str.extend(l_cont)
+        l_head.append((tname,ts,te,tmeta,pi,len(l_name),l_meta))
+    a_off = array.array('q',itertools.accumulate(map(len,l_str),initial=0))
+    b_str = "".join(l_str).encode("utf_8")
+    b_head = pickle.dumps((name,start,end,metadata,l_head),
+                          protocol=pickle.HIGHEST_PROTOCOL)
+    l_blk = [a_time.tobytes(),a_off.tobytes(),a_par.tobytes(),b_str,b_head]
+    shm = shared_memory.SharedMemory(create=True,
+                                     size=max(1,sum(map(len,l_blk))))
+    if os.name == "posix":                      # (only tracked on POSIX)
+        resource_tracker.unregister(shm._name,"shared_memory")
+    i = 0
+    for blk in l_blk:
+        shm.buf[i:i+len(blk)] = blk; i += len(blk)
+    handle = (shm.name,len(a_par),len(b_str),len(b_head))
+    shm.close()
+    return handle
+def attachTrans(handle,unlink=True):
+    """Rebuilds a Transcription from a 'shareTrans()' block.
+    ARGUMENTS:
+    - handle    :   (tpl) the 'shareTrans()' handle
+    - unlink    :   (bool) whether to free the block afterwards
+    RETURNS:
+    - trans     :   (pntr) the Transcription
+    Note: numbers are read through typed views of the block and strings
+          decoded in one pass; nothing is sent through a pipe.
+    Note: this is not zero-copy: times, strings and all Segment objects
+          are rebuilt in this process (as '_unpackTrans()' does), at a
+          cost close to unpickling. Only the pipe transfer is avoided."""
+    from multiprocessing import shared_memory,resource_tracker
+    import pickle
+
+    s_name,n,i_str,i_head = handle
+    shm = shared_memory.SharedMemory(name=s_name)
+    buf = shm.buf; i = 0
+    l_time = buf[i:i+16*n].cast('d').tolist(); i += 16*n
+    l_off = buf[i:i+16*n+8].cast('q').tolist(); i += 16*n+8
+    l_par = buf[i:i+4*n].cast('i').tolist(); i += 4*n
+    s_str = str(buf[i:i+i_str],"utf_8"); i += i_str
+    name,start,end,metadata,l_head = pickle.loads(buf[i:i+i_head])
+    del buf
+    shm.close()
+    if unlink:
+        shm.unlink()
+    elif os.name == "posix":                    # left to its creator
+        resource_tracker.unregister(shm._name,"shared_memory")
+    l_tiers = []; j = 0                         # segments in tier order
+    for tname,ts,te,tmeta,pi,ln,l_meta in l_head:
+        a,b,c = 2*j,2*j+ln,2*(j+ln)             # names|starts, contents|ends
+        l_str = [s_str[l_off[k]:l_off[k+1]] for k in range(a,c)]
+        l_tiers.append((tname,ts,te,tmeta,pi,l_str[:ln],l_time[a:b],
+                        l_time[b:c],l_str[ln:],l_meta,l_par[j:j+ln]))
+        j += ln
+    return _unpackTrans((name,start,end,metadata,l_tiers))
+def _getElem(trans,ti,si=-1):
+    """Returns a Tier (or Segment) by index, for unpickling."""
+    return trans.elem[ti] if si < 0 else trans.elem[ti].elem[si]
+def _saveWorker(f_save,path,t_pack,args):
+    """Rebuilds a packed Transcription and exports it (in a worker)."""
+    trans = _unpackTrans(t_pack)
+    try:
+        f_save(path,trans,*args)
+    except Exception as err:
+        return trans.name,"{}: {}".format(type(err).__name__,err)
+    return trans.name,""
+def saveParallel(f_save,path,l_trans,workers,*args):
+    """Exports Transcriptions across a pool of processes.
+    ARGUMENTS:
+    - f_save    :   (func) a single-file export function (like 'saveEAF')
+    - path      :   (str) the export path (see 'f_save')
+    - l_trans   :   (overloaded) a Corpus or list of Transcriptions
+    - workers   :   (int) the number of processes
+    - args      :   (arg) the other 'f_save' arguments
+    RETURNS:
+    - Exports each Transcription, raises a 'RuntimeError' listing all
+      failed files (if any) once every file has been processed.
+    Note: Transcriptions are sent packed (see '_packTrans()'), without
+          their Corpus.
+    Note: on 'spawn' platforms, calls must be under 'if __name__...'."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    l_err = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        l_fut = [(tr.name,pool.submit(_saveWorker,f_save,path,
+                                      _packTrans(tr),args))
+                 for tr in l_trans]
+        for name,fut in l_fut:
+            try:
+                name,err = fut.result()
+            except Exception as e:                  # worker failure
+                err = "{}: {}".format(type(e).__name__,e)
+            if err:
+                l_err.append((name,err))
+    if l_err:
+        raise RuntimeError("{} export(s) failed:\n{}".format(len(l_err),
+                           "\n".join("{}: {}".format(*t) for t in l_err)))
+def _writeChunks(f,it,size=4096):
+    """Writes an iterator of strings, 'size' strings at a time."""
+    l_buf = []
+    for txt in it:
+        l_buf.append(txt)
+        if len(l_buf) >= size:
+            f.write("".join(l_buf)); l_buf.clear()
+    if l_buf:
+        f.write("".join(l_buf))
+L_GC = [0,False]; GC_LOCK = threading.Lock()    # users, collection was on
+@contextlib.contextmanager
+def _noGC():
+    """Pauses garbage collection while filling/writing large structures.
+    Note: counted across threads; collection only resumes (if it was
+          enabled) once the last user exits."""
+    with GC_LOCK:
+        if L_GC[0] == 0:
+            L_GC[1] = gc.isenabled(); gc.disable()
+        L_GC[0] += 1
+    try:
+        yield
+    finally:
+        with GC_LOCK:
+            L_GC[0] -= 1
+            if L_GC[0] == 0 and L_GC[1]:
+                gc.enable()
 D_ESCAPE = {}
 D_UNESCAPE = {}
 def _getOrd(char):
@@ -7,7 +7,7 @@ Note: Functions starting with '_' are not meant to be called by the user.
 'fromElan()' should be called. It in turn calls:
     > '_checkFiles()' to determine if 'path' is a dir/file
 It then calls, one or more times:
-    > 'loadEAF()' to load the Elan file
+    > 'loadEAF()' to load the Elan file (read by '_Reader', with expat)
 
 Note: '_checkFiles()' only selects files with '.eaf' (caps ignored)
       extensions.
@@ -17,11 +17,13 @@ Note: All metadata at all levels is stored in 'elan' metadata.
       The Transcription level encompasses header, footer and document.
 Note: Complex metadata (in header and footer) is stored with all attributes
       (and sub-elements) as a single block of text. See '_hyperval()' and
-      '_readFooter()'.
+      '_readFooter()'. CONTROLLED_VOCABULARY and REF_LINK_SET blocks are
+      'ElanXML' strings, parsed on demand and shared between files.
 """
-from .Transcription import Transcription
+from .Transcription import Transcription,Tier,Segment
 import xml.etree.cElementTree as ETree
-import os,html
+from xml.parsers import expat
+import os,re,io,html,collections,weakref
 
     # Dictionaries for segment/tier metadata
 d_segMeta = {'EXT_REF':[],'SVG_REF':[],'CVE_REF':[],'LANG_REF':[]}
@@ -62,6 +64,66 @@ def _hyperval(el):
         hyperval = hyperval+key+"=\""+html.unescape(val)+"\""
     return hyperval
 
+def _escText(txt):
+    """Escapes character data."""
+    return txt.replace("&","&amp;").replace("<","&lt;").replace(">","&gt;")
+def _escAttr(txt):
+    """Escapes an attribute value (as 'ETree.tostring()' does)."""
+    return (_escText(txt).replace("\"","&quot;").replace("\n","&#10;")
+            .replace("\t","&#09;").replace("\r","&#13;"))
+
+D_CV = weakref.WeakValueDictionary()   # (tag,text): ElanXML, shared while
+                                        # any file read still uses it
+R_ATTR = re.compile(r"([^\s=\"]+)=\"([^\"]*)\"")
+class ElanXML(str):
+    """A complex footer element (CONTROLLED_VOCABULARY, REF_LINK_SET).
+    The string is the metadata block written back by 'toElan':
+        'CV_ID="cv1">\\n\\t\\t<CV_ENTRY_ML ...>...</CV_ENTRY_ML>\\n\\t</TAG>\\n'
+    Note: the structure is only parsed when asked for ('attrib', 'tree()').
+    Note: immutable and interned (see 'intern()'); copies return 'self'."""
+
+    def __new__(cls,txt,tag="CONTROLLED_VOCABULARY"):
+        self = str.__new__(cls,txt)
+        self.tag = tag; self._attrib = None; self._tree = None
+        return self
+    def __copy__(self):
+        return self
+    def __deepcopy__(self,memo):
+        return self
+    def __reduce__(self):
+        return (ElanXML.intern,(str(self),self.tag))
+    @classmethod
+    def intern(cls,txt,tag="CONTROLLED_VOCABULARY"):
+        """Returns the shared instance for that text (see 'D_CV')."""
+        key = (tag,txt)
+        xml = D_CV.get(key)
+        if xml == None:
+            xml = D_CV[key] = cls(txt,tag)
+        return xml
+    @classmethod
+    def fromElement(cls,el):
+        """Serializes an 'ETree' element (and its sub-elements)."""
+        l_txt = [_hyperval(el),">",_escText(el.text or "")]
+        for cel in el:
+            l_txt.append(ETree.tostring(cel,encoding="unicode"))
+        return cls.intern(_closeXML(l_txt,el.tag),el.tag)
+    @property
+    def attrib(self):
+        """The element's attributes (dict)."""
+        if self._attrib == None:
+            self._attrib = dict(R_ATTR.findall(self[:self.index(">")]))
+        return self._attrib
+    def tree(self):
+        """The element as an 'ETree' element (parsed once)."""
+        if self._tree == None:
+            head,body = self.split(">",1)
+            head = " ".join(k+"=\""+_escAttr(v)+"\""
+                            for k,v in R_ATTR.findall(head))
+            self._tree = ETree.fromstring("<"+self.tag+" "+head+">"+body)
+        return self._tree
+def _closeXML(l_txt,tag):
+    """Ends an 'ElanXML' text (see 'ElanXML')."""
+    return "".join(l_txt).rstrip()+"\n\t</"+tag+">\n"
 def _writeMD(d,obj,el):
     """Loads segment/tier metadata (using fixed dictionaries)."""
     for key,l_other in d.items():
@@ -69,89 +131,6 @@ def _writeMD(d,obj,el):
             obj.setMeta(key,el[key],'elan',i=-1)
             for sub,k in l_other:
                 obj.setMeta(k,el[key],sub,i=-1)
-def _readTime(trans,elem,d_timeorder):
-    """Support function to fill that timeorder.
-    Adds transcription's start/end times."""
-    
-    l_ids = []
-    for time in elem:
-        l_ids.append(time.get("TIME_SLOT_ID"))
-        if "TIME_VALUE" in time.attrib:
-            d_timeorder[l_ids[-1]] = time.get("TIME_VALUE")
-        else:
-            d_timeorder[l_ids[-1]] = "-1000"
-    start = d_timeorder[l_ids[0]]; end = d_timeorder[l_ids[-1]]
-    trans.start = float(start[:-3] + '.' + start[-3:])
-    trans.end = float(end[:-3] + '.' + end[-3:])
-    return d_timeorder
-def _readSegs(tier,elem,d_timeorder,d_segs,incr):
-    """Loads the segments in the Tier instance."""
-    
-    def _readSegCont(el,c):
-        """Recovers the segment's name and content."""
-        
-        if 'ANNOTATION_ID' in el.attrib.keys():
-            name = html.unescape(el.attrib.get('ANNOTATION_ID'))
-        else:
-            name = "a"+str(incr); c += 1
-        cont = ""
-        for sub in el.iter():
-            if sub.tag == 'ANNOTATION_VALUE':
-                if sub.text:
-                    cont = html.unescape(sub.text)
-                break
-        return name,cont,c
-    def _readSegTime(el):
-        start = -1.; end = -1.
-        s_start = anno.attrib.get("TIME_SLOT_REF1")
-        s_end = anno.attrib.get("TIME_SLOT_REF2")
-        if s_start in d_timeorder:
-            s_start = d_timeorder[s_start]
-            while len(s_start) < 3:
-                s_start = "0"+s_start
-            start = float(s_start[:-3] + '.' + s_start[-3:])
-        if s_end in d_timeorder:
-            s_end = d_timeorder[s_end]
-            while len(s_end) < 3:
-                s_end = "0"+s_end
-            end = float(s_end[:-3] + '.' + s_end[-3:])
-        return start,end
-
-        # We look for 'ALIGNABLE_ANNOTATION' (time alignment)
-    for anno in elem.iter("ALIGNABLE_ANNOTATION"):
-            # Segment content
-        name,cont,incr = _readSegCont(anno,incr)
-            # Segment start/end times
-        start,end = _readSegTime(anno)
-        seg = tier.create(-1,name,start,end,cont)
-        d_segs[name] = [seg,True,""]
-            # Segment metadata
-        _writeMD(d_segMeta,seg,anno.attrib)
-
-        # Otherwise we look for 'REF_ANNOTATION' (ref association)
-    for anno in elem.iter("REF_ANNOTATION"):
-            #Segment content
-        name,cont,incr = _readSegCont(anno,incr)
-            # Parenting
-        ref = anno.attrib["ANNOTATION_REF"]
-        seg = tier.create(-1,name,-1.,-1.,cont)
-        d_segs[name] = [seg,False,ref]
-            # Segment metadata
-        _writeMD(d_segMeta,seg,anno.attrib)
-    return d_segs,incr
-def _readTier(trans,elem,d_timeorder,d_tiers,d_segs,incr):
-    """Loads a tier into the Transcription instance."""
-    
-        # Create a new Tier
-    tier = trans.create(-1,html.unescape(elem.attrib.get("TIER_ID","tier")),
-                        trans.start,trans.end,elem=[],metadata={})
-        # Tier metadata
-    parent = elem.attrib.get('PARENT_REF')
-    _writeMD(d_tierMeta,tier,elem.attrib)           # elan
-    d_tiers[tier.name] = (tier,parent)
-        # Segments
-    incr = _readSegs(tier,elem,d_timeorder,d_segs,incr)
-    return d_tiers,d_segs,incr
 def _readHeader(trans,elem):
     """Reads the header. All PROPERTY tags added to 'omni'."""
     
@@ -176,18 +155,11 @@ def _readFooter(trans,root):
     def _footerSingle(trans,el):        # reads attributes as block of text
         """Reads a single tag (LOCALE & EXTERNAL_REF)."""
         trans.setMeta(el.tag,_hyperval(el),'elan',i=-1)
-    def _footerComplex(trans,el):       # reads sub-elements as block of text
+    def _footerComplex(trans,el):       # reads sub-elements as 'ElanXML'
         """Reads the CONTROLLED VOCABULARY part."""
-        attr = _hyperval(el)+">\n"
-        for cel in el.iter():   # CV_ENTRY
-            if cel.tag == el.tag:
-                continue
-            attr = attr+ETree.tostring(cel).decode()
-            val = _hyperval(cel)
-            if val:
-                attr = attr+" "
-        attr = attr+"\t</"+el.tag+">\n"
-        trans.setMeta(el.tag,attr,'elan',i=-1)
+        xml = el.text if isinstance(el.text,ElanXML) else \
+              ElanXML.fromElement(el)   # '_Reader' gives the text directly
+        trans.setMeta(el.tag,xml,'elan',i=-1)
     def _footerLang(trans,el):          # adds 'lang' to 'omni' metadata
         trans.setMeta(el.tag,_hyperval(el),'elan',i=-1)
         lang = el.attrib.get("LANG_LABEL")
@@ -215,8 +187,15 @@ def _readFooter(trans,root):
             continue
         d_footer[el.tag](trans,el)
     
-def _fixStructure(trans,d_tiers,d_segs):
-    """We complete the missing information."""
+def _parTiers(d_tiers):
+    """Sets each tier's parent (from 'PARENT_REF')."""
+    for name,l_val in d_tiers.items():
+        tier,pname = l_val[0],l_val[1]
+        ptier,_ = d_tiers.get(pname,(None,""))
+        if ptier:
+            tier.setParent(ptier)
+def _fixTimes(tier):
+    """Replaces missing time codes (no TIME_VALUE) in a tier."""
     
     def _chTime(l_corr,ch_corr,tier,a,seg,t,pos=""):
         """Looks for time codes under zero (no TIME_VALUE)."""
@@ -253,37 +232,37 @@ def _fixStructure(trans,d_tiers,d_segs):
             _timeSplit(l_corr)
             l_corr = []
         return nch_corr,l_corr
-    def _parSeg(ptier,tier,seg):
-        seg,ch_time,ref = d_segs[seg.name]
-        pseg = None
-        if ch_time and ptier:
-            pseg = trans.getTime(seg.start,ptier)
-        elif ref:
-            pseg = d_segs[ref][0]
-        if pseg:
-            seg.setParent(pseg)
+
+    if not tier.elem or tier.elem[0].start < 0.:
+        return
+    l_corr = []; ch_corr = False
+    for a,seg in enumerate(tier):
+        ch_corr,l_corr = _chLoop(l_corr,ch_corr,tier,a,seg,seg.start,"s")
+        ch_corr,l_corr = _chLoop(l_corr,ch_corr,tier,a,seg,seg.end,"e")
+    if ch_corr and l_corr:
+        for a,tpl in enumerate(l_corr):
+            l_corr[a] = (tpl[0],tpl[1],tpl[2].content)
+        raise ValueError("Time code with no TIME_VALUE at end of tier: {}"
+                         .format(l_corr))
+def _parSeg(trans,d_segs,ptier,seg):
+    """Sets a segment's parent (by time or by ANNOTATION_REF)."""
+    seg,ch_time,ref = d_segs[seg.name]
+    pseg = None
+    if ch_time and ptier:
+        pseg = trans.getTime(seg.start,ptier)
+    elif ref:
+        pseg = d_segs[ref][0]
+    if pseg:
+        seg.setParent(pseg)
+def _fixStructure(trans,d_tiers,d_segs):
+    """We complete the missing information."""
 
     trans.getSpk()  # Add parents to 'trans'
         # Time_subdivision (replacing empty TIME_VALUEs)
     for tier in trans:
-        if not tier.elem or tier.elem[0].start < 0.:
-            continue
-        l_corr = []; ch_corr = False
-        for a,seg in enumerate(tier):
-            ch_corr,l_corr = _chLoop(l_corr,ch_corr,tier,a,seg,seg.start,"s")
-            ch_corr,l_corr = _chLoop(l_corr,ch_corr,tier,a,seg,seg.end,"e")
-        if ch_corr and l_corr:
-            for a,tpl in enumerate(l_corr):
-                l_corr[a] = (tpl[0],tpl[1],tpl[2].content)
-            raise ValueError("Time code with no TIME_VALUE at end of tier: {}"
-                             .format(l_corr))
-
+        _fixTimes(tier)
         # Tier parenting
-    for name,l_val in d_tiers.items():
-        tier,pname = l_val[0],l_val[1]
-        ptier,_ = d_tiers.get(pname,(None,""))
-        if ptier:
-            tier.setParent(ptier)
+    _parTiers(d_tiers)
         # Segment parenting
     for tier in trans.getTop():
         l_child = tier.children()
@@ -296,66 +275,507 @@ def _fixStructure(trans,d_tiers,d_segs):
                 for cseg in ctier:
                     if not cseg.name in d_segs:
                         continue
-                    _parSeg(ptier,ctier,cseg)
+                    _parSeg(trans,d_segs,ptier,cseg)
                 l_tmp = l_tmp + ctier.children()
             for ptier in l_par: # set time codes
                 ptier.setChildTime()
             l_child = l_tmp
     trans.setBounds()
 
-def loadEAF(path,name=""):
+R_SKIP = rb"<!--.*?-->|<!\[CDATA\[.*?\]\]>|"     # (comments, CDATA)
+R_BODY = re.compile(R_SKIP+rb"<(TIER|TIME_ORDER)\b(?:[^>\"']|\"[^\"]*\"|'[^']*')*?"
+                    rb"(/?)>",re.S)
+R_END = re.compile(R_SKIP+rb"</(TIER|TIME_ORDER)\s*>",re.S)
+T_UTF16 = (b"\xff\xfe",b"\xfe\xff",b"<\x00",b"\x00<") # not ASCII-compatible
+T_XML = ("CONTROLLED_VOCABULARY","REF_LINK_SET") # read as 'ElanXML'
+D_INDEX = collections.OrderedDict() # (path,size,mtime): '_stripBody()',
+I_INDEX = 8                         # for 'lazy' mode, last 'I_INDEX' files
+def _stripBody(data):
+    """Removes the content of TIME_ORDER and TIER elements.
+    RETURNS:
+    - data      : (bytes) the file without those contents
+    - l_rng     : (lst<tpl>) each TIER's (start,end) byte range
+    - t_time    : (tpl) the TIME_ORDER's byte range (or None)
+    Note: 'data' must be ASCII-compatible (not UTF-16).
+    Note: tags are matched around quoted attribute values; comments and
+          CDATA sections are skipped."""
+    def findEnd(tag,j):
+        """Returns the (start,end) of the matching end tag, or None."""
+        while True:
+            m = R_END.search(data,j)
+            if not m:
+                return None
+            elif m.group(1) == tag:
+                return m.start(),m.end()
+            j = m.end()
+    
+    l_part,l_rng,t_time = [],[],None; i = j = 0
+    while True:
+        m = R_BODY.search(data,j)
+        if not m:
+            break
+        j = m.end()
+        if not m.group(1):                      # comment, CDATA
+            continue
+        elif m.group(2):                        # empty tag
+            rng = (m.start(),j)
+        else:
+            t_end = findEnd(m.group(1),j)
+            if not t_end:
+                break
+            l_part.append(data[i:j]); i,j = t_end; rng = (m.start(),j)
+        if m.group(1) == b"TIER":
+            l_rng.append(rng)
+        else:
+            t_time = rng
+    l_part.append(data[i:])
+    return b"".join(l_part),l_rng,t_time
+def _indexEAF(path):
+    """Returns (and caches) the '_stripBody()' of a file, or None.
+    Note: only the 'I_INDEX' most recently used files are kept."""
+    st = os.stat(path); key = (os.path.abspath(path),st.st_size,st.st_mtime)
+    if key in D_INDEX:
+        D_INDEX.move_to_end(key)
+        return D_INDEX[key]
+    with open(path,'rb') as f:
+        data = f.read()
+    D_INDEX[key] = (None if data.startswith(T_UTF16) else
+                    _stripBody(data))
+    while len(D_INDEX) > I_INDEX:               # drop least recently used
+        D_INDEX.popitem(last=False)
+    return D_INDEX[key]
+def _codec(head,enc):
+    """Returns the Python codec for ranges of a file (no BOM in them)."""
+    if head.startswith((b"\xff\xfe",b"<\x00")):
+        return "utf_16_le"
+    elif head.startswith((b"\xfe\xff",b"\x00<")):
+        return "utf_16_be"
+    elif head.startswith(b"\xef\xbb\xbf"):
+        return "utf_8"
+    return enc if enc else "utf_8"
+def _fixname(key):
+    """Restores the ElementTree '{uri}name' form (see 'namespace_separator')."""
+    if "}" in key:
+        return "{"+key
+    return key
+def _toTime(s_time):
+    """Turns a milliseconds string into seconds."""
+    while len(s_time) < 3:
+        s_time = "0"+s_time
+    return float(s_time[:-3] + '.' + s_time[-3:])
+class _Reader:
+    """Event-driven EAF reader (expat callbacks).
+    Each section of the file gets its own handlers:
+    - 'TIME_ORDER' fills 'd_timeorder',
+    - 'TIER' creates segments as their end tags are read,
+    - CONTROLLED_VOCABULARY/REF_LINK_SET are written straight into an
+      'ElanXML' (no tree), given to '_readFooter()' as an element's 'text',
+    - everything else (HEADER, footer) is built as 'ETree' elements for
+      '_readHeader()' and '_readFooter()'.
+    Note: character data is only collected where needed.
+    Note: tiers refused by 'f_keep' are skipped (byte range kept). Those
+          later found to be ancestors of a kept tier are read at the end."""
+
+    def __init__(self,trans,f_keep=None,mode="full"):
+        self.trans = trans
+        self.mode = mode                        # 'full','header','lazy'
+        self.f_keep = f_keep                    # tier filter (by name)
+        self.d_par,self.s_need = {},set()       # tier parents, ancestors
+        self.d_skip,self.d_ord = {},{}          # skipped tiers, tier order
+        self.skip = None; self.enc = None; self.n_tier = 0
+        self.head = b""; self.l_ns = []         # file start, root xmlns
+        self.d_timeorder,self.d_time = {},{}    # slot ids to str/float
+        self.d_tiers,self.d_segs = {},{}
+        self.incr = 0                           # for missing ANNOTATION_IDs
+        self.root = None; self.tb = None; self.depth = 0; self.xml = None
+        self.tier = None; self.l_align,self.l_ref = [],[]
+        self.anno = None; self.cont = None; self.l_txt = []
+        self._newParser()
+        self.p.XmlDeclHandler = self._decl
+        self.p.StartNamespaceDeclHandler = self._nsDecl
+        self._setHandlers(self._docStart,self._docEnd)
+    def _newParser(self,enc=None):
+        p = self.p = expat.ParserCreate(enc if enc else self.enc,
+                                        namespace_separator="}")
+        p.buffer_text = True; p.buffer_size = 65536
+    def _setHandlers(self,f_start,f_end,f_data=None):
+        self.p.StartElementHandler = f_start
+        self.p.EndElementHandler = f_end
+        self.p.CharacterDataHandler = f_data
+    def parse(self,f):
+        """Parses an open (binary) file."""
+        self.head = f.read(4); f.seek(0)
+        if self.mode == "header":               # drop tier/time contents
+            data = f.read()
+            if not data.startswith(T_UTF16):
+                data = _stripBody(data)[0]
+            f = io.BytesIO(data)
+        try:
+            self.p.ParseFile(f)
+            self._readSkipped(f)
+        except expat.ExpatError as err:
+            raise ETree.ParseError(str(err)) from err
+        return self.trans
+    def _decl(self,version,encoding,standalone):
+        self.enc = encoding
+    def _nsDecl(self,prefix,uri):
+        if self.root == None:                   # (ANNOTATION_DOCUMENT's)
+            self.l_ns.append((prefix,uri))
+    def _parseRange(self,data,f_start,f_end,close=""):
+        """Parses a byte range of the file on its own.
+        Note: the range is decoded (see '_codec()') and parsed as text,
+              inside an element declaring the root's namespaces; 'close'
+              is added at its end (like "</TIER>")."""
+        head = "".join(" xmlns"+(":"+pf if pf else "")+"=\""+
+                       _escAttr(uri)+"\"" for pf,uri in self.l_ns)
+        self._newParser("UTF-8")
+        self.p.Parse("<range"+head+">",False)
+        self._setHandlers(f_start,f_end)
+        self.p.Parse(data.decode(_codec(self.head,self.enc))+close,False)
+        self._setHandlers(None,None)
+        self.p.Parse("</range>",True)
+    def _keep(self,name,parent):
+        """Checks 'f_keep', adding the ancestors of kept tiers."""
+        self.d_par[name] = parent
+        if self.f_keep == None:
+            return True
+        elif name in self.s_need or self.f_keep(name):
+            while parent != None and parent not in self.s_need:
+                self.s_need.add(parent); parent = self.d_par.get(parent)
+            return True
+        return False
+    def _readSkipped(self,f):
+        """Reads skipped tiers that turned out to be ancestors.
+        Note: each tier's byte range is parsed on its own, then all tiers
+              are put back in file order."""
+        l_late = sorted((tpl[3],tpl) for name,tpl in self.d_skip.items()
+                        if name in self.s_need)
+        if not l_late:
+            return
+        for _,(attrib,s,e,n) in l_late:
+            self._tierOpen(attrib,n)
+            if e > s:                           # not an empty tag
+                f.seek(s)
+                self._parseRange(f.read(e-s),self.p.StartElementHandler,
+                                 self.p.EndElementHandler,"</TIER>")
+            else:
+                self._tierClose()
+        trans,d_ord = self.trans,self.d_ord
+        trans.elem.sort(key=d_ord.get)
+        for a,tier in enumerate(trans.elem):
+            trans.d_elem[tier][0] = a
+        self.d_tiers = dict(sorted(self.d_tiers.items(),
+                                   key=lambda it:d_ord[it[1][0]]))
+        # Document level
+    def _docStart(self,tag,attrib):
+        tag = _fixname(tag)
+        if self.root == None:                   # ANNOTATION_DOCUMENT
+            self.root = ETree.Element(tag,{_fixname(k):v
+                                           for k,v in attrib.items()})
+        elif tag == "TIME_ORDER":
+            self.l_ids = []
+            if self.mode == "header":           # no time slots
+                self._setHandlers(None,self._headEnd)
+            else:
+                self._setHandlers(self._timeStart,self._timeEnd)
+        elif tag == "TIER":
+            name = html.unescape(attrib.get("TIER_ID","tier"))
+            self.n_tier += 1
+            if self._keep(name,attrib.get('PARENT_REF')):
+                self._tierOpen(attrib,self.n_tier)
+            else:                               # skip (keep byte range)
+                self.skip = (name,attrib,self.p.CurrentByteIndex)
+                self._setHandlers(None,self._skipEnd)
+        elif tag in T_XML:                      # CV, REF_LINK_SET
+            head = " ".join(k+"=\""+html.unescape(v)+"\""   # '_hyperval()'
+                            for k,v in attrib.items())
+            self.depth = 1; self.xml = (tag,[head,">"])
+            self._setHandlers(self._xmlStart,self._xmlEnd,self._xmlData)
+        else:                                   # HEADER, footer
+            self.tb = ETree.TreeBuilder(); self.depth = 0
+            self._setHandlers(self._treeStart,self._treeEnd,self.tb.data)
+            self._treeStart(tag,attrib)
+    def _docEnd(self,tag):
+        _readFooter(self.trans,self.root)
+        self.root.clear()
+        # TIME_ORDER
+    def _timeStart(self,tag,attrib):
+        id = attrib.get("TIME_SLOT_ID"); self.l_ids.append(id)
+        self.d_timeorder[id] = attrib.get("TIME_VALUE","-1000")
+    def _timeEnd(self,tag):
+        if tag != "TIME_ORDER":
+            return
+        if self.l_ids:                          # transcription's start/end
+            start = self.d_timeorder[self.l_ids[0]]
+            end = self.d_timeorder[self.l_ids[-1]]
+            self.trans.start = _toTime(start)
+            self.trans.end = _toTime(end)
+        self._setHandlers(self._docStart,self._docEnd)
+        # TIER
+    def _skipEnd(self,tag):
+        if tag != "TIER":
+            return
+        name,attrib,s = self.skip
+        self.d_skip[name] = (attrib,s,self.p.CurrentByteIndex,self.n_tier)
+        self._setHandlers(self._docStart,self._docEnd)
+    def _tierOpen(self,attrib,n):
+        trans = self.trans
+        name = html.unescape(attrib.get("TIER_ID","tier"))
+        if self.mode == "lazy":                 # see 'LazyTier'
+            self.tier = LazyTier(name,trans.start,trans.end,trans)
+            trans.d_elem[self.tier] = [len(trans.elem),None]
+            trans.elem.append(self.tier)
+        else:
+            self.tier = trans.create(-1,name,trans.start,trans.end,
+                                     elem=[],metadata={})
+        self.d_ord[self.tier] = n
+        _writeMD(d_tierMeta,self.tier,attrib)          # elan
+        self.d_tiers[self.tier.name] = (self.tier,attrib.get('PARENT_REF'))
+        if self.mode != "full":                 # no segments (yet)
+            self._setHandlers(None,self._headEnd)
+        else:
+            self._setHandlers(self._tierStart,self._tierEnd)
+    def _headEnd(self,tag):
+        if tag == "TIER" or tag == "TIME_ORDER":
+            self._setHandlers(self._docStart,self._docEnd)
+    def _tierStart(self,tag,attrib):
+        if tag == "ANNOTATION_VALUE":
+            if self.cont == None:               # first value only
+                self.l_txt = []; self.p.CharacterDataHandler = self.l_txt.append
+        elif tag == "ALIGNABLE_ANNOTATION":
+            self.anno = (attrib,True); self.cont = None
+        elif tag == "REF_ANNOTATION":
+            self.anno = (attrib,False); self.cont = None
+    def _getTime(self,id):
+        """Returns a slot's time in seconds ('-1.' if missing)."""
+        t = self.d_time.get(id)
+        if t == None:
+            s_time = self.d_timeorder.get(id)
+            t = self.d_time[id] = -1. if s_time == None else _toTime(s_time)
+        return t
+    def _tierEnd(self,tag):
+        if tag == "ANNOTATION_VALUE":
+            if self.p.CharacterDataHandler:
+                self.cont = html.unescape("".join(self.l_txt))
+                self.p.CharacterDataHandler = None
+            return
+        elif tag == "ALIGNABLE_ANNOTATION" or tag == "REF_ANNOTATION":
+            attrib,ch_time = self.anno
+            if 'ANNOTATION_ID' in attrib:
+                name = html.unescape(attrib['ANNOTATION_ID'])
+            else:
+                name = "a"+str(self.incr); self.incr += 1
+            cont = self.cont if self.cont else ""; self.cont = ""
+            if ch_time:
+                seg = Segment(name,self._getTime(attrib.get("TIME_SLOT_REF1")),
+                              self._getTime(attrib.get("TIME_SLOT_REF2")),
+                              cont,self.tier)
+                self.l_align.append(seg)
+            else:
+                seg = Segment(name,-1.,-1.,cont,self.tier)
+                self.l_ref.append((seg,attrib["ANNOTATION_REF"]))
+            _writeMD(d_segMeta,seg,attrib)              # metadata
+        elif tag == "TIER":                     # ALIGNABLE then REF
+            self._tierClose()
+    def _tierClose(self):
+        tier,d_segs = self.tier,self.d_segs
+        l_elem,d_elem = tier.elem,tier.d_elem
+        for seg in self.l_align:
+            d_elem[seg] = [len(l_elem),None]; l_elem.append(seg)
+            d_segs[seg.name] = [seg,True,""]
+        for seg,ref in self.l_ref:
+            d_elem[seg] = [len(l_elem),None]; l_elem.append(seg)
+            d_segs[seg.name] = [seg,False,ref]
+        self.tier = None; self.l_align,self.l_ref = [],[]
+        self._setHandlers(self._docStart,self._docEnd)
+        # HEADER and footer
+    def _treeStart(self,tag,attrib):
+        self.tb.start(_fixname(tag),{_fixname(k):v for k,v in attrib.items()})
+        self.depth += 1
+    def _treeEnd(self,tag):
+        self.tb.end(_fixname(tag)); self.depth -= 1
+        if self.depth > 0:
+            return
+        el = self.tb.close(); self.tb = None
+        if el.tag == "HEADER":
+            _readHeader(self.trans,el)
+        else:
+            self.root.append(el)
+        self._setHandlers(self._docStart,self._docEnd)
+
+        # CONTROLLED_VOCABULARY and REF_LINK_SET
+    def _xmlStart(self,tag,attrib):
+        l_txt = self.xml[1]; l_txt.append("<"+tag)
+        for k,v in attrib.items():
+            l_txt.append(" "+k+"=\""+_escAttr(v)+"\"")
+        l_txt.append(">"); self.depth += 1
+    def _xmlData(self,data):
+        self.xml[1].append(_escText(data))
+    def _xmlEnd(self,tag):
+        self.depth -= 1; l_txt = self.xml[1]
+        if self.depth > 0:
+            if l_txt[-1] == ">":                # empty element
+                l_txt[-1] = "/>"
+            else:
+                l_txt.append("</"+tag+">")
+            return
+        el = ETree.Element(tag); self.xml = None
+        el.text = ElanXML.intern(_closeXML(l_txt,tag),tag)
+        self.root.append(el)
+        self._setHandlers(self._docStart,self._docEnd)
+
+class LazyTier(Tier):
+    """A Tier reading its segments on first access (see 'loadEAF()').
+    Note: 'elem' and 'd_elem' are properties; their first access reads the
+          tier's byte range (parent tiers first) through '_Loader'."""
+
+    _loader = None
+    @property
+    def elem(self):
+        if self._loader != None:
+            self._loader.load(self)
+        return self._elem
+    @elem.setter
+    def elem(self,elem):
+        self._elem = elem
+    @property
+    def d_elem(self):
+        if self._loader != None:
+            self._loader.load(self)
+        return self._d_elem
+    @d_elem.setter
+    def d_elem(self,d_elem):
+        self._d_elem = d_elem
+    def loaded(self):
+        """Returns True if the segments have been read."""
+        return self._loader == None
+class _Loader:
+    """Reads 'LazyTier's segments from their byte range.
+    Note: uses the '_Reader' that built the Transcription, whose
+          'd_timeorder' and 'd_segs' are filled as tiers are read."""
+
+    def __init__(self,path,reader,t_time):
+        self.path,self.reader = path,reader
+        self.t_time = t_time                    # TIME_ORDER range (if unread)
+        self.d_rng = {}                         # tier: (start,end) range
+    def _parse(self,rng,f_start,f_end):
+        s,e = rng; reader = self.reader
+        with open(self.path,'rb') as f:
+            f.seek(s); data = f.read(e-s)
+        try:
+            reader._parseRange(data,f_start,f_end)
+        except expat.ExpatError as err:
+            raise ETree.ParseError(str(err)) from err
+    def load(self,tier):
+        """Reads a tier's segments and sets their parents/time codes."""
+        reader = self.reader; trans = reader.trans
+        tier._loader = None
+        ptier = tier.parent()
+        if ptier:                               # parent first
+            ptier.elem
+        if self.t_time:                         # time slots (once)
+            self._parse(self.t_time,reader._docStart,reader._docEnd)
+            self.t_time = None
+            for ntier in trans:
+                ntier.start,ntier.end = trans.start,trans.end
+        reader.tier = tier
+        self._parse(self.d_rng[tier],reader._tierStart,reader._tierEnd)
+        _fixTimes(tier)
+        if not ptier:
+            return
+        d_segs = reader.d_segs
+        for seg in tier:                        # parents
+            if seg.name in d_segs:
+                _parSeg(trans,d_segs,ptier,seg)
+        if tier.elem and tier.elem[0].start >= 0.:
+            return
+        l_segs = []; o_seg = None               # time codes from parents
+        for seg in tier:
+            pseg = seg.parent()
+            if not pseg == o_seg:
+                if o_seg and l_segs:
+                    tier._split(l_segs,o_seg)
+                o_seg = pseg; l_segs = []
+            l_segs.append(seg)
+        if o_seg and l_segs:
+            tier._split(l_segs,o_seg)
+
+def loadEAF(path,name="",tiers=None,tier_filter=None,mode="full"):
     """Main function to load a given EAF file.
     ARGUMENTS:
     - path          : (str) A full path to the file.
     - name          : (str) The Transcription name.
+    - tiers         : (lst<str>) Names of the tiers to load.
+    - tier_filter   : (func) Returns True for the (names of) tiers to load.
+    - mode          : (str) 'full', 'header' (no time slots/segments) or
+                            'lazy' (segments read on first access).
     RETURNS:
     - trans         : (pntr) A Transcription instance.
     Note: assumes encoding (and 'name') is known.
-    Note: tier types are stored in metadata, segment 'ref' not kept."""
+    Note: tier types are stored in metadata, segment 'ref' not kept.
+    Note: parsed with expat callbacks (see '_Reader').
+    Note: with 'tiers' and/or 'tier_filter', the other tiers are skipped,
+          except for ancestors (by PARENT_REF) of the tiers loaded.
+    Note: 'header' only reads the document, header, footer and tier
+          attributes: tiers are empty (but parented), times are '-1.'.
+    Note: 'lazy' reads the same, tiers being 'LazyTier's. The file's byte
+          index is cached (see '_indexEAF()'). Bounds are only set by
+          the first tier read (from TIME_ORDER) and children segments
+          follow the order in which tiers are read."""
     
+        # Tier filter
+    f_keep = None
+    if tiers != None or tier_filter != None:
+        s_tiers = set(tiers) if tiers else set()
+        def f_keep(tname):
+            return (tname in s_tiers or
+                    (tier_filter != None and tier_filter(tname)))
         # New Transcription instance
     trans = Transcription(name=name,metadata={})
-    d_timeorder = {}; root = None; d_tiers = {}; d_segs = {}; incr = 0
-    
-    b_root = False
-    for event, elem in ETree.iterparse(path, events=("start","end")):
-            # Find root for operation (cleaning)
-        if not b_root:
-            root = elem
-            b_root = True
-        elif event == "end":
-                # getTimeorder (/!\ not Timetable)
-            if elem.tag == "TIME_ORDER":
-                d_timeorder = _readTime(trans,elem,d_timeorder)
-                root.remove(elem)
-                # getTiers
-            elif elem.tag == "TIER":
-                d_tiers,d_segs,incr = _readTier(trans,elem,d_timeorder,
-                                                d_tiers,d_segs,incr)
-                root.remove(elem)
-                # getHeader&Footer
-            elif elem.tag == "HEADER":
-                _readHeader(trans,elem)
-                root.remove(elem)
-            elif elem.tag == "ANNOTATION_DOCUMENT":
-                _readFooter(trans,root)
-                root.clear()
-    _fixStructure(trans,d_tiers,d_segs)
+    if mode == "lazy":
+        t_index = _indexEAF(path)
+        if not t_index:                         # UTF-16, read it all
+            mode = "full"
+    reader = _Reader(trans,f_keep,mode)
+    if mode == "lazy":
+        data,l_rng,t_time = t_index
+        reader.parse(io.BytesIO(data))
+        _parTiers(reader.d_tiers)
+        loader = _Loader(path,reader,t_time)
+        for tier in trans:
+            loader.d_rng[tier] = l_rng[reader.d_ord[tier]-1]
+            tier._loader = loader
+        return trans
+    with open(path,'rb') as f:
+        reader.parse(f)
+    if mode == "header":
+        _parTiers(reader.d_tiers)
+    else:
+        _fixStructure(trans,reader.d_tiers,reader.d_segs)
     return trans
 def fromElan(path,**args):
     """Imports one or more EAF(s).
     ARGUMENTS:
     - path          : (str) A full path to either a file or a directory.
+    - tiers         : (lst<str>) Names of the tiers to load.
+    - tier_filter   : (func) Returns True for the (names of) tiers to load.
+    - mode          : (str) 'full','header' or 'lazy' (see 'loadEAF()').
     RETURNS:
     - trans/l_trans : (pntr/list) Either a Transcription or a list of
-                                  Transcriptions."""
+                                  Transcriptions.
+    Note: without 'tiers'/'tier_filter', all tiers are loaded. Ancestor
+          tiers are always loaded."""
     
+        # Args
+    tiers = args.get('tiers')               # tiers to load
+    tier_filter = args.get('tier_filter')   # or a function to pick them
+    mode = args.get('mode',"full")          # 'full','header','lazy'
         # Get files
     l_files,ch_dir = _checkFiles(path)
     if ch_dir == 1:                 # list of files
         l_trans = []
         for tup in l_files:
-            l_trans.append(loadEAF(*tup))
+            l_trans.append(loadEAF(*tup,tiers,tier_filter,mode))
         return l_trans
     elif ch_dir == 0 and l_files:   # single file
-        return loadEAF(*l_files[0])
+        return loadEAF(*l_files[0],tiers,tier_filter,mode)
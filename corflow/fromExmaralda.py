@@ -9,7 +9,7 @@ Main changes have been metadata and replacing 'ifs' with dictionaries.
 
 /!\ segment metadata is stored directly in 'omni' subdivision!
 """
-from .Transcription import Transcription, Tier
+from .Transcription import Transcription,Tier,Segment,_noGC
 import xml.etree.cElementTree as ETree
 import os,html
 
@@ -44,7 +44,7 @@ def _readMeta(trans,elem,d_timeorder,count):
         if not el.text:
             return
         trans.setMeta(el.tag,el.text,"exb")
-        if el.txt == "transcription-name":
+        if el.tag == "transcription-name":
             trans.setMeta("name",el.text)
     def _addRef(el,trans):
         url = el.get('url')
@@ -128,8 +128,8 @@ def _readTimeline(trans,elem,d_timeorder,count):
         else:
             d_timeorder[tli.get("id")] = -1.
     return count
-def _readTier(trans,elem,d_timeorder,count):
-    """Support function to fill the tiers.
+def _newTier(trans,elem):
+    """Support function to create a tier (from its start tag).
     
     Note: category and type.
     category    :   'v', 'de', 'sup', 'nv' (verbal, german, suprasegmental, 
@@ -137,54 +137,51 @@ def _readTier(trans,elem,d_timeorder,count):
     type        :   't', 'd', 'a' (transcription, non-verbal, annotation)
     There should be only one 't' per speaker."""
     
-    def _readSegment(tier,el,count):
-        # segment time boundaries
-        s,e = -1.,-1.
-        for k,v in el.attrib.items():
-            if k == "start":
-                s = d_timeorder[v]
-            elif k == "end":
-                e = d_timeorder[v]
-            # segment metadata
-        d_smeta = {}
-        for e in el:
-            if (e.tag == "ud-information" and
-                "attribute-name" in e.attrib and e.text):
-                d_smeta[e.get("attribute-name")] = html.unescape(e.text)
-                el.remove(e)
-            # id and content
-        id = "a"+str(count); count += 1
-        l_txt = []
-        for txt in el.itertext():
-            l_txt.append(txt)
-        cont = html.unescape("".join(l_txt))
-        seg = tier.create(-1,"",s,e,cont,tier,metadata=d_smeta.copy())
-        return count
-    
-        # tier
         ## We don't check the speaker, category, type
-    tier = trans.create(-1,"",trans.start,trans.end,struct=trans)
+    tier = Tier("",trans.start,trans.end,trans)
+    trans.d_elem[tier] = [len(trans.elem),None]; trans.elem.append(tier)
     for k,v in elem.attrib.items():
         tier.setMeta(k,html.unescape(v),"exb")
         if k == "display-name":
             tier.name = html.unescape(v)
         elif k == "speaker":
             tier.setMeta("speaker",html.unescape(v))
-        # segments
-    cont = ""; id = ""; s_meta = {}
-    for el in elem:
-        if el.tag == "ud-tier-information": # additional tier metadata
-            for e in el:
-                k = e.get('attribute-name')
-                if k and e.text:
-                    tier.setMeta(k,html.unescape(e.text),"exb")
+    return tier
+def _readTierInfo(tier,elem):
+    """Adds 'ud-tier-information' to tier metadata."""
+    for e in elem:
+        k = e.get('attribute-name')
+        if k and e.text:
+            tier.setMeta(k,html.unescape(e.text),"exb")
+def _readEvent(el,d_timeorder):
+    """Returns an event's (start,end,content,metadata).
+    Note: 'ud-information' goes to metadata, its tail to content."""
+    
+    s,e = d_timeorder[el.get('start')],d_timeorder[el.get('end')]
+    d_smeta = {}; l_txt = [el.text] if el.text else []
+    for sub in el:
+        if sub.tag == "ud-information":
+            k = sub.get("attribute-name")
+            if k and sub.text:
+                d_smeta[k] = [html.unescape(sub.text)]
         else:
-            count = _readSegment(tier,el,count)
+            l_txt.extend(sub.itertext())
+        if sub.tail:
+            l_txt.append(sub.tail)
+    cont = "".join(l_txt)
+    cont = html.unescape(cont) if "&" in cont else cont
+    return s,e,cont,({'omni':d_smeta} if d_smeta else {})
+def _fillTier(tier,l_seg,count):
+    """Creates all segments of a tier at once, named 'a<count>'."""
+    l_elem = tier.elem
+    for s,e,cont,d_smeta in l_seg:
+        l_elem.append(Segment("a"+str(count),s,e,cont,tier,d_smeta))
+        count += 1
+    tier.d_elem = {seg:[b,None] for b,seg in enumerate(l_elem)}
     return count
 D_TAG = {"meta-information":_readMeta,
          "speakertable":_readSpeakers,
-         "common-timeline":_readTimeline,
-         "tier":_readTier}
+         "common-timeline":_readTimeline}
 def _checkTrans(trans):
     """Support function to finalize the transcription.
     1. Establish a structure using speakers (and types).
@@ -213,7 +210,7 @@ def _checkTrans(trans):
         for tier in l_tiers:
             if not (tier.meta("type") == "t"):
                 continue
-            for ctier in list:
+            for ctier in l_tiers:
                 if tier == ctier:
                     continue
                 ctier.setParent(tier); test = True
@@ -246,31 +243,40 @@ def loadEXB(path,name=""):
     - name          : (str) The Transcription name.
     RETURNS:
     - trans         : (pntr) A Transcription instance.
-    Note: assumes encoding (and 'name') is known."""
+    Note: assumes encoding (and 'name') is known.
+    Note: reads parser events; 'event's are read as they end (with the
+          'common-timeline'), their tier filled once it ends. Read
+          elements are removed from their parent ('l_par')."""
 
         # New Transcription instance
     trans = Transcription(name=name,metadata={})
-    root = None
     d_timeorder = {}; count = 0 # count is for segment id, increment
+    l_par = []; tier = None; t_el = None; l_seg = [] # open elements, tier
     
-    b_root = False
-    for event, elem in ETree.iterparse(path, events=("start","end")):
-        if not b_root:
-            root = elem
-            b_root = True; continue
-        elif event == "end":
-            if elem.tag == "tier":
-                l_ev = elem.findall('event'); s = "None"
-                if l_ev:
-                    s = l_ev[-1].get('start')
-                print(elem.tag,elem.get('id'),len(l_ev),s)
-            f = D_TAG.get(elem.tag)
-            if f:
-                count = f(trans,elem,d_timeorder,count)
-                par = root.find(f".//{elem.tag}/..")
-                if par and elem in par:
-                    par.remove(elem)
-    del root; del d_timeorder
+    with _noGC():                           # no collection while filling
+        for event, elem in ETree.iterparse(path, events=("start","end")):
+            if event == "start":
+                if elem.tag == "tier" and not tier:
+                    tier = _newTier(trans,elem); t_el = elem
+                l_par.append(elem); continue
+            l_par.pop()
+            if tier:
+                if elem is t_el:                    # end of tier
+                    count = _fillTier(tier,l_seg,count)
+                    tier = t_el = None; l_seg = []
+                elif not l_par[-1] is t_el:         # (inside an event)
+                    continue
+                elif elem.tag == "event":
+                    l_seg.append(_readEvent(elem,d_timeorder))
+                elif elem.tag == "ud-tier-information":
+                    _readTierInfo(tier,elem)
+            elif elem.tag in D_TAG:
+                count = D_TAG[elem.tag](trans,elem,d_timeorder,count)
+            else:
+                continue
+            if l_par:                               # free memory
+                l_par[-1].remove(elem)
+    del d_timeorder
         # A series of checks
     _checkTrans(trans)
     return trans
@@ -8,6 +8,8 @@ cocoon-49aefa90-8c1f-3ba8-a099-0ebefc6a2aa7> has:
     > '_checkFiles()' to determine if 'path' is a dir/file
 It then calls, one or more times:
     > 'loadPangloss()' to load the CRDO file
+Both read each TEXT/WORDLIST through '_iterPangloss()'; 'iterPangloss()'
+yields them one by one (kwarg 'iter').
     
 Note: if root is "ARCHIVE", returns a 'Corpus' instance.
       Else ("TEXT/WORDLIST"), returns a 'Transcription'.
@@ -71,8 +73,9 @@ def omniMD(obj,el,div="pangloss"):                  # Attributes
             omni = d_omni.get(key)
             if omni:
                 obj.setMeta(omni,val,i=-1)
-def _addSeg(trans,elem,subel,s,e,incr,c):           # FORM/TRANSL
-    """Deals with FORM/TRANSL by addings Segments."""
+def _addSeg(trans,elem,subel,s,e,incr,c,d_segs):   # FORM/TRANSL
+    """Deals with FORM/TRANSL by addings Segments.
+    Note: 'd_segs' maps the increment 'c' to its segment (see NOTEs)."""
 
         # Establish the tier name
     nt = elem.tag+"-"+str(incr)
@@ -93,57 +96,41 @@ def _addSeg(trans,elem,subel,s,e,incr,c):           # FORM/TRANSL
     cont = ETree.tostring(subel).decode().split(">",1)[1]
     cont = html.unescape(cont.rsplit("</",1)[0])
         # Add segment
-    seg = tier.create(-1,str(c),s,e,cont)
+    seg = tier.create(-1,str(c),s,e,cont); d_segs[c] = seg
     omniMD(seg,elem,"pangloss_sub")
     c += 1
     return tier,seg,incr,c
-def loopTags(trans,el,s,e,incr,c):
+def loopTags(trans,el,s,e,incr,c,d_segs):
     """Loops over remaining NOTE/FORM/TRANSL/AREA tags."""
     
     l_notes,d_tiers = [],{}
     for sub in el:                                  # get data
         if sub.tag == "FORM" or sub.tag == "TRANSL":
-            tier,seg,incr,c = _addSeg(trans,el,sub,s,e,incr,c)
+            tier,seg,incr,c = _addSeg(trans,el,sub,s,e,incr,c,d_segs)
             d_tiers[tier] = seg
         elif not sub.tag in l_subs:
             l_notes.append((c,sub.tag,strIt(sub)))
     return l_notes,d_tiers,incr,c
-def attribNotes(trans,l_notes):
-    """Assigns NOTE/AREA to Segments"""
+def attribNotes(trans,l_notes,d_segs):
+    """Assigns NOTE/AREA to Segments (the last one created before)."""
     for c,key,val in l_notes:
-        c = c-1
-        for tier in trans:
-            for a in range(len(tier)-1,-1,-1):
-                seg = tier.elem[a]; ch = int(seg.name)
-                if ch < c:              # wrong tier
-                    break
-                elif ch == c:           # found segment
-                    seg.setMeta(key,val,'pangloss',-1); break
+        seg = d_segs.get(c-1)
+        if seg and seg.struct.struct is trans:  # found segment
+            seg.setMeta(key,val,'pangloss',-1)
 
     # Writing functions
-def _readRoot(corpus,root,el):
-    """Deals with ARCHIVE, TEXT and WORDLIST tags."""
+def _readRoot(el):
+    """Deals with TEXT and WORDLIST tags (a new Transcription)."""
     
-    def cr(co):
-        if co:
-            trans = co.create(metadata={})
-        else:
-            trans = Transcription(metadata={})
-        return co,trans
-    
-    tr_tag = ""; sub = ""; trans = None
-    if not root:
-        root = el
-        if el.tag == "ARCHIVE":
-            corpus = Corpus()
-            return root,False,corpus,trans,tr_tag,sub
     if el.tag == "TEXT":
-        corpus,trans = cr(corpus); tr_tag = el.tag; sub = "S"
+        tr_tag = el.tag; sub = "S"
     elif el.tag == "WORDLIST":
-        corpus,trans = cr(corpus); tr_tag = el.tag; sub = "W"
-    if trans:
-        omniMD(trans,el)
-    return root,True,corpus,trans,tr_tag,sub
+        tr_tag = el.tag; sub = "W"
+    else:                                           # ARCHIVE or other
+        return None,"",""
+    trans = Transcription(metadata={})
+    omniMD(trans,el)
+    return trans,tr_tag,sub
 def _readHeader(trans,el):                          # HEADER
     """Reads the HEADER."""
     for sub in el.iter():
@@ -154,7 +141,7 @@ def _readHeader(trans,el):                          # HEADER
             audio = sub.get('href')
             trans.setMeta('audio',audio,i=-1)
             trans.setMeta('SOUNDFILE',strIt(sub),'pangloss',i=-1)
-def _readSub(trans,el,c,s=-1.,e=-1.):               # S/W/M
+def _readSub(trans,el,c,d_segs,s=-1.,e=-1.):        # S/W/M
     """Deals with S (sentences), W (words) and M (morphemes)."""
     
     def recursion(c,s,e):               # W/M tags
@@ -167,17 +154,17 @@ def _readSub(trans,el,c,s=-1.,e=-1.):               # S/W/M
             for a in range(lf):
                 sa = trans._decimal(s+(dur*a))
                 ea = trans._decimal(s+(dur*(a+1)))
-                d_tiers,c = _readSub(trans,l_fsubs[a],c,sa,ea)
+                d_tiers,c = _readSub(trans,l_fsubs[a],c,d_segs,sa,ea)
                 el.remove(l_fsubs[a])
         return c
 
     incr = 0                        # Tier increment (deprecated)
     s,e = _audio(el,s,e)            # First we need time codes
-    l_notes,d_tiers,incr,c = loopTags(trans,el,s,e,incr,c)# Then tags
+    l_notes,d_tiers,incr,c = loopTags(trans,el,s,e,incr,c,d_segs) # Tags
     c = recursion(c,s,e)            # Then we deal with 'W/M'
-    attribNotes(trans,l_notes)      # Attribute NOTE/AREA to Segments
+    attribNotes(trans,l_notes,d_segs)   # Attribute NOTE/AREA to Segments
     return d_tiers,c
-def _readFooter(trans,el,c):
+def _readFooter(trans,el,c,d_segs):
     """Deals with TEXT/WORDLIST, after HEADER/S/W got read."""
     incr = 0                                # Get a tier increment
     for tier in trans:
@@ -185,76 +172,110 @@ def _readFooter(trans,el,c):
             incr += 1
     incr += 1
     s,e = _audio(el,-1.,-1.); l_notes = []; oc = c  # Time codes
-    l_notes,d_tiers,incr,c = loopTags(trans,el,s,e,incr,c)
+    l_notes,d_tiers,incr,c = loopTags(trans,el,s,e,incr,c,d_segs)
     for a in range(len(l_notes)-1,-1,-1):           # Trans NOTEs
         d,key,val = l_notes[a]
         if d == oc:
             trans.setMeta(key,val,"pangloss",-1)
             l_notes.pop(a)
-    attribNotes(trans,l_notes)              # Tier NOTEs
+    attribNotes(trans,l_notes,d_segs)       # Tier NOTEs
     return c
-def _fixStructure(corpus,trans,name):
+def _cleanTrans(tr):
     """Was meant to parent tiers/segments but proves too hazardous.
-    A bit of cleaning instead, then returns either 'corpus' or 'trans'."""
+    Gives TEXT tiers time codes, removes 'tech' dict, renames segs'."""
+    tr.setBounds(allow=False)
+    for tier in tr:
+        if tier.meta("level","tech") == "TEXT" and len(tier) == 1:
+            tier.elem[0].start = tr.start; tier.elem[0].end = tr.end
+        tier.metadata.pop("tech")
+    tr.renameSegs()
+def _iterPangloss(path,name=""):
+    """Yields each TEXT/WORDLIST once read, with 'True' under ARCHIVE.
+    Note: an ARCHIVE root is first yielded as '(True,None)'.
+    Note: read elements are removed from their parent ('l_par')."""
     
-    def cleanTr(tr):
-        """Gives TEXT tiers time codes, removes 'tech' dict, renames segs'."""
-        s,e = -1.,-1.; tr.setBounds(allow=False)
-        for tier in tr:
-            if tier.meta("level","tech") == "TEXT" and len(tier) == 1:
-                tier.elem[0].start = tr.start; tier.elem[0].end = tr.end
-            tier.metadata.pop("tech")
-        tr.renameSegs()
-    if corpus:
-        for tr in corpus:
-            cleanTr(tr)
-        corpus.name == name; corpus.setMeta("name",name)
-        return corpus
-    else:
-        cleanTr(trans)
-        trans.name = name; trans.setMeta("name",name)
-        return trans
+        # Variables
+    root = None; trans = None; c = 0        # root element, increment
+    tr_tag = ""; sub = "S"                  # "root" tag and first sub-tag
+    d_segs = {}; l_par = []                 # increment to segment, parents
+    for event, elem in ETree.iterparse(path, events=("start","end")):
+        if event == "start":
+            if root is None:
+                root = elem
+                if root.tag == "ARCHIVE":   # (Corpus, even if empty)
+                    yield True,None
+            if not trans:                   # TEXT/WORDLIST
+                trans,tr_tag,sub = _readRoot(elem)
+            l_par.append(elem); continue
+        l_par.pop()
+        if not trans:
+            continue
+        elif elem.tag == sub:               # S/W/M
+            _,c = _readSub(trans,elem,c,d_segs)
+        elif elem.tag == "HEADER":          # HEADER (TITLE/SOUNDFILE)
+            _readHeader(trans,elem)
+        elif elem.tag == tr_tag:            # TEXT/WORDLIST
+            c = _readFooter(trans,elem,c,d_segs); _cleanTrans(trans)
+            if l_par:
+                l_par[-1].remove(elem)
+            ch_arch = (root.tag == "ARCHIVE")
+            if not ch_arch:
+                trans.name = name; trans.setMeta("name",name)
+            yield ch_arch,trans
+            trans = None; d_segs.clear(); continue
+        else:
+            continue
+        if l_par:                           # free memory
+            l_par[-1].remove(elem)
+def iterPangloss(path,name=""):
+    """Yields the Transcription(s) of a given Pangloss file.
+    ARGUMENTS:
+    - path          : (str) A full path to the file.
+    - name          : (str) The Transcription name (if not an ARCHIVE).
+    RETURNS:
+    - trans         : (pntr) Transcription instances (generator).
+    Note: each TEXT/WORDLIST is yielded (and cleaned) once its end tag
+          is read: an ARCHIVE's texts are not kept in a Corpus."""
+    for ch_arch,trans in _iterPangloss(path,name):
+        if trans:
+            yield trans
 def loadPangloss(path,name=""):
-    """Main function to load a given EAF file.
+    """Main function to load a given Pangloss file.
     ARGUMENTS:
     - path          : (str) A full path to the file.
-    - name          : (str) The Transcription name.
+    - name          : (str) The Transcription (or Corpus) name.
     RETURNS:
-    - trans         : (pntr) A Transcription instance.
+    - trans         : (pntr) A Transcription (or Corpus) instance.
     Note: assumes encoding (and 'name') is known."""
     
-        # Variables
-    corpus = None; trans = None             # Corpus and transcription
-    root = None; b_root = False; c = 0      # root element, test and increment
-    tr_tag = ""; sub = "S"                  # "root" tag and first sub-tag
-    for event, elem in ETree.iterparse(path, events=("start","end")):
-        if not b_root:
-            root,b_root,corpus,trans,tr_tag,sub = _readRoot(corpus,root,elem)
-        elif event == "end":
-            if elem.tag == sub:             # S/W/M
-                _,c = _readSub(trans,elem,c); root.remove(elem)
-            elif elem.tag == "HEADER":      # HEADER (TITLE/SOUNDFILE)
-                _readHeader(trans,elem); root.remove(elem)
-            elif elem.tag == tr_tag:        # ARCHIVE/TEXT/WORDLIST
-                c = _readFooter(trans,elem,c)
-                if elem in root:
-                    root.remove(elem)
-                b_root = False; incr = 0
-    del root
-    ret = _fixStructure(corpus,trans,name)
-    return ret
+    corpus = None; trans = None
+    for ch_arch,trans in _iterPangloss(path,name):
+        if not ch_arch:
+            return trans
+        elif not trans:                     # ARCHIVE root
+            corpus = Corpus(name); corpus.setMeta("name",name); continue
+        trans.struct = corpus
+        corpus.d_elem[trans] = [len(corpus.elem),None]
+        corpus.elem.append(trans)
+    return corpus
 
     # Main function
 def fromPangloss(path,**args):
     """Imports one or more XML(s) (Pangloss).
     ARGUMENTS:
     - path          : (str) A full path to either a file or a directory.
+    - iter          : (bool) Whether to yield Transcriptions one by one.
     RETURNS:
     - trans/l_trans : (pntr/list) Either a Transcription or a list of
-                                  Transcriptions."""
+                                  Transcriptions.
+    Note: with 'iter', returns a generator of all the files'
+          Transcriptions (see 'iterPangloss()'), ARCHIVEs included."""
     
+    ch_iter = args.get('iter',False)    # generator of Transcriptions
         # Get files
     l_files,ch_dir = _checkFiles(path)
+    if ch_iter:
+        return (trans for tup in l_files for trans in iterPangloss(*tup))
     if ch_dir == 1:                 # list of files
         l_trans = []
         for tup in l_files:
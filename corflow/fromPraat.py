@@ -7,10 +7,10 @@ And the file encoding.
 Note: Functions starting with '_' are not meant to be called by the user.
 
 'fromPraat()' should be called. It in turn calls:
-    > '_checkFiles()' to determine if 'path' is a dir/file, and call:
-        > 'testEncoding()' to determine the type/encoding
+    > '_checkFiles()' to determine if 'path' is a dir/file
 It then calls, one or more times:
     > 'loadTGD()' to load the TextGrid file according to its type
+      (determining the type/encoding with '_sniff()' if need be)
 
 Note: '_checkFiles()' only selects files with '.textgrid' (caps ignored)
       extensions.
@@ -18,14 +18,15 @@ Note: The encoding is automatically detected using the first 3 bytes of a file,
       with 'd_enc' structured as {3-bytes: encoding}.
       A UnicodeDecodeError likely means the file's encoding isn't in that
       dictionary.
-Note: 'utf-8' will require reading the whole file once.
+Note: Each file is read once, as bytes; type and encoding are checked on
+      those bytes, which are then decoded once ('latin_1' if 'utf_8' fails).
 Note: Point tiers (TextTier type) are loaded with start/end time codes equal.
       Nothing else reveals their type.
-Note: Each TextGrid type has its own function ('_loadX()') with sub-functions.
-      They repeat themselves a lot but are kept almost entirely separate.
-      While probably inefficient, this is intentional.
+Note: 'text' and 'short' TextGrids hold the same values in the same order.
+      Both are read by '_loadText()' from a single regex pass over the
+      decoded file ('d_token'). 'binary' has its own '_loadBinary()'.
 """
-from .Transcription import Transcription
+from .Transcription import Transcription,Tier,Segment,_noGC
 import os,re,struct
 
     # Technical functions
@@ -42,17 +43,53 @@ def _chType(tier_type):
     elif tier_type == "TextTier":
         tier_type = False
     return tier_type
-def _textHeader(f):
-    """Skipping the header for 'long/short' types."""
-    line = "header_check"
-    while not line == "\n":
-        line = f.readline()
-def testEncoding(path,type,encoding,
-                 d_enc = {b'\x6f\x6f\x42':"binary",
-                          b'\x46\x69\x6c':"utf_8",
-                          b'\xef\xbb\xbf':"utf_8_sig",
-                          b'\xfe\xff\x00':"utf_16_be",
-                          b'\xff\xfe\x00':"utf_16_le"}):
+d_enc = {b'\x6f\x6f\x42':"binary",           # 'ooB'
+         b'\x46\x69\x6c':"utf_8",            # 'Fil'
+         b'\xef\xbb\xbf':"utf_8_sig",
+         b'\xfe\xff\x00':"utf_16_be",
+         b'\xff\xfe\x00':"utf_16_le",
+         b'\xff\xfe\x46':"utf_16_le",        # BOM + 'F'
+         b'\x00\x46\x00':"utf_16_be",        # no BOM
+         b'\x46\x00\x69':"utf_16_le"}
+def _sniff(data,type,encoding,d_enc=d_enc):
+    """Returns the type, encoding and decoded text of a file's bytes.
+    ARGUMENTS:
+    - data          : (bytes) The whole file.
+    - type/encoding : (str) User-defined values (or None).
+    - d_enc         : (dict) The codec check dictionary.
+    RETURNS:
+    - type          : (str) A TextGrid type ('text','short','binary').
+    - encoding      : (str) A file encoding.
+    - text          : (str/bytes) The decoded file ('data' if binary).
+    Note: see 'testEncoding()'. Decoded once, 'latin_1' only if 'utf_8'
+          fails (and the encoding was not user-defined)."""
+    
+    if type == "binary":
+        return type,encoding,data
+    ch_user = bool(type and encoding)       # blindly apply both
+    if not encoding:                        # first 3 bytes
+        encoding = d_enc.get(data[:3],"utf_8")
+        if encoding == "binary":
+            return "binary",encoding,data
+    try:
+        text = data.decode(encoding)
+    except UnicodeDecodeError:
+        if ch_user or not encoding == "utf_8":
+            raise
+        encoding = "latin_1"; text = data.decode(encoding)
+    if ch_user:
+        return type,encoding,text
+    i = -1                                  # 4th line gives the type
+    for a in range(3):
+        i = text.find("\n",i+1)
+        if i < 0:
+            break
+    if i >= 0 and text.startswith("xmin",i+1):
+        type = "text"
+    else:
+        type = "short"
+    return type,encoding,text
+def testEncoding(path,type,encoding,d_enc=d_enc):
     """Returns the assumed encoding/type if none has been given.
     ARGUMENTS:
     - path          : (str) A full path to the file.
@@ -65,71 +102,14 @@ def testEncoding(path,type,encoding,
     - encoding      : (str) A file encoding.
     Note: If encoding is given, it's always applied blindy to all files.
           If type is given, it will be overwritten if encoding is missing.
-    Note: Only handles 'd_enc' encodings. 'latin_1' derived from 'utf_8'."""
+    Note: Only handles 'd_enc' encodings. 'latin_1' derived from 'utf_8'.
+    Note: 'loadTGD()' does this itself, on the bytes it loads."""
     
-    def ch_error(f,encoding):
-        if encoding == "utf_8":
-            encoding = "latin_1"; f.close()
-            f = open(path,'r',encoding=encoding)
-            return f,encoding
-        else:
-            raise
-    def _read(fpath,lt=-1):
-        a = 0; lb = b''
-        with open(fpath,'rb') as f:
-            if lt < 0:
-                lb = os.path.getsize(fpath)
-            while a < lt:
-                byte = f.read(1)
-                if byte == "":
-                    break
-                lb = lb+byte; a += 1
-        return lb
-    def _read2(f,i_range):
-        for a in range(i_range):
-            f.readline()
-        return f.readline()
-        # Use user-defined (for all)
     if type and encoding:
         return type,encoding
-    typ,enc = type,encoding
-        # Otherwise we check the files
-        # Encoding
-    if not enc:
-            ## We read 3 bytes
-        oct3 = _read(path,3)
-        if oct3 in d_enc:
-            encoding = d_enc[oct3]
-                # Binary
-            if encoding == "binary":
-                return "binary",encoding
-            # Can't find the encoding
-        else:
-            return type,encoding
-        # Type
-    f = open(path,'r',encoding=encoding); ch_enc = True
-    while ch_enc:                           # Skip 3 lines
-        try:
-            line = _read2(f,3)
-            ch_enc = False
-        except UnicodeDecodeError:
-            f,encoding = ch_error(f,encoding)
-    if line.startswith("xmin"):         # get the file type
-        type = "text"
-    else:
-        type = "short"
-    if not encoding == "utf_8":         # last part is for utf-8
-        f.close(); return type,encoding
-    ch_enc = True
-    while ch_enc:
-        try:                                # read rest of the file
-            for line in f:
-                continue
-            ch_enc = False
-        except UnicodeDecodeError:
-            f,encoding = ch_error(f,encoding)
-    f.close()
-    return type,encoding
+    with open(path,'rb') as f:
+        data = f.read()
+    return _sniff(data,type,encoding,d_enc)[:2]
 def _checkFiles(path,type,encoding,ch_ext=".textgrid",sym=[]):
     """Returns a list of '.TextGrid' files with their type and encoding."""
     
@@ -137,8 +117,7 @@ def _checkFiles(path,type,encoding,ch_ext=".textgrid",sym=[]):
         fi,ext = os.path.splitext(file); 
         if not ext.lower() == ch_ext:
             return
-        t,enc = testEncoding(fpath,type,encoding)
-        l_files.append((fpath,t,enc,fi,sym))
+        l_files.append((fpath,type,encoding,fi,sym))
     
     l_files = []; ch_dir = 0
     if os.path.isdir(path):        # 'path' is a directory
@@ -153,200 +132,98 @@ def _checkFiles(path,type,encoding,ch_ext=".textgrid",sym=[]):
         return [],-1
     return l_files,ch_dir
     # Loading functions
-def _loadLong(path,trans,enc):
-    """Loads a 'text file' TextGrid."""
+R_VAL = (r"(\"[^\"]*(?:\"\"[^\"]*)*\"|"                        # "string"
+         r"[-+]?[0-9.]+(?:[eE][-+]?[0-9]+)?)")                  # or number
+d_token = {'text':(re.compile(r"=[ \t]*"+R_VAL),2),  # 'xmin = 0.0' (+ header)
+           'short':(re.compile(r"\n"+R_VAL),0)}     # '0.0' on its own line
+def _text(s):
+    """Cleans a quoted string (as read line by line by Praat)."""
+    s = s[1:-1]
+    if "\n" in s or "\r" in s:             # multi-line: each line stripped
+        l_line = s.replace("\r\n","\n").replace("\r","\n").split("\n")
+        s = "\n".join([line.strip() for line in l_line[:-1]]+
+                      [l_line[-1].lstrip()])
+    else:
+        s = s.lstrip()
+    return _escape(s) if "\"" in s else s
+def _fillTier(tier,incr,l_start,l_end,l_cont):
+    """Creates all segments of a tier at once, named 'a<incr>'."""
+    i_int = len(l_start)
+    l_name = ["a"+str(b) for b in range(incr,incr+i_int)]
+    tier.elem = list(map(Segment,l_name,l_start,l_end,l_cont,[tier]*i_int))
+    tier.d_elem = {seg:[b,None] for b,seg in enumerate(tier.elem)}
+    return incr+i_int
+def _newTier(trans,name,start,end):
+    """Appends a new (empty) tier."""
+    tier = Tier(name,start,end,trans)
+    trans.d_elem[tier] = [len(trans.elem),None]; trans.elem.append(tier)
+    return tier
+def _loadText(text,trans,typ="text"):
+    """Loads a 'text' or 'short' TextGrid (from its decoded text).
+    Both list the same numbers and strings in the same order: after a '='
+    ('text') or at the start of a line ('short'). Labels ('xmin',
+    'item [1]:', etc.) are ignored (see 'd_token')."""
     
-    def _longText(f):
-        """Recovers text from a line."""
-        text = f.readline().split("\"",1)[1].replace("\n","").strip()
-        while not re.search('(""|(?<!"))"$',text):
-            text = text+"\n"+f.readline().replace("\n","").strip()
-        return _escape(text[:-1])
-    def _longNum(f,fl=False):
-        """Recovers a number from a line."""
-        if fl:
-            num = float(f.readline().split('=',1)[1])
-        else:
-            num = int(f.readline().split('=',1)[1])
-        return num
-    def _longTime(f,ch=True):
-        """Recovers xmin/xmax from a line each."""
-        start = _longNum(f,True)
-        if ch:
-            end = _longNum(f,True)
-        else:
-            end = start
-        return start,end
-    def _longSeg(f,tier,ch,incr):
-        """Loads a segment."""
-
-            # Interval line
-        f.readline()
-            # (Creating the Segment instance)
-        seg = tier.create(-1,"a{:d}".format(incr))
-            # Segment xmin/xmax
-        seg.start,seg.end = _longTime(f,ch)
-            # Segment text
-        seg.content = _longText(f)
-        return incr+1
-    def _longTier(f,incr):
-        """Loads a tier."""
-        
-            # Item line
-        f.readline()
-            # Tier type
-        tier_type = _chType(_longText(f))
-            # Tier name (creating the Tier instance)
-        tier = trans.create(-1,_longText(f))
-            # Tier xmin/xmax
-        tier.start,tier.end = _longTime(f)
-            # Tier intervals (segments)
-        i_int = _longNum(f)
-        for b in range(i_int):
-            incr = _longSeg(f,tier,tier_type,incr)
-        return incr
-
-    with open(path,'r',encoding=enc) as f:
-            # header
-        _textHeader(f)
-            # Transcription xmin/xmax
-        trans.start,trans.end = _longTime(f)
-            # end of header
-        f.readline()
-            # number of tiers
-        i_tiers = _longNum(f); incr = 0
-        f.readline()
-        for a in range(i_tiers):
-            incr = _longTier(f,incr)
+    r_tok,i = d_token[typ]
+    l_tok = r_tok.findall(text)                 # numbers and "strings"
+        # Transcription xmin/xmax, number of tiers
+    trans.start,trans.end = float(l_tok[i]),float(l_tok[i+1])
+    i_tiers = int(l_tok[i+2]); i += 3; incr = 0
+    for a in range(i_tiers):
+            # Tier type, name, xmin/xmax, number of segments
+        tier_type = _chType(_text(l_tok[i]))
+        tier = _newTier(trans,_text(l_tok[i+1]),float(l_tok[i+2]),
+                        float(l_tok[i+3]))
+        i_int = int(l_tok[i+4]); i += 5
+            # Segments (xmin/xmax/text or number/mark), in bulk
+        step = 3 if tier_type else 2
+        l_seg = l_tok[i:i+(step*i_int)]; i += step*i_int
+        l_start = list(map(float,l_seg[0::step]))
+        l_end = list(map(float,l_seg[1::3])) if tier_type else l_start
+        l_cont = list(map(_text,l_seg[step-1::step]))
+        incr = _fillTier(tier,incr,l_start,l_end,l_cont)
     return trans
-def _loadShort(path,trans,enc):
-    """Loads a 'short file' TextGrid."""
+S_D,S_DD = struct.Struct('>d'),struct.Struct('>dd')      # 1 or 2 times
+S_H,S_I = struct.Struct('>h'),struct.Struct('>I')       # lengths
+def _loadBinary(data,trans):
+    """Loads a 'binary file' TextGrid (from its bytes).
+    Relies on 'struct' ('unpack_from()') over a 'memoryview'."""
     
-    def _shortText(f):
-        """Recovers text from a line."""
-        text = f.readline()[1:].replace("\n","").strip()
-        while not re.search('(""|(?<!"))"$',text):
-            text = text+"\n"+f.readline().replace("\n","").strip()
-        return _escape(text[:-1])
-    def _shortTime(f,ch=True):
-        """Recovers xmin/xmax from a line each."""
-        start = float(f.readline())
-        if ch:
-            end = float(f.readline())
-        else:
-            end = start
-        return start,end
-    def _shortSeg(f,tier,ch,incr):
-        """Loads a segment."""
-            # (Creating the Segment instance)
-        seg = tier.create(-1,"a{:d}".format(incr))
-            # Segment xmin/xmax
-        seg.start,seg.end = _shortTime(f,ch)
-            # Segment text
-        seg.content = _shortText(f)
-        return incr+1
-    def _shortTier(f,incr):
-        """Loads a tier."""
-
-            # Tier type
-        tier_type = _chType(_shortText(f))
-            # Tier name (creating the Tier instance)
-        tier = trans.create(-1,_shortText(f))
-            # Tier xmin/xmax
-        tier.start,tier.end = _shortTime(f)
-            # Tier intervals (segments)
-        i_int = int(f.readline())
-        for b in range(i_int):
-            incr = _shortSeg(f,tier,tier_type,incr)
-        return incr
-
-    with open(path,'r',encoding=enc) as f:
-            # header
-        _textHeader(f)
-            # Transcription xmin/xmax
-        trans.start,trans.end = _shortTime(f)
-            # end of header (<exists>)
-        f.readline()
-            # number of tiers
-        i_tiers = int(f.readline()); incr = 0
-        for a in range(i_tiers):
-            incr = _shortTier(f,incr)
-    return trans
-def _loadBinary(path,trans,enc):
-    """Loads a 'binary file' TextGrid.
-    Relies on 'struct'."""
-    
-    def _binHeader(f):
-        """Skipping the header."""
-        
-        while True:
-            byte = f.read(1)
-            if byte == b'\x64': # 'd' of 'TextGrid'
-                break
-    def _binTime(f,ch=True):
-        """Recovers xmin/xmax from 8 bytes each."""
-        
-        start = struct.unpack('>d',f.read(8))[0]
-        if ch:
-            end = struct.unpack('>d',f.read(8))[0]
-        else:
-            end = start
-        return start,end
-    def _binText(f):
-        """Recovers text from unknown length."""
-        
-            # 2-bytes (big-endian) text length
-            ## Can also be an 'FF' indicator
-        bb = f.read(2); text = ""
-        if bb == b'\xff\xff':   # BOM indicating 2-bytes per character
-            i_text = struct.unpack('>h',f.read(2))[0]
-            for b in range(i_text):
-                text = text+f.read(2).decode("utf_16_be")
-        else:                   # Otherwise 1-byte per character
-            i_text = struct.unpack('>h',bb)[0]
-            for b in range(i_text):
-                text = text+f.read(1).decode("utf_8")
+    def _binText(mv,p):
+        """Returns a text (of 1 or 2-byte characters) and the next position."""
+        if mv[p] == 255 and mv[p+1] == 255:  # 'ff ff': 2 bytes per character
+            n = S_H.unpack_from(mv,p+2)[0]*2; p += 4
+            text = str(mv[p:p+n],"utf_16_be")
+        else:                               # 1 byte per character
+            n = S_H.unpack_from(mv,p)[0]; p += 2
+            text = str(mv[p:p+n],"utf_8")
             # We reduce double-quotes to one
-        return _escape(text)
-    def _binSeg(f,tier,ch,incr):
-        """Loads a segment."""
-        
-            # (Creating the Segment instance)
-        seg = tier.create(-1,"a{:d}".format(incr))
-            # Segment xmin/xmax
-        seg.start,seg.end = _binTime(f,ch)
-            # Segment text
-        seg.content = _binText(f)
-        return incr+1
-    def _binTier(f,incr):
-        """Loads a tier."""
+        return (_escape(text) if "\"" in text else text),p+n
     
-            # Tier type
-            ## Reduced to boolean (Interval/PointTier, else should be error)
-        i_type = struct.unpack('B',f.read(1))[0]
-        tier_type = _chType(f.read(i_type).decode("utf_8"))
-            # Tier name (creating the Tier instance)
-        tier = trans.create(-1,_binText(f))
-            # Tier xmin/xmax
-        tier.start,tier.end = _binTime(f)
-            # Tier intervals (segments)
-        i_int = struct.unpack('>I',f.read(4))[0]
-            # Segments
-        for b in range(i_int):
-            incr = _binSeg(f,tier,tier_type,incr)
-        return incr
-    
-    with open(path,'rb') as f:
-            # header
-        _binHeader(f)
-            # Transcription xmin/xmax
-        trans.start,trans.end = _binTime(f)
-            # tiers? <exists>
-        f.read(4)
-            # Tiers
-        i_tiers = struct.unpack('B',f.read(1))[0]; incr = 0
+    with memoryview(data) as mv:
+            # header (up to the 'd' of 'TextGrid')
+        p = data.find(b'd')+1
+            # Transcription xmin/xmax, 'tiers? <exists>' (4 bytes), tiers
+        trans.start,trans.end = S_DD.unpack_from(mv,p)
+        i_tiers = mv[p+20]; p += 21; incr = 0
         for a in range(i_tiers):
-            incr = _binTier(f,incr)
+                # Tier type
+            n = mv[p]; tier_type = _chType(str(mv[p+1:p+1+n],"utf_8"))
+                # Tier name, xmin/xmax, number of segments
+            name,p = _binText(mv,p+1+n)
+            start,end = S_DD.unpack_from(mv,p)
+            i_int = S_I.unpack_from(mv,p+16)[0]; p += 20
+            tier = _newTier(trans,name,start,end)
+                # Segments
+            l_start,l_end,l_cont = [],[],[]
+            for b in range(i_int):
+                if tier_type:               # IntervalTier (xmin/xmax)
+                    start,end = S_DD.unpack_from(mv,p); p += 16
+                else:                       # TextTier (a single time)
+                    start = end = S_D.unpack_from(mv,p)[0]; p += 8
+                cont,p = _binText(mv,p)
+                l_start.append(start); l_end.append(end); l_cont.append(cont)
+            incr = _fillTier(tier,incr,l_start,l_end,l_cont)
     return trans
 def loadTGD(path,typ="text",enc="utf-8",name="",sym=[]):
     """Main function to load a given TextGrid.
@@ -357,18 +234,22 @@ def loadTGD(path,typ="text",enc="utf-8",name="",sym=[]):
     - name          : (str) The Transcription name.
     RETURNS:
     - trans         : (pntr) A Transcription instance.
-    Note: assumes TextGrid type and encoding (and 'name') are known.
+    Note: if 'typ' or 'enc' is None, both are detected (see '_sniff()').
+    Note: the file is read (and decoded) only once.
     Note: 'TextTier' type has both time codes equal."""
 
         # New Transcription instance
     trans = Transcription(name=name)
+        # Type/encoding from the file's bytes
+    with open(path,'rb') as f:
+        data = f.read()
+    typ,enc,data = _sniff(data,typ,enc)
         # Selection among the three TextGrid types
-    if typ == "text":
-        trans = _loadLong(path,trans,enc)
-    elif typ == "short":
-        trans = _loadShort(path,trans,enc)
-    elif typ == "binary":
-        trans = _loadBinary(path,trans,enc)
+    with _noGC():                           # no collection while filling
+        if typ == "text" or typ == "short":
+            trans = _loadText(data,trans,typ)
+        elif typ == "binary":
+            trans = _loadBinary(data,trans)
         # Segment cleaning (removing pauses or such)
     if sym:
         trans.remGaps(sym)
@@ -428,4 +309,5 @@ Then for each seg:
 4. Interval text ((3) bytes, utf_8 or utf_16_be)
 
 Note: Header 1 and 3 are skipped.
-Note: Relies on Python's 'struct' module for floats and integers."""
\ No newline at end of file
+Note: Relies on Python's 'struct' module ('unpack_from()') for floats and
+      integers, read in place from a 'memoryview' of the file's bytes."""
\ No newline at end of file
@@ -9,6 +9,9 @@ Note: Functions starting with '_' are not meant to be called by the user.
     > '_checkFiles()' to determine if 'path' is a dir/file
 It then calls, one or more times:
     > 'loadTRS()' to load the Transcriber file
+'loadTRS()' reads parser events: 'Turn' tags go through '_Turn', other
+tags (D_TAG) are read once their end tag comes. Sections are stored and
+given to segments at the end ('_setSections()').
     
 Note: the 'mode' argument (kwarg) picks a method to deal with
       Event/Comment/Background tags. It is imperfect and users should
@@ -21,7 +24,7 @@ Note: All metadata is stored in 'trs' key.
 """
 from .Transcription import Transcription
 import xml.etree.cElementTree as ETree
-import os,html,re
+import os,re
 
 def _checkFiles(path,ch_ext=".trs"):
     """Returns a list of '.trs' files."""
@@ -65,47 +68,35 @@ def _readSpeakers(trans,elem,d_args):
         trans.addSpk(name,sub.attrib)
         d_args['d_spk'][sub.get('id')] = name
 def _readSection(trans,elem,d_args):
-    """Adds metadata to segments of the section."""
-    def _chSegTime(s,tier):
-        if not tier.elem:
-            return -1
-        sn,si,seg = tier.getTime(s,det=True)
-        if si >= 0:
-            return si
-        d1,d2 = s-tier.elem[0].start,s-tier.elem[-1].start
-        d1 = d1*-1 if d1 < 0 else d1
-        d2 = d2*-1 if d2 < 0 else d2
-        if d1>d2:
-            for a in range(len(tier)-1,-1,-1):
-                seg = tier.elem[a]
-                if seg.start < s:
-                    si = a+1; break
-        else:
-            for a in range(len(tier)):
-                seg = tier.elem[a]
-                if seg.start > s:
-                    si = a; break
-        if si >= len(tier):
-            return -1
-        else:
-            return si
-    
+    """Stores the section for '_setSections()'."""
     typ,top = elem.get('type'),elem.get('topic')
     s,e = float(elem.get('startTime',"-1.")),float(elem.get('endTime',"-1."))
-    desc = d_args['d_top'].get(top)
     if (not typ) or s < 0.: # Nothing to add
         return
+    d_args['l_sec'].append((s,e,typ,d_args['d_top'].get(top)))
+def _setSections(trans,l_sec):
+    """Adds section metadata to the segments of each section.
+    Note: for each tier, a single index 'j' follows the sections
+          (first segment containing or after the section start)."""
+    
+    if not l_sec:
+        return
     for tier in trans: # For all tiers...
-        si = _chSegTime(s,tier)
-        if si < 0:
-            continue
-        for a in range(si,len(tier)): # For all segs' in that section...
-            seg = tier.elem[a]
-            if seg.end > e:
-                break
-            seg.setMeta('type',typ,'trs')
-            if desc:
-                seg.setMeta('desc',desc,'trs')
+        l_seg = tier.elem; ls = len(l_seg); j = 0
+        for s,e,typ,desc in l_sec:
+            while j > 0 and (l_seg[j-1].end > s or  # (section goes back)
+                  (l_seg[j-1].end == s and l_seg[j-1].start == s)):
+                j -= 1
+            while j < ls and (l_seg[j].end < s or
+                  (l_seg[j].end == s and l_seg[j].start < s)):
+                j += 1
+            for a in range(j,ls): # For all segs' in that section...
+                seg = l_seg[a]
+                if seg.end > e:
+                    break
+                seg.setMeta('type',typ,'trs')
+                if desc:
+                    seg.setMeta('desc',desc,'trs')
 def _toText(sub,sub_txt,ntxt,i,seg,l_trs):
     """Adds tag's 'desc' to segment content."""
     return ntxt+" "+sub.get('desc',"")+" ",l_trs
@@ -138,87 +129,85 @@ def _toMeta(sub,sub_txt,ntxt,i,seg,l_trs):
         l_trs.append((tag,cont))
     return ntxt,l_trs
 D_MODE = {'text':_toText,'tier':_toTier,'meta':_toMeta}
-def _readTurn(trans,elem,d_args):
-    """Adds segments from the 'Turn' tag.
-    Handles sub-tags ('Who','Sync','Comment','Event','Background')."""
+R_NL = re.compile(r"\r?\n[ \t]*")          # line breaks (and indentation)
+def _rawTag(sub):
+    """Returns the tag as text (without the final '>')."""
+    txt = "<"+sub.tag+"".join([" {}=\"{}\"".format(k,v)
+                               for k,v in sub.items()])
+    txt = txt+" /" if (sub.text is None and len(sub) == 0) else txt
+    return R_NL.sub("",txt) if "\n" in txt else txt
+class _Turn:
+    """Adds segments from a 'Turn' tag, fed by parser events.
+    Handles sub-tags ('Who','Sync','Comment','Event','Background').
+    Note: text is read from the previous element ('text' or 'tail')
+          when the next event comes; 'pos' is the index in the Turn's
+          text (tags excluded)."""
     
-    def _endSeg(seg,sf,cont):
-        if seg:
-            seg.end = sf
-            seg.content = cont if cont else seg.content
-    def _getWho(sub,l_spk,seg,s,e,ntxt):
+    def __init__(self,trans,elem,d_args):
+        self.trans = trans; self.f2 = D_MODE.get(d_args['mode'])
+        self.s = float(elem.get('startTime',-1.))
+        self.e = float(elem.get('endTime',-1.))
+        l_spk = elem.get('speaker',"")
+        self.l_spk = l_spk.split(" ") if " " in l_spk else [l_spk]
+        self.tier,self.seg,self.ntxt = None,None,""
+        self.l_trs,self.oseg = [],None
+        self.elem = self.last = elem; self.attr = 'text'; self.pos = 0
+        if len(self.l_spk) <= 1: # No 'Who', single speaker
+            if not self.l_spk[0]: # No speaker, generate default tier
+                self.l_spk = ["trs"]
+            self._getWho(0)
+    def _endSeg(self,sf):
+        if self.seg:
+            self.seg.end = sf
+            self.seg.content = self.ntxt if self.ntxt else self.seg.content
+    def _getWho(self,nb):
         """Changes the tier."""
-        if isinstance(sub,int):
-            spk = l_spk[sub]
-        else:
-            spk = l_spk[int(sub.get('nb'))-1]
-        tier = trans.getName(spk) # new tier
+        spk = self.l_spk[nb]
+        tier = self.trans.getName(spk) # new tier
         if not tier:
-            tier = trans.create(-1,spk,-1.,-1.,"")
-        if seg:
-            _endSeg(seg,e,ntxt); ntxt = ""
-        seg = tier.create(-1,"",s,e,"")
-        return tier,seg,ntxt
-    def _getSync(sub,tier,seg,s,e,ntxt):
-        s = float(sub.get('time'))
-        if seg and s > seg.start:
-            _endSeg(seg,s,ntxt); ntxt = ""
-            seg = tier.create(-1,"",s,e,"")
-        elif (not seg) and tier:
-            seg = tier.create(-1,"",s,e,"")
-        return seg,s,ntxt
-    
-    s,e = float(elem.get('startTime',-1.)),float(elem.get('endTime',-1.))
-    l_spk = elem.get('speaker',"")
-    l_spk = l_spk.split(" ") if " " in l_spk else [l_spk]
-    l_subs = [sub for sub in elem.iter() if not sub.tag == "Turn"]
-        # get tag content as text
-    txt = html.unescape(ETree.tostring(elem).decode('utf_8'))
-    txt = txt.split(">",1)[1].rsplit("</",1)[0]
-    txt = re.sub('\r?\n( |\t)*','',txt)
-        # Parse
-    tier,seg,ntxt,nsub = None,None,"",""
-    if len(l_spk) <= 1: # No 'Who', single speaker
-        if not l_spk[0]: # No speaker, generate default tier
-            l_spk = ["trs"]
-        tier,seg,ntxt = _getWho(0,l_spk,seg,s,e,ntxt)
-    l_trs,oseg = [],None
-    if seg:
-        oseg = seg
-    s_incr,e_incr,incr = 0,0,0
-    si,ch_txt = 0,True
-    for a,char in enumerate(txt):
-        if char == "<":
-            sub = l_subs[si]; si += 1; ch_txt = False
-            s_incr = a; nsub = "<"
-        elif char == ">":
-            len_sub = a-s_incr+1; s_incr = s_incr-incr # text increment
-            incr = incr+len_sub
-            if sub.tag == "Who": # change of tier
-                tier,seg,ntxt = _getWho(sub,l_spk,seg,s,e,ntxt)
-                if not oseg:
-                    oseg = seg
-            elif sub.tag == "Sync": # change of segment
-                seg,s,ntxt = _getSync(sub,tier,seg,s,e,ntxt)
-                if not oseg:
-                    oseg = seg
-            else: # Transcriber tag (see 'mode')
-                f2 = D_MODE.get(d_args['mode'])
-                if f2:
-                    ntxt,l_trs = f2(sub,nsub,ntxt,s_incr,seg,l_trs)
-            ch_txt = True; nsub = ""
-        elif ch_txt:
-            ntxt = ntxt+char
-        else:
-            nsub = nsub+char
-    _endSeg(seg,e,ntxt)
-    if l_trs and oseg: # Last Transcriber tag check (tags before first segment)
-        f2 = D_MODE.get(d_args['mode'])
-        for tag,cont in l_trs:
-            i,nsub = cont.split(";")
-            ntxt,l_trs = f2(tag,nsub,"",i,oseg,l_trs)
+            tier = self.trans.create(-1,spk,-1.,-1.,"")
+        if self.seg:
+            self._endSeg(self.e); self.ntxt = ""
+        self.tier = tier; self.seg = tier.create(-1,"",self.s,self.e,"")
+        if not self.oseg:
+            self.oseg = self.seg
+    def _getSync(self,sub):
+        s = self.s = float(sub.get('time'))
+        if self.seg and s > self.seg.start:
+            self._endSeg(s); self.ntxt = ""
+            self.seg = self.tier.create(-1,"",s,self.e,"")
+        elif (not self.seg) and self.tier:
+            self.seg = self.tier.create(-1,"",s,self.e,"")
+        if not self.oseg:
+            self.oseg = self.seg
+    def _text(self):
+        """Adds the pending text (if any)."""
+        txt = getattr(self.last,self.attr)
+        if txt:
+            if "\n" in txt:
+                txt = R_NL.sub("",txt)
+            self.ntxt = self.ntxt+txt; self.pos += len(txt)
+    def start(self,sub):
+        self._text(); self.last = sub; self.attr = 'text'
+    def end(self,sub):
+        """Handles a sub-tag (once its 'text' is known)."""
+        self._text(); self.last = sub; self.attr = 'tail'
+        if sub.tag == "Who": # change of tier
+            self._getWho(int(sub.get('nb'))-1)
+        elif sub.tag == "Sync": # change of segment
+            self._getSync(sub)
+        elif self.f2: # Transcriber tag (see 'mode')
+            self.ntxt,self.l_trs = self.f2(sub,_rawTag(sub),self.ntxt,
+                                           self.pos,self.seg,self.l_trs)
+    def close(self):
+        """Ends the last segment."""
+        self._text(); self._endSeg(self.e)
+        if self.l_trs and self.oseg: # Tags before first segment
+            for tag,cont in self.l_trs:
+                i,nsub = cont.split("<",1)
+                self.f2(tag,"<"+nsub,"",i,self.oseg,[])
 D_TAG = {'Trans':_readTrans,'Topics':_readTopics,'Speakers':_readSpeakers,
-         'Section':_readSection,'Turn':_readTurn}
+         'Section':_readSection}
 
 def loadTRS(path,name="",mode="text"):
     """Main function to load a given TRS file.
@@ -227,23 +216,34 @@ def loadTRS(path,name="",mode="text"):
     - name          : (str) The Transcription name.
     RETURNS:
     - trans         : (pntr) A Transcription instance.
-    Note: assumes encoding (and 'name') is known."""
+    Note: assumes encoding (and 'name') is known.
+    Note: 'Turn' content is read from parser events (see '_Turn');
+          read elements are removed from their parent ('l_par')."""
     
         # New Transcription instance
     trans = Transcription(name=name,metadata={})
-    root = None; b_root = False
     d_args = {'mode':mode,
-              'd_top':{},'d_spk':{}}
+              'd_top':{},'d_spk':{},'l_sec':[]}
+    l_par = []; turn = None                 # open elements, current Turn
     for event, elem in ETree.iterparse(path, events=("start","end")):
-        if not b_root: # Find root for operation (cleaning)
-            root = elem; b_root = True
-        elif event == "end":
-            f = D_TAG.get(elem.tag)
-            if f:
-                f(trans,elem,d_args)
-                par = root.find(f".//{elem.tag}/..")
-                if par:
-                    par.remove(elem)
+        if event == "start":
+            if turn:
+                turn.start(elem)
+            elif elem.tag == "Turn":
+                turn = _Turn(trans,elem,d_args)
+            l_par.append(elem); continue
+        l_par.pop()
+        if turn:
+            if not elem is turn.elem:       # sub-tag
+                turn.end(elem); continue
+            turn.close(); turn = None
+        elif elem.tag in D_TAG:
+            D_TAG[elem.tag](trans,elem,d_args)
+        else:
+            continue
+        if l_par:                           # free memory
+            l_par[-1].remove(elem)
+    _setSections(trans,d_args['l_sec'])     # Section metadata
     trans.setBounds()
     trans.renameSegs()
     return trans
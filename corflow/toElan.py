@@ -12,9 +12,19 @@ Note: 'toElan()' argument 'path' is overloaded (d_load) for a 'Transcription',
       'Corpus' or 'list'. For the latter two, '_saveList()' iterates.
 Note: The tier 'LINGUISTIC_TYPE' is automatically set. Pre-existing types
       are adapted accordingly to ensure the file can be read by ELAN.
+Note: Tier types are inferred from segment boundaries ('_testType()', or
+      '_testTypeNp()' if NumPy is available).
+Note: Annotations and time slots are yielded one by one and written in
+      chunks ('_writeChunks()'), never held as a whole tier string.
 """
-from .Transcription import Corpus,Transcription
-import os,html,math
+from .Transcription import (Corpus,Transcription,saveParallel,_writeChunks,
+                            _noGC)
+from .fromElan import R_ATTR
+import os,re,html,math,operator,itertools
+try:                                    # optional, for '_testTypeNp()'
+    import numpy as np
+except ImportError:
+    np = None
 
     # Technical functions
 def _rename_segs(trans,value):
@@ -54,34 +64,34 @@ def _getMeta(trans):
     return d_doc,d_header,d_footer
 def _readHyperval(txt):
     """Turns a string of attributes into a dict'."""
-    d_attr = {}
     if not txt:
-        return d_attr
-    l_attr = [""]; ch1,ch2 = False,True
-    for char in txt:
-        if not ch2:
-            ch2 = True
-        elif not ch1:
-            l_attr[-1] = l_attr[-1]+char
-            if char == "\"":
-                ch1 = True
-        elif char == "\"":
-            l_attr.append(""); ch1 = False; ch2 = False
-        else:
-            l_attr[-1] = l_attr[-1]+char
-    if not l_attr[-1]:
-        l_attr = l_attr[:-1]
-    for attr in l_attr:
-        key,val = attr.split("=\"")
-        if val and val[-1] == "\"" and (not val[-2] == "\\"):
-            val = val[:-1]
-        d_attr[html.escape(key)] = html.escape(val)
-    return d_attr
+        return {}
+    return {html.escape(key):html.escape(val)
+            for key,val in R_ATTR.findall(txt)}
 def _addTierAttr(text,l_attr):
     for key,val in l_attr:
         if val:
             text = text+" "+html.escape(key)+"=\""+html.escape(val)+"\""
     return text
+def _tierMaps(trans):
+    """Builds per-tier parent and previous-sibling arrays.
+    RETURNS:
+    - d_maps        : (dict) <tier:(l_par,l_prev)>
+    Note: 'l_par[a]' is the parent segment of 'tier.elem[a]' (or None),
+          'l_prev[a]' the index of its previous sibling (or -1)."""
+    
+    d_maps = {}
+    for tier in trans:
+        d_elem = tier.d_elem; l_prev = []; o_ref = None
+        l_par = [d_elem[seg][1] if seg in d_elem else None
+                 for seg in tier.elem]
+        for a,pseg in enumerate(l_par):
+            if not pseg == o_ref:
+                l_prev.append(-1); o_ref = pseg
+            else:
+                l_prev.append(a-1)
+        d_maps[tier] = (l_par,l_prev)
+    return d_maps
 
     # Writing functions
 def _writeHeader(f,trans,d_doc,d_header):
@@ -129,102 +139,146 @@ def _writeHeader(f,trans,d_doc,d_header):
                            .format(html.escape(audio)))
         # Write to file
     f.write(txt+fixed+open+"\t</HEADER>")
-def _writeTimeTable(f,trans):
-    """Writes the TIME_ORDER part."""
+def _iterTimeTable(timetable,d_timetable):
+    """Yields TIME_SLOTs and fills 'd_timetable'."""
     
-    timetable = trans.timetable()
-    d_timetable = {}; txt = "\n\t<TIME_ORDER>\n"
-    for a,ts in enumerate(timetable):
-        id = "ts"+str(a+1)
-        t = ("{:.3f}".format(ts)).replace('.','')
-        txt = txt+("\t\t<TIME_SLOT TIME_SLOT_ID=\""+id+"\" TIME_VALUE="
-                   "\""+t+"\"/>\n")
+    fm = "\t\t<TIME_SLOT TIME_SLOT_ID=\"%s\" TIME_VALUE=\"%s\"/>\n"
+    yield "\n\t<TIME_ORDER>\n"
+    for a,ts in enumerate(timetable,1):
+        id = "ts"+str(a)
+        yield fm % (id,("%.3f" % ts).replace('.',''))
         if not ts in d_timetable:
             d_timetable[ts] = id
-    f.write(txt+"\t</TIME_ORDER>\n")
+    yield "\t</TIME_ORDER>\n"
+def _writeTimeTable(f,trans):
+    """Writes the TIME_ORDER part."""
+    
+    d_timetable = {}
+    _writeChunks(f,_iterTimeTable(trans.timetable(),d_timetable))
     return d_timetable
-def _writeRefSeg(tier):
-    """Return REF_ANNOTATION to '_writeTier()'."""
-    id = ""; ref = ""; l_prev = []; o_ref = None; txt=""
-        # We reconstitute the "prev"
-    for a,seg in enumerate(tier):
-        if not seg.parent() == o_ref:
-            l_prev.append(""); o_ref = seg.parent()
-        else:
-            l_prev.append(tier.elem[a-1].name)
-        # We write
-    for a,seg in enumerate(tier):
-        if not seg.parent():
+def _iterSegMeta(seg):
+    """Yields a segment's 'elan' metadata as attributes."""
+    for k,v in seg.iterMeta('elan'):
+        yield " %s=\"%s\"" % (html.escape(k),html.escape(v))
+S_VAL = (">\n\t\t\t\t<ANNOTATION_VALUE>%s</ANNOTATION_VALUE>\n\t\t\t"
+         "</%s>\n\t\t</ANNOTATION>\n")
+def _writeRefSeg(tier,l_par,l_prev):
+    """Yields REF_ANNOTATION to '_writeTier()'."""
+    fm = ("\t\t<ANNOTATION>\n\t\t\t<REF_ANNOTATION "
+          "ANNOTATION_ID=\"%s\" ANNOTATION_REF=\"%s\"")
+    l_elem = tier.elem
+    for a,seg in enumerate(l_elem):
+        pseg = l_par[a]
+        if not pseg:
             ptier = tier.parent().name if tier.parent() else "None"
             raise ValueError("A segment has no parent: {},{},{:.04f},{:04f},{}"
                              .format(tier.name,ptier,
                                      seg.start,seg.end,seg.content))
-        txt = txt+("\t\t<ANNOTATION>\n\t\t\t<REF_ANNOTATION "
-                   "ANNOTATION_ID=\"{}\" ANNOTATION_REF=\"{}\""
-                   .format(html.escape(seg.name),
-                           html.escape(seg.parent().name)))
-        if not l_prev[a] == "":
-            txt = txt+(" PREVIOUS_ANNOTATION=\"{}\""
-                      .format(html.escape(l_prev[a])))
-        for k,v in seg.iterMeta('elan'):
-            txt = txt+" {}=\"{}\"".format(html.escape(k),html.escape(v))
-        txt = txt+(">\n\t\t\t\t<ANNOTATION_VALUE>{}</ANNOTATION_VALUE>"
-                   "\n\t\t\t</REF_ANNOTATION>\n\t\t</ANNOTATION>\n"
-                   .format(html.escape(seg.content)))
-    return txt
+        yield fm % (html.escape(seg.name),html.escape(pseg.name))
+        if l_prev[a] >= 0:
+            yield (" PREVIOUS_ANNOTATION=\"%s\""
+                   % html.escape(l_elem[l_prev[a]].name))
+        if seg.metadata:
+            yield from _iterSegMeta(seg)
+        yield S_VAL % (html.escape(seg.content),"REF_ANNOTATION")
 def _writeTimeSeg(tier,d_timetable):
-    """Returns ALIGNABLE_ANNOTATION to '_writeTier()'."""
-    ts1 = ""; ts2 = ""; txt = ""
+    """Yields ALIGNABLE_ANNOTATION to '_writeTier()'."""
+    fm = ("\t\t<ANNOTATION>\n\t\t\t<ALIGNABLE_ANNOTATION "
+          "ANNOTATION_ID=\"%s\" TIME_SLOT_REF1=\"%s\" TIME_SLOT_REF2=\"%s\"")
     for seg in tier.elem:
-        ts1 = d_timetable[seg.start]; ts2 = d_timetable[seg.end]
-        txt = txt+("\t\t<ANNOTATION>\n\t\t\t<ALIGNABLE_ANNOTATION "
-                   "ANNOTATION_ID=\"{}\" TIME_SLOT_REF1=\"{}\" "
-                   "TIME_SLOT_REF2=\"{}\""
-                   .format(html.escape(seg.name),ts1,ts2))
-        for k,v in seg.iterMeta('elan'):
-            txt = txt+" {}=\"{}\"".format(html.escape(k),html.escape(v))
-        txt = txt+(">\n\t\t\t\t<ANNOTATION_"
-                   "VALUE>{}</ANNOTATION_VALUE>\n\t\t\t"
-                   "</ALIGNABLE_ANNOTATION>\n\t\t</ANNOTATION>\n"
-                   .format(html.escape(seg.content)))
-    return txt
-def _setTypes(trans):
+        yield fm % (html.escape(seg.name),d_timetable[seg.start],
+                    d_timetable[seg.end])
+        if seg.metadata:
+            yield from _iterSegMeta(seg)
+        yield S_VAL % (html.escape(seg.content),"ALIGNABLE_ANNOTATION")
+def _testType(tier,ptier,l_par):
+    """Infers a tier type from its children boundaries (pure Python).
+    Note: the first disproof (in parent order) decides between 'time'
+          (a single child not aligned) and 'subtime' (children not
+          equally splitting their parent)."""
+    
+    typ = 'assoc'
+    d_child = {}                        # children by parent, from 'l_par'
+    for cseg,pseg in zip(tier.elem,l_par):
+        if pseg in d_child:
+            d_child[pseg].append(cseg)
+        else:
+            d_child[pseg] = [cseg]
+    for pseg in ptier.elem:             # Iterate over all segments if need be
+        l_child = d_child.get(pseg)
+        if not l_child:                 # ASSOC
+            continue
+        elif len(l_child) == 1:         # test single-segment case
+            cseg = l_child[0]
+            if ((not math.isclose(cseg.start,pseg.start)) or 
+                (not math.isclose(cseg.end,pseg.end))):
+                return 'time'
+            continue
+        typ = 'subd'                    # SUBD
+        lc = len(l_child); dur = (pseg.end-pseg.start)/lc
+        for a,cseg in enumerate(l_child):
+            s = pseg.start+(a*dur); e = pseg.start+((a+1)*dur)
+            if ((not math.isclose(cseg.start,s,abs_tol=0.001)) or
+                (not math.isclose(cseg.end,e,abs_tol=0.001))):
+                return 'subtime'        # INCLUDED-IN
+    return typ
+def _testTypeNp(tier,ptier,l_par,size=512):
+    """Same as '_testType()' by blocks of children (with NumPy).
+    Note: children are sorted by parent (stable), their rank and number
+          of siblings give the equal-split boundaries; 'math.isclose()'
+          is reproduced so that both functions always agree.
+    Note: blocks double in 'size', the first disproof ends the test."""
+    
+    d_pind = {pseg:a for a,pseg in enumerate(ptier.elem)}
+    a_pos = np.fromiter(map(d_pind.get,l_par,itertools.repeat(-1)),
+                        dtype=np.intp,count=len(l_par))
+    a_ind = np.argsort(a_pos,kind='stable')
+    a_ind = a_ind[a_pos[a_ind] >= 0]    # children of 'ptier' segments only
+    if not len(a_ind):
+        return 'assoc'
+    a_pos = a_pos[a_ind]
+    a_cnt = np.bincount(a_pos)[a_pos]   # number of siblings
+    a_rank = np.arange(len(a_pos))-np.searchsorted(a_pos,a_pos)
+    def far(x,y,tol):                   # not 'math.isclose()'
+        return (np.abs(x-y) >
+                np.maximum(1e-09*np.maximum(np.abs(x),np.abs(y)),tol))
+    g_s,g_e = operator.attrgetter('start'),operator.attrgetter('end')
+    l_elem = tier.elem; l_pel = ptier.elem; i = 0; lb = len(a_ind)
+    while i < lb:
+        j = min(i+size,lb); size = size*2
+        l_c = list(map(l_elem.__getitem__,a_ind[i:j].tolist()))
+        l_p = list(map(l_pel.__getitem__,a_pos[i:j].tolist()))
+        cs,ce = (np.fromiter(map(g,l_c),dtype=float,count=j-i)
+                 for g in (g_s,g_e))
+        ps,pe = (np.fromiter(map(g,l_p),dtype=float,count=j-i)
+                 for g in (g_s,g_e))
+        cnt,rank = a_cnt[i:j],a_rank[i:j]
+        ch_one = cnt == 1; dur = (pe-ps)/cnt
+        s = np.where(ch_one,ps,ps+(rank*dur))
+        e = np.where(ch_one,pe,ps+((rank+1)*dur))
+        tol = np.where(ch_one,0.,0.001)
+        l_fail = np.flatnonzero(far(cs,s,tol) | far(ce,e,tol))
+        if len(l_fail):                 # first disproof
+            return 'time' if ch_one[l_fail[0]] else 'subtime'
+        i = j
+    return 'assoc' if (a_cnt == 1).all() else 'subd'
+def _setTypes(trans,d_maps):
     """Sets the tier types."""
     
-    def testType(tier,ptier):
+    testType = _testTypeNp if np else _testType
+    def getType(tier,ptier):
         """We need to know the type."""
-
-        tn = tier.name; pn = ptier.name if ptier else "None"
-        typ = 'assoc'
+        
         if not ptier:                   # Independent tier, time-aligned
             return 'time'
-        ch_subd = False; ch_time = False
-        for pseg in ptier:              # Iterate over all segments if need be
-            d_child = pseg.childDict()
-            if (not tier in d_child) or (not d_child[tier]):# ASSOC
-                continue
-            elif len(d_child[tier]) == 1: # test single-segment case
-                cseg = d_child[tier][0]
-                if ((not math.isclose(cseg.start,pseg.start)) or 
-                    (not math.isclose(cseg.end,pseg.end))):
-                    return 'time'
-                continue
-            typ = 'subd'                # SUBD
-            l_child = d_child[tier]
-            lc = len(l_child); dur = (pseg.end-pseg.start)/lc
-            for a,cseg in enumerate(l_child):
-                s = pseg.start+(a*dur); e = pseg.start+((a+1)*dur)
-                if ((not math.isclose(cseg.start,s,abs_tol=0.001)) or
-                    (not math.isclose(cseg.end,e,abs_tol=0.001))):
-                    return 'subtime'    # INCLUDED-IN
-        return typ
+        return testType(tier,ptier,d_maps[tier][0])
     
     l_child = []; d_typs = {}
         # Setup 'type' for LINGUISTIC_TYPE_ID/REF
     for tier in trans:                              # Test each tier
         typ = tier.meta('type','tech')
         if not typ:
-            typ = testType(tier,tier.parent())
+            typ = getType(tier,tier.parent())
         typ_id = tier.meta('type')
         if not typ_id:
             tier.setMeta('type',typ,i=-1); typ_id = typ
@@ -256,7 +310,7 @@ def _setTypes(trans):
                 o_typ = typ
             elif not o_typ == typ:                  # Any divergence...
                 tier.setMeta('type',typ)
-def _writeTier(f,a,tier,d_timetable):
+def _writeTier(f,a,tier,d_timetable,d_maps):
     """Writes a tier tag in the file."""
     
     def testMeta(txt,tier,l_attr):
@@ -289,13 +343,13 @@ def _writeTier(f,a,tier,d_timetable):
     tier.setMeta('type',typ,'tech',i=0)
     if not tier.elem:                       # Check to end early
         f.write(txt+" />\n"); return
-    txt = txt+">\n"
+    f.write(txt+">\n")
         # SEGMENTS
     if typ == "assoc" or typ == "subd":         # assoc/subd
-        txt = txt+_writeRefSeg(tier)
+        _writeChunks(f,_writeRefSeg(tier,*d_maps[tier]))
     else:                                       # time/subtime
-        txt= txt+_writeTimeSeg(tier,d_timetable)
-    f.write(txt+"\t</TIER>\n")
+        _writeChunks(f,_writeTimeSeg(tier,d_timetable))
+    f.write("\t</TIER>\n")
 def _writeFooter(f,trans,d_footer):
     """Writes the footer part of the file."""
     
@@ -343,7 +397,7 @@ def _writeFooter(f,trans,d_footer):
             if cons:
                 d_ntyp[tier_type]['CONSTRAINTS'] = cons
     
-    txt = ""
+    l_txt = []
         # LINGUISTIC_TYPE
     d_typ = {}
     d_typ = {tier.meta('type'):tier.meta('type','tech') for tier in trans}
@@ -358,10 +412,9 @@ def _writeFooter(f,trans,d_footer):
             d_ntyp[d_attr['LINGUISTIC_TYPE_ID']] = d_attr
     checkTier(d_typ,d_ntyp)                                 # remaining tiers
     for typ,d_attr in d_ntyp.items():
-        txt = txt+"\t<LINGUISTIC_TYPE"
-        for k,v in d_attr.items():
-            txt = txt+" {}=\"{}\"".format(k,v)
-        txt = txt+"/>\n"
+        l_txt.append("\t<LINGUISTIC_TYPE")
+        l_txt.extend(" {}=\"{}\"".format(k,v) for k,v in d_attr.items())
+        l_txt.append("/>\n")
     d_footer.pop('LINGUISTIC_TYPE')
         # LANGUAGE
     d_lang = {}
@@ -369,25 +422,25 @@ def _writeFooter(f,trans,d_footer):
         d_attr = _readHyperval(val); langu = d_attr.get('LANG_LABEL')
         if langu:
             d_lang[langu] = True
-        txt = txt+"\t<LANGUAGE "+val+"/>\n"
+        l_txt.append("\t<LANGUAGE "+val+"/>\n")
     l_val = trans.meta('lang',ch_list=True)
     for val in l_val:
         if val in d_lang:
             continue
-        txt = txt+("\t<LANGUAGE LANG_ID=\"{}\" LANG_LABEL=\"{}\"/>\n"
-                   .format(html.escape(val),html.escape(val)))
+        l_txt.append("\t<LANGUAGE LANG_ID=\"{}\" LANG_LABEL=\"{}\"/>\n"
+                     .format(html.escape(val),html.escape(val)))
         # EVERYTHING ELSE
     for key,l_val in d_footer.items():
         if key == 'LINGUISTIC_TYPE' or key == 'LANGUAGE':
             continue
         for val in l_val:
-            txt = txt+"\t<"+key
+            l_txt.append("\t<"+key)
             if val:
-                txt = txt+" "+val
+                l_txt.append(" "+val)
             if not val.endswith("\n"):
-                txt = txt+"/>\n"
+                l_txt.append("/>\n")
         # FIXED CONSTRAINTS
-    txt = txt+("\t<CONSTRAINT STEREOTYPE=\"Time_Subdivision\" DESCRIPTION=\""
+    l_txt.append("\t<CONSTRAINT STEREOTYPE=\"Time_Subdivision\" DESCRIPTION=\""
          "Time subdivision of parent annotation's time interval, no time "
          "gaps allowed within this interval\"/>\n\t<CONSTRAINT STEREOTYPE="
          "\"Symbolic_Subdivision\" DESCRIPTION=\"Symbolic subdivision of a "
@@ -398,8 +451,8 @@ def _writeFooter(f,trans,d_footer):
          "annotations within the parent annotation's time interval, gaps are "
          "allowed\"/>\n")
          # End of ANNOTATION_DOCUMENT
-    txt = txt+"</ANNOTATION_DOCUMENT>"
-    f.write(txt)
+    l_txt.append("</ANNOTATION_DOCUMENT>")
+    f.write("".join(l_txt))
 def saveEAF(path,trans,encoding,rename_segs):
     """Exports a single Transcription into an EAF file.
     ARGUMENTS:
@@ -409,6 +462,7 @@ def saveEAF(path,trans,encoding,rename_segs):
     RETURNS:
     - Creates an EAF file at 'path' from 'trans'.
     Note: 'path' is tested here, everything else should be known.
+    Note: garbage collection is paused while the copy is written.
     """
     
         # Path
@@ -416,22 +470,27 @@ def saveEAF(path,trans,encoding,rename_segs):
         path = os.path.join(path,trans.name+".eaf")     # Use 'trans.name'
     encoding = _chEncoding(trans,encoding)      # Encoding
     _rename_segs(trans,rename_segs)             # Renaming segments
-    ntrans = trans.copy()                       # We use a copy from there
-    d_doc,d_header,d_footer = _getMeta(ntrans)  # We recover the metadata
+    with _noGC():                               # no collection while writing
+        ntrans = trans.copy()                   # We use a copy from there
+        d_doc,d_header,d_footer = _getMeta(ntrans)  # We recover the metadata
 
-    f = open(path,'w',encoding=encoding)        # Open file
-    _writeHeader(f,ntrans,d_doc,d_header)       # Write transcription level
-    _setTypes(ntrans)                           # Set tier types
-    d_timetable = _writeTimeTable(f,ntrans)     # Write timetable
-    
-    for a,tier in enumerate(ntrans):
-        _writeTier(f,a,tier,d_timetable)        # Write tier level
-    _writeFooter(f,ntrans,d_footer)             # Write footer
-    f.close()                                   # Close file
-def _saveList(path,trans,encoding):
+        f = open(path,'w',encoding=encoding)    # Open file
+        _writeHeader(f,ntrans,d_doc,d_header)   # Write transcription level
+        d_maps = _tierMaps(ntrans)              # Parent/previous arrays
+        _setTypes(ntrans,d_maps)                # Set tier types
+        d_timetable = _writeTimeTable(f,ntrans) # Write timetable
+        
+        for a,tier in enumerate(ntrans):
+            _writeTier(f,a,tier,d_timetable,d_maps) # Write tier level
+        _writeFooter(f,ntrans,d_footer)         # Write footer
+        f.close()                               # Close file
+def _saveList(path,trans,encoding,rename_segs,workers=1):
     """Exports a list of / a Corpus' transcriptions into EAF files."""
+    if workers > 1:                             # In parallel
+        saveParallel(saveEAF,path,trans,workers,encoding,rename_segs)
+        return
     for tr in trans:
-        saveEAF(path,tr,encoding)
+        saveEAF(path,tr,encoding,rename_segs)
 
     # Main function
 def toElan(path,trans,**args):
@@ -441,16 +500,21 @@ def toElan(path,trans,**args):
     - trans         : (overloaded) A Transcription, Corpus or list of
                                    Transcriptions.
     - encoding      : (str) The file encoding.
+    - workers       : (int) Processes to export a Corpus/list with.
     RETURNS:
     - Creates the EAF(s) at 'path' from 'trans'.
-    Note: Creates a copy for each Transcription while exporting."""
+    Note: Creates a copy for each Transcription while exporting.
+    Note: With 'workers' > 1, errors are raised once all files are done."""
     
         # Args
     encoding = args.get('encoding')         # file encoding (for all files)
     rename_segs = args.get('rename_segs')   # whether to rename segments
+    workers = args.get('workers') or 1      # processes (for Corpus/list)
         # Overload
     f = d_load.get(type(trans))
-    if f:
+    if f == _saveList:
+        f(path,trans,encoding,rename_segs,workers)
+    elif f:
         f(path,trans,encoding,rename_segs)
     else:
         raise KeyError("First argument must be of type 'Transcription/"+
@@ -8,9 +8,15 @@ with the rest; more importantly, 'unescape' calls are spread all around
 and everything is filled statically, making for a heavy, cumbersome code.
 Note: 'exb' subdivision should be used for tier/segment.
       That is especially relevant for the 'type' key.
+Note: the timeline and events are streamed ('_writeChunks()') and escaped
+      through a precomputed table ('D_ESC').
 """
-from .Transcription import Corpus,Transcription
-import os,html
+from .Transcription import Corpus,Transcription,saveParallel,_writeChunks
+import os,re
+
+D_ESC = str.maketrans({"&":"&amp;","<":"&lt;",">":"&gt;",  # escaping table
+                       "\"":"&quot;","'":"&#x27;"})
+R_ESC = re.compile("[&<>\"']")                         # (chars to escape)
 
 def _chEncoding(trans,encoding):
     """Seeks encoding (default "utf_8")."""
@@ -21,16 +27,32 @@ def _chEncoding(trans,encoding):
         return trans.meta('encoding','tech',empty="utf_8")
     else:
         return encoding
+def _esc(txt):
+    """Escapes 'txt' (as 'html.escape()') using 'D_ESC'."""
+    return txt.translate(D_ESC) if R_ESC.search(txt) else txt
+def _first(v):
+    """Returns the first value of a list, or 'v' itself."""
+    return (v[0] if v else "") if isinstance(v,list) else v
 def _sepUD(d_d,l_e,div="exb"):
     """Separates metadata into 'd_meta' and 'd_other'.
-    'd_other' is user-defined metadata. Escapes the content."""
+    'd_other' is user-defined metadata. Escapes the content.
+    Note: list values are kept as lists of their (escaped) strings,
+          other values (like 'tiers') are ignored."""
     d_m,d_o,gen = {},{},None
     gen = d_d.items() if isinstance(d_d,dict) else d_d.iterMeta(div)
     for k,v in gen:
+        if isinstance(v,list):
+            v = [_esc(x) for x in v if isinstance(x,str)]
+            if not v:
+                continue
+        elif not isinstance(v,str):
+            continue
+        else:
+            v = _esc(v)
         if k in l_e:
-            d_m[k] = html.escape(v)
+            d_m[k] = v
         else:
-            d_o[k] = html.escape(v)
+            d_o[k] = v
     return d_m,d_o
 
 def _writeMeta(f,trans,enc):
@@ -48,7 +70,7 @@ def _writeMeta(f,trans,enc):
     c_name = d_m.get('project-name',"")
     t_name = d_m.get('transcription-name',"")
     if not t_name:
-        t_name = html.escape(trans.meta("name"))
+        t_name = _esc(trans.meta("name"))
     txt = txt+("<basic-transcription>\n\t<head>\n\t\t<meta-information>"
                "\n\t\t\t<project-name>{}</project-name>"
                "\n\t\t\t<transcription-name>{}</transcription-name>"
@@ -58,7 +80,7 @@ def _writeMeta(f,trans,enc):
     if not l_urls:
         l_urls = trans.meta("audio",ch_list=True,empty=[])
     for url in l_urls:
-        url = html.escape(url)
+        url = _esc(url)
         txt = txt+("\n\t\t\t<referenced-file url=\"{}\"/>".format(url))
         # user-defined metadata
     txt = txt+("\n\t\t\t<ud-meta-information>")
@@ -83,11 +105,12 @@ def _writeSpeakers(f,trans):
         l_lang = d_vals.get(key,[])
         txt = txt+"\n\t\t\t\t<{}>".format(key)
         for lang in l_lang:
-            lang = html.escape(lang)
+            lang = _esc(lang)
             txt = txt+("\n\t\t\t\t\t<language lang=\"{}\"/>".format(lang))
         if l_lang:
             txt = txt+"\n\t\t\t\t"
         txt = txt+"</{}>".format(key)
+        return txt
     
     txt = "\n\t\t<speakertable>"
     l_e = ['id','abbreviation','sex','languages-used',
@@ -96,45 +119,59 @@ def _writeSpeakers(f,trans):
     for spk,d_vals in l_spk.items():
         d_m,d_o = _sepUD(d_vals,l_e) # Separate user-defined metadata
             # before language
-        id,abr = d_m.get('id'),d_m.get('abbreviation',[""])
-        sex = d_m.get('sex',[""])
-        id = [html.escape(spk)] if not id else id
+        id,abr = _first(d_m.get('id')),_first(d_m.get('abbreviation',""))
+        sex = _first(d_m.get('sex',""))
+        id = _esc(spk) if not id else id
         txt = txt+("\n\t\t\t<speaker id=\"{}\">"
                    "\n\t\t\t\t<abbreviation>{}</abbreviation>"
                    "\n\t\t\t\t<sex value=\"{}\"/>"
-                   .format(id[0],abr[0],sex[0]))
+                   .format(id,abr,sex))
             # languages
-        _writeLang(txt,d_vals,'languages-used')
-        _writeLang(txt,d_vals,'l1')
-        _writeLang(txt,d_vals,'l2')
+        txt = _writeLang(txt,d_vals,'languages-used')
+        txt = _writeLang(txt,d_vals,'l1')
+        txt = _writeLang(txt,d_vals,'l2')
             # user-defined metadata
         txt = txt+"\n\t\t\t\t<ud-speaker-information>"
-        for k,v in d_o.items():
-            txt=txt+("\n\t\t\t\t\t<ud-information attribute-name=\"{}\">{}"
-                     "</ud-information>".format(k,v))
+        for k,l_v in d_o.items():
+            for v in (l_v if isinstance(l_v,list) else [l_v]):
+                txt=txt+("\n\t\t\t\t\t<ud-information attribute-name=\"{}\">"
+                         "{}</ud-information>".format(k,v))
         if d_o:
             txt=txt+"\n\t\t\t\t"
-        comment = d_m.get('comment',"")
+        comment = _first(d_m.get('comment',""))
         txt = txt+("</ud-speaker-information>"
                    "\n\t\t\t\t<comment>{}</comment>"
                    "\n\t\t\t</speaker>".format(comment))
     if l_spk:
         txt = txt+"\n\t\t"
     f.write(txt+"</speakertable>\n\t</head>")
+def _iterTimeTable(l_time):
+    """Yields each 'tli' of the timeline."""
+    for a,ts in enumerate(l_time):
+        yield "\n\t\t\t<tli id=\"T%d\" time=\"%.3f\"/>" % (a,ts)
 def _writeTimeTable(f,trans):
     """Writes the timetable."""
     
-    txt = "\n\t<basic-body>\n\t\t<common-timeline>"
-    d_timetable = {}
-    for a,ts in enumerate(trans.timetable()):
-        id = "T"+str(a)
-        txt = txt+("\n\t\t\t<tli id=\"{}\" time=\"{:.3f}\"/>"
-                   .format(id,ts))
-        d_timetable[ts] = id
-    f.write(txt+"\n\t\t</common-timeline>")
+    f.write("\n\t<basic-body>\n\t\t<common-timeline>")
+    l_time = trans.timetable()
+    d_timetable = {ts:"T"+str(a) for a,ts in enumerate(l_time)}
+    _writeChunks(f,_iterTimeTable(l_time))
+    f.write("\n\t\t</common-timeline>")
     return d_timetable
+def _iterEvents(tier,d_timetable):
+    """Yields each 'event' of a tier, escaped."""
+    for seg in tier:
+        txt = ("\n\t\t\t<event start=\"%s\" end=\"%s\">" %
+               (d_timetable[seg.start],d_timetable[seg.end]))
+        d_meta = seg.metadata.get('omni')
+        if d_meta:                                  # (segment metadata)
+            for k,l_v in d_meta.items():
+                txt = txt+("<ud-information attribute-name=\"%s\">%s"
+                           "</ud-information>" % (_esc(k),_esc(l_v[0])))
+        yield txt+_esc(seg.content)+"</event>"
 def _writeTier(f,trans,a,tier,d_timetable):
-    """Writes a tier."""
+    """Writes a tier.
+    Note: events are streamed, see '_iterEvents()'."""
     
     l_e = ['speaker','category','type']
     txt = "\n\t\t<tier id=\"{}\"".format("TIE"+str(a))
@@ -148,25 +185,18 @@ def _writeTier(f,trans,a,tier,d_timetable):
         typ = 't' if a == 0 else 'a'
         # Write metadata 
     if spk:
-        txt = txt+" speaker=\"{}\"".format(spk)
+        txt = txt+" speaker=\"{}\"".format(_esc(spk))
     txt = txt+(" category=\"{}\" type=\"{}\" display-name=\"{}\">"
-               .format(html.escape(cat),typ,html.escape(tier.name)))
+               .format(_esc(cat),typ,_esc(tier.name)))
     if d_o: # user-defined metadata
         txt = txt+"\n\t\t\t<ud-tier-information>"
         for k,v in d_o.items():
             txt=txt+("\n\t\t\t\t<ud-information attribute-name=\"{}\">{}"
                      "</ud-information>".format(k,v))
         txt = txt+"\n\t\t\t</ud-tier-information>"
-        # Segments
-    for seg in tier:
-        s,e = d_timetable[seg.start],d_timetable[seg.end]
-        txt = txt+"\n\t\t\t<event start=\"{}\" end=\"{}\">".format(s,e)
-        for k,v in seg.iterMeta():
-            v = html.unescape(v)
-            txt = txt+("<ud-information attribute-name=\"{}\">{}"
-                       "</ud-information>".format(k,v))
-        txt = txt + "{}</event>".format(html.unescape(seg.content))
-    f.write(txt+"\n\t\t</tier>")
+    f.write(txt)
+    _writeChunks(f,_iterEvents(tier,d_timetable))   # Segments
+    f.write("\n\t\t</tier>")
 def saveEXB(path,trans,encoding):
     """Exports a single Transcription into an EXB file.
     ARGUMENTS:
@@ -193,8 +223,11 @@ def saveEXB(path,trans,encoding):
         _writeTier(f,trans,a,tier,d_timetable)  # Write tier level
     f.write("\n\t</basic-body>\n</basic-transcription>") # Write footer
     f.close()                                   # Close file
-def _saveList(path,trans,encoding):
+def _saveList(path,trans,encoding,workers=1):
     """Exports a list of / a Corpus' transcriptions into EXB files."""
+    if workers > 1:                             # In parallel
+        saveParallel(saveEXB,path,trans,workers,encoding)
+        return
     for tr in trans:
         saveEXB(path,tr,encoding)
 
@@ -206,15 +239,20 @@ def toExmaralda(path,trans,**args):
     - trans         : (overloaded) A Transcription, Corpus or list of
                                    Transcriptions.
     - encoding      : (str) The file encoding.
+    - workers       : (int) Processes to export a Corpus/list with.
     RETURNS:
     - Creates the EXB(s) at 'path' from 'trans'.
-    Note: Creates a copy for each Transcription while exporting."""
+    Note: Creates a copy for each Transcription while exporting.
+    Note: With 'workers' > 1, errors are raised once all files are done."""
     
         # Args
     encoding = args.get('encoding')     # file encoding (for all files)
+    workers = args.get('workers') or 1  # processes (for Corpus/list)
         # Overload
     f = d_load.get(type(trans))
-    if f:
+    if f == _saveList:
+        f(path,trans,encoding,workers)
+    elif f:
         f(path,trans,encoding)
     else:
         raise KeyError("First argument must be of type 'Transcription/"+
@@ -1,7 +1,7 @@
 
 
-from .Transcription import Corpus,Transcription
-import os,re,html
+from .Transcription import Corpus,Transcription,_writeChunks
+import os,re,html,heapq
 
     # Technical functions
 def _chEncoding(trans,encoding):
@@ -56,8 +56,6 @@ def _chLvls(trans,l_tiers):
     def fillDict(d_lvl,lvl,typ,lang,tier):
         """Add information to both tier and 'd_lvl'."""
         tier.setMeta("level",lvl,"tech"); tier.setMeta("type",typ,"tech")
-        tier.setMeta("pos",0,"tech"); tier.setMeta("len",len(tier),"tech")
-        tier.setMeta("time",-1.,"tech")
         if typ == "TRANSL":
             tier.setMeta("lang",lang,"tech")
         if lvl in d_lvl:
@@ -87,9 +85,11 @@ def _chLvls(trans,l_tiers):
         tierDefined(d_lvl)
     return d_lvl
 l_tattr = ['id','xml:lang','author','kindOf']
-def _writeAttr(obj,tab,div="pangloss"):
-    """Writes tag and attribute for a given segment."""
-    stag = obj.meta("type","tech")
+def _writeAttr(obj,tab,div="pangloss",stag=""):
+    """Writes tag and attribute for a given segment.
+    Note: the tag is 'stag' or, by default, 'type' in 'tech' metadata."""
+    if not stag:
+        stag = obj.meta("type","tech")
     tmp = tab+"<"+stag
     ch_n,ch_l = False,False
     for k,v in obj.iterMeta(div):
@@ -137,16 +137,14 @@ def _writeHeader(trans,d_lvl,l_lvl,tab):
                 for val in trans.meta("name",ch_list=True):
                     tmp = tmp+tab+"<"+On+">"+html.escape(val)+"</"+On+">\n"
         tab = tab[:-1]
-        if tmp == ">\n":
-            tmp = ""
-        else:
-            tmp = tmp+tab+"</HEADER>\n"
-        return h+tmp
+        if tmp == ">\n":                                # (no HEADER at all)
+            return ""
+        return h+tmp+tab+"</HEADER>\n"
 
         # header
     mtag= ""; header = ""
     if not l_lvl or len(l_lvl) < 2:                     # (not enough levels?)
-        return "",""
+        return "","",tab
     if (l_lvl[0] == "WORDLIST") or (not "S" in d_lvl):
         mtag = "WORDLIST"
     else:
@@ -158,7 +156,7 @@ def _writeHeader(trans,d_lvl,l_lvl,tab):
         # footer
     footer = ""; l_top = d_lvl.get(l_lvl[0])
     if not l_top:                                       # No top tier
-        return header,(tab[:-1]+"</"+mtag+">\n")
+        return header,(tab[:-1]+"</"+mtag+">\n"),tab
     for tier in l_top:                                  # Write top Segments
         if not tier.elem:
             continue
@@ -167,112 +165,107 @@ def _writeHeader(trans,d_lvl,l_lvl,tab):
         # Remove top level
     return header,footer,tab
 def _writeTiers(trans,d_lvl,l_lvl,tab):
-    """Writes each level and its sub-level.
+    """Yields each level and its sub-level.
     ARGUMENTS:
     - 'trans'       : (pntr) transcription
     - 'd_lvl'       : (dict) list of tiers per level.
     - 'l_lvl'       : (list) list of levels
     - 'tab'         : (str) a set of '\t'.
-    Note: We assume all tiers from a given level share the same time codes."""
+    Note: We assume all tiers from a given level share the same time codes.
+    Note: each level has integer cursors per tier ('ll_pos') and a heap of
+          its tiers' current (start,tier index) ('ll_heap')."""
     
-    def _iterLTiers(l_tiers):                       # iterator
-        """Iterates over a given level's tiers."""
-        for tier in l_tiers:
-            pos = tier.meta("pos","tech")
-            if pos >= tier.meta("len","tech"):
-                continue
-            yield tier,pos,tier.elem[pos]
-    def getEarliest(l_tiers):                       # find start/end times
+    def getEarliest(a):                             # find start/end times
         """Returns the earliest start/end times."""
-        s,e = -1.,-1.
-        for tier,pos,seg in _iterLTiers(l_tiers):
-            if s < 0. or seg.start < s:
-                s,e = seg.start, seg.end
-        return s,e
-    def setLTimes(trans,l_lvl,d_lvl):               # setup 'll_times'
-        """Set 'l_times' (we need the earliest start/end times per level)."""
-        ll_times = [[trans.start,trans.end,True]]
-        lv = len(l_lvl); i_lvl = 1
-        for a in range(1,lv):           # Get time codes per level
-            lvl = l_lvl[a]; l_tiers = d_lvl[lvl]
-            s,e = getEarliest(l_tiers)
-            ll_times.append([s,e,False]) # Add to 'l_times'
-        return ll_times,lv,i_lvl
-    def upPos(l_tiers,s,e):                         # increment 'pos'
-        """Increments the 'pos' metadata in 'tech'."""
-        for tier,pos,seg in _iterLTiers(l_tiers):
-            while tier.elem[pos].start <= s:
-                pos += 1
-                if pos >= tier.meta("len","tech"):
-                    tier.setMeta("pos",pos,"tech"); break
-            tier.setMeta("pos",pos,"tech")
-        return getEarliest(l_tiers)
-    def writeStart(txt,tag,tab,seg,l_id,i_lvl,ll_times):
-        """Opening level with tag."""
-        seg.setMeta("type",tag,"tech"); tmp = ""
-        tmp = tmp+_writeAttr(seg,tab,"pangloss_sub")
-        if not "id=" in tmp:
-            tmp = tmp+" id=\""+tag+str(l_id[i_lvl])+"\""; l_id[i_lvl]+=1
-        txt = txt+tmp+">\n"; tab = tab+"\t"
-        ll_times[i_lvl][2] = True
-        return txt,tab,l_id,i_lvl,ll_times
-    def writeEnd(txt,tag,tab,i_lvl,ll_times):
-        """Closing level with tag."""
-        tab = tab[:-1]; txt = txt+tab+"</"+tag+">\n"
-        ll_times[i_lvl][2] = False
-        return txt,tab,i_lvl,ll_times
-    def allSegs(txt,l_tiers,s,e,ps,ch,tab,l_id,i_lvl,ll_times):
-        """Writes FORM/TRANSL/NOTE/AREA for a given time code."""
-        for tier,pos,seg in _iterLTiers(l_tiers):
-            if seg.start < s or seg.start > e:
-                continue
-            if not ch:                          # Start of level
-                txt,tab,id,i_lvl,ll_times = writeStart(txt,lvl,tab,seg,l_id,
-                                                       i_lvl,ll_times)
-                txt = txt+_writeAudio(tab,s,e); ch = True
-            txt = txt+_writeSeg(tier,seg,tab)
-        return txt,tab,l_id,i_lvl,ll_times
+        if not ll_heap[a]:
+            return -1.,-1.
+        b = ll_heap[a][0][1]
+        seg = ll_tiers[a][b].elem[ll_pos[a][b]]
+        return seg.start,seg.end
+    def upPos(a,s):                                 # increment cursors
+        """Moves cursors past segments starting at or before 's'."""
+        l_heap,l_pos,l_tiers = ll_heap[a],ll_pos[a],ll_tiers[a]
+        while l_heap and l_heap[0][0] <= s:
+            b = l_heap[0][1]; pos = l_pos[b]+1; l_pos[b] = pos
+            if pos < len(l_tiers[b].elem):
+                heapq.heapreplace(l_heap,(l_tiers[b].elem[pos].start,b))
+            else:
+                heapq.heappop(l_heap)
+        return getEarliest(a)
+    def writeSeg(tier,seg,tab):
+        """Writes a Segment (FORM/TRANSL) and its NOTEs."""
+        if not tier in d_tag:                       # tier tag, once
+            d_tag[tier] = (_writeAttr(tier,tab)+">",
+                           "</"+tier.meta("type","tech")+">\n")
+        return (d_tag[tier][0]+html.escape(seg.content)+d_tag[tier][1]+
+                _writeNOTE(seg,tab))
     
         # Variables
-    txt = ""; ll_times,lv,i_lvl = setLTimes(trans,l_lvl,d_lvl)
-    l_id = [1 for a in range(lv)]
-    
-    ch_tier = trans.getName("W-en")
+    lv = len(l_lvl); d_tag = {}
+    ll_tiers = [d_lvl.get(lvl,[]) for lvl in l_lvl]
+    ll_pos = [[0]*len(l_tiers) for l_tiers in ll_tiers]
+    ll_heap = []
+    for l_tiers in ll_tiers:
+        l_heap = [(tier.elem[0].start,b) for b,tier in enumerate(l_tiers)
+                  if tier.elem]
+        heapq.heapify(l_heap); ll_heap.append(l_heap)
+    ll_times = [[trans.start,trans.end,True]]       # earliest times, per level
+    for a in range(1,lv):
+        ll_times.append([*getEarliest(a),False])
+    l_id = [1 for a in range(lv)]; i_lvl = 1
         # Main loop
     while i_lvl >= 1:                           # From ashes to ashes...
             # Get level information
-        lvl = l_lvl[i_lvl]; l_tiers = d_lvl[lvl]# level and tiers
+        lvl = l_lvl[i_lvl]                      # level
         ps,pe,pch = ll_times[i_lvl-1]           # Parent start-end times
         s,e,ch = ll_times[i_lvl]                # start-end times
             # Checks
         if ch:                                  # End of level
-            txt,tab,i_lvl,ll_times = writeEnd(txt,lvl,tab,i_lvl,ll_times)
-            s,e = upPos(l_tiers,s,e); ch = False
+            tab = tab[:-1]; yield tab+"</"+lvl+">\n"
+            s,e = upPos(i_lvl,s); ch = False
             ll_times[i_lvl] = [s,e,ch]
-        if s < ps or s >= pe-0.001:             # Go back one level
+        if s < 0 or s < ps or s >= pe-0.001:    # Go back one level
             i_lvl = i_lvl-1; continue
-            # Write segments
-        txt,tab,l_id,i_lvl,ll_times = allSegs(txt,l_tiers,s,e,ps,ch,tab,l_id,
-                                            i_lvl,ll_times)
+            # Write segments (FORM/TRANSL/NOTE/AREA) for that time code
+        l_pos = ll_pos[i_lvl]
+        for b,tier in enumerate(ll_tiers[i_lvl]):
+            if l_pos[b] >= len(tier.elem):
+                continue
+            seg = tier.elem[l_pos[b]]
+            if seg.start < s or seg.start > e:
+                continue
+            if not ch:                          # Start of level
+                tmp = _writeAttr(seg,tab,"pangloss_sub",lvl)
+                if not "id=" in tmp:
+                    tmp = tmp+" id=\""+lvl+str(l_id[i_lvl])+"\""
+                    l_id[i_lvl] += 1
+                yield tmp+">\n"; tab = tab+"\t"
+                ll_times[i_lvl][2] = True
+                yield _writeAudio(tab,s,e); ch = True
+            yield writeSeg(tier,seg,tab)
         if i_lvl+1 < lv:                   # Check next level
             i_lvl += 1
-    return txt
-              
-def saveCRDO(txt,trans,l_tiers,l_lvl,tab):
+def saveCRDO(f,trans,l_tiers,l_lvl,tab):
     """Exports a single Transcription into an xml (CRDO) file.
     ARGUMENTS:
-    - path          : (str) Full path to a directory or file.
+    - f             : (pntr) The open file to write in.
     - trans         : (pntr) A Transcription instance.
-    - encoding      : (str) The xml file encoding.
+    - l_tiers       : (list) User-defined (tier.name,code), if any.
+    - l_lvl         : (list) Level structure.
+    - tab           : (str) A set of '\t'.
     RETURNS:
-    - txt           : (str) Content for that file."""
+    - Writes the Transcription's 'TEXT' (or 'WORDLIST') in 'f'.
+    Note: levels are written as they are walked ('_writeTiers()')."""
     
     ntrans = trans.copy()                           # We use a copy from there
     ntrans.fixOverlaps()
     d_lvl = _chLvls(ntrans,l_tiers)                 # We get our tiers
-    h,f,tab = _writeHeader(ntrans,d_lvl,l_lvl,tab)  # Get header/footer
-    b = _writeTiers(ntrans,d_lvl,l_lvl,tab)         # Get sub-levels
-    return h+b+f
+    h,ft,tab = _writeHeader(ntrans,d_lvl,l_lvl,tab) # Get header/footer
+    if not h:                                       # (not enough levels)
+        return
+    f.write(h)
+    _writeChunks(f,_writeTiers(ntrans,d_lvl,l_lvl,tab)) # Write sub-levels
+    f.write(ft)
     # Main function
 def toPangloss(path,trans,**args):
     """Exports one or more CRDO files (Pangloss, '.xml').
@@ -303,15 +296,15 @@ def toPangloss(path,trans,**args):
         # Overload
     ch = d_load.get(type(trans))
     if ch:
-        f = chPath(path,encoding); txt = ""; tab = ""
+        f = chPath(path,encoding)
         if ch > 1:                                  # Corpus/list
-            txt = "<ARCHIVE>"; tab = "\t"
+            f.write("<ARCHIVE>\n")
             for tr in trans:                        # For each Transcription
-                txt = saveCRDO(txt,tr,l_tiers,l_lvl,tab)
-            txt = txt+"</ARCHIVE>\n"
+                saveCRDO(f,tr,l_tiers,l_lvl,"\t")
+            f.write("</ARCHIVE>\n")
         else:                                       # Single Transcription
-            txt = saveCRDO(txt,trans,l_tiers,l_lvl,tab)
-        f.write(txt); f.close()                     # Write
+            saveCRDO(f,trans,l_tiers,l_lvl,"")
+        f.close()
     else:
         raise KeyError("First argument must be of type 'Transcription/"+
                        "/Corpus/list'.")
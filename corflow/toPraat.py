@@ -16,30 +16,43 @@ Note: 'TextTier' types (point tiers) are detected by checking the first 10
       tier type is 'IntervalTier'.
 Note: '_writeX()' uses ifs statements for each type of file/tier.
       While probably inefficient, this is intentional.
+Note: '_writeSegs()' formats a whole tier and writes it at once.
 """
-from .Transcription import Corpus,Transcription
-import os,struct
+from .Transcription import Corpus,Transcription,saveParallel
+import os,re,struct
 
     # Technical functions
+R_ENT = re.compile(r"&(?:quot|apos|lt|gt|amp);")         # xml entities
+D_ENT = {"&quot;":"\"","&apos;":"'","&lt;":"<","&gt;":">","&amp;":"&"}
 def _escape(data):
-    """Support function to replace xml>sax>saxutils."""
+    """Support function to replace xml>sax>saxutils.
+    Note: unescapes xml entities in one pass, then doubles quotes."""
     
-    data = data.replace("&quot;","\"").replace("&apos;","'") \
-               .replace("&lt;","<").replace("&gt;",">") \
-               .replace("&amp;","&").replace("\"","\"\"")
+    if "&" in data:
+        data = R_ENT.sub(lambda m: D_ENT[m.group()],data)
+    if "\"" in data:
+        data = data.replace("\"","\"\"")
     return data
+S_D,S_DD = struct.Struct('>d'),struct.Struct('>dd')      # 1 or 2 times
+S_H = struct.Struct('>h')                               # text length
 def _writeBinText(s):
     """Turns a string into either 'utf_8' or 'utf_16_be' bytearray..."""
     s = _escape(s)
-    lb = struct.pack('>h',len(s))
-    try:
-        s.encode('ascii')
-    except UnicodeEncodeError:
-        return b'\xff\xff'+lb+s.encode('utf_16_be')
-    else:
-        return lb+s.encode('utf_8')
+    if s.isascii():
+        return S_H.pack(len(s))+s.encode('utf_8')
+    return b'\xff\xff'+S_H.pack(len(s))+s.encode('utf_16_be')
 def _writeBinFloats(start,end):
-    return bytearray(struct.pack('>d', start))+bytearray(struct.pack('>d', end))
+    return S_DD.pack(start,end)
+def _writeBinSegs(f,tier,t_type):
+    """Writes all segments of a tier at once ('binary' type)."""
+    
+    if t_type == "IntervalTier":            # xmin/xmax
+        l_seg = [S_DD.pack(seg.start,seg.end)+_writeBinText(seg.content)
+                 for seg in tier.elem]
+    else:                                   # TextTier: a single time
+        l_seg = [S_D.pack(seg.start)+_writeBinText(seg.content)
+                 for seg in tier.elem]
+    f.write(b"".join(l_seg))
 def _chEncoding(trans,encoding):
     """Seeks encoding (default "utf_8")."""
     
@@ -96,31 +109,29 @@ def _writeTier(f,a,tier,t_type,typ):
         lb = lb + _writeBinFloats(tier.start,tier.end)          # xmin/xmax
         lb = lb + struct.pack('>I',len(tier))                   # nb of segs
         f.write(lb)
-def _writeSeg(f,a,seg,t_type,typ):
-    """Writes a segment (interval) in the file."""
+def _writeSegs(f,tier,t_type,typ):
+    """Writes all segments (intervals) of a tier at once."""
     
-    if typ == "text":
+    if typ == "binary":
+        _writeBinSegs(f,tier,t_type); return
+    elif typ == "text":
         if t_type == "IntervalTier":
-            f.write("\t\tintervals [{}]:\n\t\t\txmin = {:.3f}"
-                    "\n\t\t\txmax = {:.3f}\n\t\t\ttext = \"{}\"\n"
-                    .format(a+1,seg.start,seg.end,_escape(seg.content)))
+            fm = ("\t\tintervals [%d]:\n\t\t\txmin = %.3f\n\t\t\txmax = %.3f"
+                  "\n\t\t\ttext = \"%s\"\n")
+            l_seg = [fm % (a,seg.start,seg.end,_escape(seg.content))
+                     for a,seg in enumerate(tier.elem,1)]
         elif t_type == "TextTier":
-            f.write("\t\tpoints [{}]:\n\t\t\tnumber = {:.3f}"
-                    "\n\t\t\tmark = \"{}\"\n"
-                    .format(a+1,seg.start,_escape(seg.content)))
+            fm = "\t\tpoints [%d]:\n\t\t\tnumber = %.3f\n\t\t\tmark = \"%s\"\n"
+            l_seg = [fm % (a,seg.start,_escape(seg.content))
+                     for a,seg in enumerate(tier.elem,1)]
     elif typ == "short":
         if t_type == "IntervalTier":
-            f.write("{:.3f}\n{:.3f}\n\"{}\"\n"
-                    .format(seg.start,seg.end,_escape(seg.content)))
-        if t_type == "TextTier":
-            f.write("{:.3f}\n\"{}\"\n".format(seg.start,_escape(seg.content)))
-    elif typ == "binary":
-        if t_type == "IntervalTier":
-            lb = _writeBinFloats(seg.start,seg.end)
+            l_seg = ["%.3f\n%.3f\n\"%s\"\n" % (seg.start,seg.end,
+                     _escape(seg.content)) for seg in tier.elem]
         elif t_type == "TextTier":
-            lb = bytearray(struct.pack('f', seg.start))
-        lb = lb + _writeBinText(seg.content)
-        f.write(lb)
+            l_seg = ["%.3f\n\"%s\"\n" % (seg.start,_escape(seg.content))
+                     for seg in tier.elem]
+    f.write("".join(l_seg))
 def saveTGD(path,trans,typ,encoding,check,sym):
     """Exports a single Transcription into a TextGrid file.
     ARGUMENTS:
@@ -158,11 +169,13 @@ def saveTGD(path,trans,typ,encoding,check,sym):
                 t_type = 'IntervalTier'; tier.fixGaps(sym)
                 break
         _writeTier(f,a,tier,t_type,typ)        # Write tier level
-        for b in range(len(tier)):              # Write segment level
-            _writeSeg(f,b,tier.elem[b],t_type,typ)
+        _writeSegs(f,tier,t_type,typ)           # Write segment level
     f.close()                                   # Close file
-def _saveList(path,trans,typ,encoding,check,sym):
+def _saveList(path,trans,typ,encoding,check,sym,workers=1):
     """Exports a list of / a Corpus' transcriptions into TextGrid files."""
+    if workers > 1:                             # In parallel
+        saveParallel(saveTGD,path,trans,workers,typ,encoding,check,sym)
+        return
     for tr in trans:
         saveTGD(path,tr,typ,encoding,check,sym)
     # Main function
@@ -176,20 +189,25 @@ def toPraat(path,trans,**args):
     - encoding      : (str) The file encoding.
     - check         : (bool) Checks min/max boundaries and for overlaps.
     - sym           : (str) A symbol for added segments.
+    - workers       : (int) Processes to export a Corpus/list with.
     RETURNS:
     - Creates the TextGrid(s) at 'path' from 'trans'.
     Note: Creates a copy for each Transcription while exporting.
     Note: Will add segments in gaps
-          (see 'Tier.fillGaps()' in 'Transcription.py')."""
+          (see 'Tier.fillGaps()' in 'Transcription.py').
+    Note: With 'workers' > 1, errors are raised once all files are done."""
     
         # Args
     typ = args.get('type',"text")      # 'text','short','binary'
     encoding = args.get('encoding')     # file encoding (for all files)
     check = args.get('check',False)     # checking the structure
     sym = args.get('sym',"_")           # symbol for missing segments
+    workers = args.get('workers') or 1  # processes (for Corpus/list)
         # Overload
     f = d_load.get(type(trans))
-    if f:
+    if f == _saveList:
+        f(path,trans,typ,encoding,check,sym,workers)
+    elif f:
         f(path,trans,typ,encoding,check,sym)
     else:
         raise KeyError("First argument must be of type 'Transcription/"+
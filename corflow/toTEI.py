@@ -1,5 +1,5 @@
-from .Transcription import Corpus,Transcription
-import os,html
+from .Transcription import Corpus,Transcription,saveParallel,_writeChunks
+import os,html,heapq,operator,itertools
 
     # Technical functions
 def _chEncoding(trans,encoding):
@@ -11,6 +11,35 @@ def _chEncoding(trans,encoding):
         return trans.meta('encoding', 'tech', empty="utf_8")
     else:
         return encoding
+def _childSpans(l_top):
+    """Precomputes, for each top tier, the child spans of its sub-tiers.
+    RETURNS:
+    - d_sub         : (dict) <top tier:[sub-tiers]>, depth-first order
+    - d_span        : (dict) <sub-tier:(l_pind,l_ord,l_off)>
+    Note: 'l_pind[k]' is the parent index of the tier's k-th segment (or
+          -1); 'l_ord[l_off[a]:l_off[a+1]]' are the indexes (in tier order)
+          of the segments under the top tier's a-th segment."""
+    
+    d_sub = {}; d_span = {}
+    for top in l_top:
+        d_anc = {top:range(len(top))}   # top segment index, per segment
+        l_sub = d_sub[top] = top.allChildren()
+        for tier in l_sub:
+            ptier = tier.parent(); l_panc = d_anc[ptier]
+            d_pind = {pseg:a for a,pseg in enumerate(ptier.elem)}
+            d_elem = tier.d_elem
+            l_pind = [d_pind.get(d_elem[seg][1],-1) if seg in d_elem else -1
+                      for seg in tier.elem]
+            l_anc = d_anc[tier] = [l_panc[p] if p >= 0 else -1
+                                   for p in l_pind]
+            l_cnt = [0]*(len(top)+1)
+            for t in l_anc:
+                if t >= 0:
+                    l_cnt[t+1] += 1
+            l_ord = sorted((k for k,t in enumerate(l_anc) if t >= 0),
+                           key=l_anc.__getitem__)   # stable
+            d_span[tier] = (l_pind,l_ord,list(itertools.accumulate(l_cnt)))
+    return d_sub,d_span
 
     # Writing functions
 def _metaNote(elem, tab="\t"*6):
@@ -134,8 +163,8 @@ def _writeHeader(f, ntrans, encoding):
     txt = txt+_writeEncDesc(tab)            # encodingDesc (static)
     # Note: no <revisionDesc>
     f.write(txt+("\t</teiHeader>\n"))
-def _writeTimeTable(f,ntrans):
-    """Writes the text timeline."""
+def _iterTimeTable(ttable,d_timetable,tab="\t\t"):
+    """Yields the timeline's 'when' and fills 'd_timetable'."""
     
     def quickConv(t):
         it = int(t)
@@ -143,89 +172,85 @@ def _writeTimeTable(f,ntrans):
         h,m = (mn//60),(mn%60)
         return ("{:02d}:{:02d}:{:02d}".format(h,m,s))
     
-    ttable = ntrans.timetable(); tab = "\t\t"
-    txt = ("\t<text>\n"+tab+"<timeline unit=\"ms\"")
-    if not ttable:
-        f.write(txt+("/>\n")); return
-    min = ttable[0]; id,i = "T0",1
-    d_timetable = {min:id}
-    tmin = quickConv(min)
-    txt = txt+(">\n"+tab+"\t<when absolute=\""+tmin+"\" xml:id=\"T0\"/>\n")
+    min = ttable[0]; d_timetable[min] = "T0"
+    yield (">\n"+tab+"\t<when absolute=\""+quickConv(min)+
+           "\" xml:id=\"T0\"/>\n")
+    fm = tab+"\t<when interval=\"%s\" since=\"T0\" xml:id=\"%s\"/>\n"
     for a in range(1,len(ttable)):
-        ts = ttable[a]
-        id = "T"+str(i); i+=1
-        t = ("{:.3f}".format(ts-min)).replace('.','')
-        txt = txt+(tab+"\t<when interval=\""+t+"\" since=\"T0\" xml:id=\""+
-                   id+"\"/>\n")
+        ts = ttable[a]; id = "T"+str(a)
+        yield fm % (("%.3f" % (ts-min)).replace('.',''),id)
         d_timetable[ts] = id
-    f.write(txt+(tab+"</timeline>\n"))
-    return d_timetable,id
-def _writeBody(f,ntrans,d_timetable,id):
-    """Writes the body."""
+    yield tab+"</timeline>\n"
+def _writeTimeTable(f,ntrans):
+    """Writes the text timeline."""
     
-    def nextSeg(l_par):
-        seg,p = None,-1
-        for b,tpl in enumerate(l_par):
-            par,pos,lp = tpl
-            if pos < 0:
-                continue
-            elif not seg or par.elem[pos].start < seg.start:
-                seg = par.elem[pos]; p = b
-        if seg:
-            par,pos,lp = l_par[p]
-            pos = pos+1
-            if pos >= lp:
-                pos = -1
-            l_par[p] = (par,pos,lp)
-        return seg
+    ttable = ntrans.timetable(); tab = "\t\t"
+    f.write("\t<text>\n"+tab+"<timeline unit=\"ms\"")
+    if not ttable:
+        f.write("/>\n"); return {},"T0"
+    d_timetable = {}
+    _writeChunks(f,_iterTimeTable(ttable,d_timetable,tab))
+    return d_timetable,"T"+str(len(ttable)-1)
+def _iterBody(ntrans,d_timetable,id):
+    """Yields the body, one annotation block at a time.
+    Note: top segments are merged by start time (ties go to the first
+          top tier); ids are counted in 'd_id' (per tier, per segment)."""
     
-    tab,ttab,i = "\t\t","\t\t\t\t",0
-    txt = (tab+"<body>\n"+tab+"\t<div subtype=\"d0\" type=\"Situation\">\n"+
+    tab,ttab = "\t\t","\t\t\t\t"
+    yield (tab+"<body>\n"+tab+"\t<div subtype=\"d0\" type=\"Situation\">\n"+
            tab+tab+"<head>\n"+tab+tab+"\t<note type=\"start\">#T0</note>\n"+
            tab+tab+"\t<note type=\"end\">#"+id+"</note>\n"+tab+tab+
            "</head>\n")
-    l_par = ntrans.getTop()             # get top tiers
-    for a,par in enumerate(l_par):
-        l_par[a] = (par,0 if len(par) > 0 else -1,len(par))
-    while True:                         # for each segment
-        seg = nextSeg(l_par)
-        if not seg:
-            break
-        tier = seg.struct
-        id = "a"+str(i); i+=1; seg.setMeta("id",id,"tech")
-        s,e = d_timetable[seg.start],d_timetable[seg.end]
-        d_csegs = seg._childDict(seg.allChildren())
-        for ctier,l_csegs in d_csegs.items():    # assign ids
-            for cseg in l_csegs:
-                id = "a"+str(i); i+=1
-                cseg.setMeta("id",id,"tech")
-            # Write main segment
-        n = ("{}<annotationBlock xml:id=\"{}\" who=\"{}\" "
-             .format(ttab,seg.meta("id","tech"),
-                     html.escape(tier.name)))
-        if tier.meta('spk_id','tech'):
-            n = n+("ana=\"#"+tier.meta('spk_id','tech')+"\" ")
-        n = n+("start=\"#"+s+"\" end=\"#"+e+"\">\n"+ttab+"\t<u")
+    l_top = ntrans.getTop()             # get top tiers
+    d_sub,d_span = _childSpans(l_top)
+    d_id = {tier:[0]*len(tier) for tier in ntrans}  # ids, side arrays
+    l_head = []
+    for top in l_top:                   # 'annotationBlock' opening
+        n = ttab+"<annotationBlock xml:id=\"a%d\" who=\""+html.escape(top.name)
+        if top.meta('spk_id','tech'):
+            n = n+"\" ana=\"#"+top.meta('spk_id','tech')
+        l_head.append(n+"\" start=\"#%s\" end=\"#%s\">\n"+ttab+"\t<u")
+    l_sub = [[(ctier,"%s\t<spanGrp type=\"%s\">\n" % (ttab,
+              html.escape(ctier.name)),ctier.elem,d_id[ctier],
+              d_id[ctier.parent()])+d_span[ctier] for ctier in d_sub[top]]
+             for top in l_top]
+    fm_seg = ">\n"+ttab+tab+"<seg>%s</seg>\n"+ttab+"\t</u>\n"
+    fm_span = (ttab+tab+"<span xml:id=\"a%d\" target=\"#a%d\" "
+               "from=\"#%s\" to=\"#%s\"")
+    g_s = operator.attrgetter('start')
+    i = 0
+    for start,b,a in heapq.merge(*[zip(map(g_s,top.elem),
+                                        itertools.repeat(b),itertools.count())
+                                   for b,top in enumerate(l_top)]):
+        seg = l_top[b].elem[a]
+        d_id[l_top[b]][a] = i
+        yield l_head[b] % (i,d_timetable[seg.start],d_timetable[seg.end])
+        i += 1
         if seg.content:
-            n = n+(">\n"+ttab+tab+"<seg>"+html.escape(seg.content)+"</seg>\n"+
-               ttab+"\t</u>\n")
+            yield fm_seg % html.escape(seg.content)
         else:
-            n = n+("/>\n")
-        for ctier,l_csegs in d_csegs.items():    # for each child segment
-            n = n+(ttab+"\t<spanGrp type=\""+html.escape(ctier.name)+"\">\n")
-            for cseg in l_csegs:
-                pseg = cseg.parent()
-                s,e = d_timetable[cseg.start],d_timetable[cseg.end]
-                cid,pid = cseg.meta("id","tech"),pseg.meta("id","tech")
-                n = n+(ttab+tab+"<span xml:id=\""+cid+"\" target=\"#"+pid+
-                       "\" from=\"#"+s+"\" to=\"#"+e+"\"")
+            yield "/>\n"
+        for (ctier,n,l_elem,l_cid,l_pid,
+             l_pind,l_ord,l_off) in l_sub[b]:   # for each child tier
+            lo,hi = l_off[a],l_off[a+1]
+            if lo == hi:
+                continue
+            yield n
+            for k in l_ord[lo:hi]:
+                cseg = l_elem[k]; l_cid[k] = i
+                yield fm_span % (i,l_pid[l_pind[k]],d_timetable[cseg.start],
+                                 d_timetable[cseg.end])
+                i += 1
                 if cseg.content:
-                    n = n+(">"+html.escape(cseg.content)+"</span>\n")
+                    yield ">"+html.escape(cseg.content)+"</span>\n"
                 else:
-                    n = n+("/>\n")
-            n = n+(ttab+"\t</spanGrp>\n")
-        txt = txt+n+(ttab+"</annotationBlock>\n"); n = ""
-    f.write(txt+(tab+"\t</div>\n"+tab+"</body>\n\t</text>\n</TEI>"))   
+                    yield "/>\n"
+            yield ttab+"\t</spanGrp>\n"
+        yield ttab+"</annotationBlock>\n"
+    yield tab+"\t</div>\n"+tab+"</body>\n\t</text>\n</TEI>"
+def _writeBody(f,ntrans,d_timetable,id):
+    """Writes the body."""
+    _writeChunks(f,_iterBody(ntrans,d_timetable,id))
 def saveTEI(path,trans,encoding,ext):
     """Exports a single Transcription into a TEI file.
     ARGUMENTS:
@@ -249,8 +274,11 @@ def saveTEI(path,trans,encoding,ext):
     d_timetable,id = _writeTimeTable(f,ntrans)  # Write timetable
     _writeBody(f,ntrans,d_timetable,id)         # Write tiers
     f.close()                                   # Close file
-def _saveList(path,trans,encoding,ext):
+def _saveList(path,trans,encoding,ext,workers=1):
     """Exports a list of / a Corpus' transcriptions into TEI files."""
+    if workers > 1:                             # In parallel
+        saveParallel(saveTEI,path,trans,workers,encoding,ext)
+        return
     for tr in trans:
         saveTEI(path,tr,encoding,ext)
 
@@ -263,16 +291,21 @@ def toTEI(path,trans,**args):
                                    Transcriptions.
     - encoding      : (str) The file encoding.
     - ext           : (str) The file extension (default '.xml').
+    - workers       : (int) Processes to export a Corpus/list with.
     RETURNS:
     - Creates the TEI(s) at 'path' from 'trans'.
-    Note: Creates a copy for each Transcription while exporting."""
+    Note: Creates a copy for each Transcription while exporting.
+    Note: With 'workers' > 1, errors are raised once all files are done."""
     
         # Args
     encoding = args.get('encoding')     # file encoding (for all files)
     ext = args.get('ext','.xml')
+    workers = args.get('workers') or 1  # processes (for Corpus/list)
         # Overload
     f = d_load.get(type(trans))
-    if f:
+    if f == _saveList:
+        f(path,trans,encoding,ext,workers)
+    elif f:
         f(path,trans,encoding,ext)
     else:
         raise KeyError("First argument must be of type 'Transcription/"+
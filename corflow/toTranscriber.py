@@ -15,8 +15,10 @@ Note: the 'mode' argument (kwarg) picks a method to deal with
       implement their own function (see D_MODE dictionary).
 Note: 'trans' metadata is limited by 'trs' subdivision or audio/author.
       'speaker' metadata is limited by L_SPKATTRIB.
+Note: segments are streamed ('iterTime()') and each 'Turn' is written as
+      soon as it is read; speaker ids are resolved per tier.
 """
-from .Transcription import Corpus,Transcription,Tier
+from .Transcription import Corpus,Transcription,Tier,saveParallel
 import os,html
 
 L_SPKATTRIB = ['check','type','dialect','accent','scope'] # speaker attributes
@@ -52,7 +54,9 @@ def _getTopics(trans,l_segs,dflt="report"):
         toptier.create(-1,"",trans.start,trans.end,f"to0;{dflt};")
     return toptier
 def _writeHeader(f,trans,enc,l_segs):
-    """Writes xml/DOCTYPE, 'Trans' start and Topics/Speakers."""
+    """Writes xml/DOCTYPE, 'Trans' start and Topics/Speakers.
+    Note: 'l_segs' can be an iterator (read once, for the topics).
+    Note: returns the topics tier and a <tier:speaker id> dict."""
     def _writeTransStart():
         txt = "<Trans" # 'Trans' tag start
         if 'trs' in trans.metadata: # ('trs' metadata)
@@ -92,44 +96,44 @@ def _writeHeader(f,trans,enc,l_segs):
     _writeTransStart()
     ttier = _writeTopics() # Topics
     d_spk = _writeSpeakers()
-    for tier in trans: # give speaker ids to segments
+    d_tid = {} # speaker ids, by tier
+    for tier in trans:
         spk = tier.meta("speaker")
         if not spk and tier.name in d_spk: # tier name is 'name', get 'id'
-            spk_id = d_spk.get(tier.name)
+            d_tid[tier] = d_spk.get(tier.name)
         elif spk: # found a speaker, get 'id'
-            spk_id = d_spk.get(spk)
+            d_tid[tier] = d_spk.get(spk)
         else: # can't find id, assume it's tier name
-            spk_id = tier.name
-        for seg in tier:
-            seg.setMeta("spk_id",spk_id,"tech")
-    return ttier
-def _writeTurnStart(txt,l_segs,a,s,e):
-    """Writes 'Turn' start tag. Sub-function of '_writeEpisode()'."""
-    seg,l_asegs = l_segs[a],[l_segs[a]]
+            d_tid[tier] = tier.name
+    return ttier,d_tid
+def _writeTurnStart(l_txt,seg,it,d_tid):
+    """Writes 'Turn' start tag. Sub-function of '_writeEpisode()'.
+    Note: reads 'it' until a segment starts the next turn (returned)."""
+    l_asegs = [seg]
     ta,te = seg.start,seg.end # turn start/end times
-    ospk = seg.meta("spk_id","tech") # current speaker
-    l_aspk = [ospk]; o = -1 # list of speakers, loop check for 'a'
-    for b in range(a+1,len(l_segs)):
-        aseg = l_segs[b]
-        aspk = aseg.meta("spk_id","tech")
+    ospk = d_tid[seg.struct] # current speaker
+    l_aspk = [ospk]; nseg = None # list of speakers, next turn's segment
+    for aseg in it:
+        aspk = d_tid[aseg.struct]
         if aspk != ospk and aseg.start >= te: # end of turn
-            a = o = b-1; break
+            nseg = aseg; break
         l_asegs.append(aseg) # add segment
         if aspk not in l_aspk: # add speaker
             l_aspk.append(aspk)
         if aseg.end > te: # lengthen turn end time
             te = aseg.end
-        ospk = aseg.meta("spk_id","tech") # update current speaker
-    if o < 0:
-        a = len(l_segs)
+        ospk = aspk # update current speaker
     aspk = " ".join(l_aspk)
-    txt = txt+("\t\t\t<Turn speaker=\"{}\" startTime=\"{}\" endTime=\"{}\">"
-               .format(aspk,ta,te))
-    return a+1,txt,l_aspk,l_asegs
+    l_txt.append("\t\t\t<Turn speaker=\"{}\" startTime=\"{}\" endTime=\"{}\">"
+                 .format(aspk,ta,te))
+    return nseg,l_aspk,l_asegs
 def _byTier(trans,seg):
-    """Retrieves in-content tags by looking for a tname+"[trs]" tier."""
-    tname = seg.struct.name
-    mtier = trans.getName(tname+"[trs]")
+    """Retrieves in-content tags by looking for a tname+"[trs]" tier.
+    Note: that tier is looked for once per tier ('trs' in 'tech')."""
+    tier = seg.struct
+    if not tier.checkMeta('trs',div='tech'):
+        tier.setMeta('trs',trans.getName(tier.name+"[trs]"),'tech')
+    mtier = tier.meta('trs','tech')
     if not mtier:
         return
     mseg = mtier.getTime(seg.start)
@@ -156,45 +160,45 @@ def _byMeta(trans,seg):
         if i >= 0 and i < len(seg.content): # 'i' hopefully holds
             seg.content = seg.content[:i]+cont+seg.content[i:]
 D_MODE = {'tier':_byTier,'meta':_byMeta}
-def _writeTurnContent(txt,trans,l_spk,l_asegs,mode):
+def _writeTurnContent(l_txt,trans,l_spk,l_asegs,f_mode,d_tid):
     """Writes 'Turn' tag content. Sub-function of '_writeEpisode()'."""
     
     owho,osync = "",-1.
     tab = "\t\t\t\t"
     for seg in l_asegs:
-        f = D_MODE.get(mode) # Retrieve in-content tags
-        if f:
-            f(trans,seg)
+        if f_mode: # Retrieve in-content tags
+            f_mode(trans,seg)
         if seg.start > osync:
-            txt = txt+"\n"+tab+"<Sync time=\"{}\"/>".format(seg.start)
+            l_txt.append("\n"+tab+"<Sync time=\"{}\"/>".format(seg.start))
             osync = seg.start
-        who = seg.meta("spk_id","tech")
+        who = d_tid[seg.struct]
         if (len(l_spk) > 1) and (who != owho): # Handle 'Who' tag
             i = l_spk.index(who)
-            txt = txt+"\n"+tab+"<Who nb=\"{}\"/>".format(i)
+            l_txt.append("\n"+tab+"<Who nb=\"{}\"/>".format(i))
             owho = who
-        seg.content = seg.content.replace("\t","").replace("    ","")
-        txt = txt+seg.content
-    return txt
-def _writeEpisode(f,trans,ttier,l_segs,mode):
-    """Writes 'Episode','Section's and 'Turn's."""
-    txt = "\t<Episode>\n"; i = 0
+        l_txt.append(seg.content.replace("\t","").replace("    ",""))
+def _writeEpisode(f,trans,ttier,l_segs,mode,d_tid):
+    """Writes 'Episode','Section's and 'Turn's.
+    Note: 'l_segs' is an iterator, each 'Turn' is written once read."""
+    f.write("\t<Episode>\n")
+    f_mode = D_MODE.get(mode); l_txt = []
+    it = iter(l_segs); seg = next(it,None)
     for top in ttier: # sections
         s,e = top.start,top.end
         id,typ,desc = top.content.split(";")
-        txt = txt+("\t\t<Section type=\"{}\" startTime=\"{}\" endTime=\"{}\""
-                   " topic=\"{}\">\n".format(typ,s,e,id))
-        a = i
-        while a < len(l_segs):
-            if l_segs[a].start >= e:
-                i = a; break
-            elif mode == "tier" and l_segs[a].struct.name.endswith("[trs]"):
-                a = a+1; continue
-            a,txt,spk,l_asegs = _writeTurnStart(txt,l_segs,a,s,e) # Turn start
-            txt = _writeTurnContent(txt,trans,spk,l_asegs,mode) # Turn content
-            txt = txt+"\n\t\t\t</Turn>\n"                       # Turn end
-        txt = txt+"\t\t</Section>\n"
-    f.write(txt+"\t</Episode>\n</Trans>")
+        f.write("\t\t<Section type=\"{}\" startTime=\"{}\" endTime=\"{}\""
+                " topic=\"{}\">\n".format(typ,s,e,id))
+        while seg:
+            if seg.start >= e:
+                break
+            elif mode == "tier" and seg.struct.name.endswith("[trs]"):
+                seg = next(it,None); continue
+            seg,spk,l_asegs = _writeTurnStart(l_txt,seg,it,d_tid) # Turn start
+            _writeTurnContent(l_txt,trans,spk,l_asegs,f_mode,d_tid) # content
+            l_txt.append("\n\t\t\t</Turn>\n")                  # Turn end
+            f.write("".join(l_txt)); l_txt.clear()
+        f.write("\t\t</Section>\n")
+    f.write("\t</Episode>\n</Trans>")
 def saveTRS(path,trans,encoding,mode):
     """Exports a single Transcription into a TRS file.
     ARGUMENTS:
@@ -205,6 +209,8 @@ def saveTRS(path,trans,encoding,mode):
     RETURNS:
     - Creates a TRS file at 'path' from 'trans'.
     Note: 'path' is tested here, everything else should be known.
+    Note: segments are read twice in time order ('iterTime()'), for the
+          topics then for the turns; no list of segments is kept.
     """
     
         # Path
@@ -214,12 +220,15 @@ def saveTRS(path,trans,encoding,mode):
     ntrans = trans.copy()                       # We use a copy from there
         # Writing
     f = open(path,'w',encoding=encoding)        # Open file
-    l_segs = [seg for seg in ntrans.iterTime()] # All segs in time order
-    ttier = _writeHeader(f,ntrans,encoding,l_segs) # Write header
-    _writeEpisode(f,ntrans,ttier,l_segs,mode)   # Write body
+    ttier,d_tid = _writeHeader(f,ntrans,encoding, # Write header
+                               ntrans.iterTime())
+    _writeEpisode(f,ntrans,ttier,ntrans.iterTime(),mode,d_tid) # Write body
     f.close()                                   # Close file
-def _saveList(path,trans,encoding,mode):
+def _saveList(path,trans,encoding,mode,workers=1):
     """Exports a list of / a Corpus' transcriptions into TRS files."""
+    if workers > 1:                             # In parallel
+        saveParallel(saveTRS,path,trans,workers,encoding,mode)
+        return
     for tr in trans:
         saveTRS(path,tr,encoding,mode)
 
@@ -232,16 +241,21 @@ def toTranscriber(path,trans,**args):
                                    Transcriptions.
     - encoding      : (str) The file encoding.
     - mode          : (str) Where comments/background/etc might be stored.
+    - workers       : (int) Processes to export a Corpus/list with.
     RETURNS:
     - Creates the TRS(s) at 'path' from 'trans'.
-    Note: Creates a copy for each Transcription while exporting."""
+    Note: Creates a copy for each Transcription while exporting.
+    Note: With 'workers' > 1, errors are raised once all files are done."""
     
         # Args
     encoding = args.get('encoding')     # file encoding (for all files)
     mode = args.get('mode')
+    workers = args.get('workers') or 1  # processes (for Corpus/list)
         # Overload
     f = d_load.get(type(trans))
-    if f:
+    if f == _saveList:
+        f(path,trans,encoding,mode,workers)
+    elif f:
         f(path,trans,encoding,mode)
     else:
         raise KeyError("First argument must be of type 'Transcription/"+
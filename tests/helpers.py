@@ -0,0 +1,45 @@
+"""Builds small Transcriptions and compares them, for the tests."""
+from corflow.Transcription import Transcription,Conteneur
+
+def makeTrans(n=20,k=3,name="trans"):
+    """Returns a Transcription with a 'ref' tier and a child 'wd' tier.
+    Note: 'k' children per parent segment; metadata holds pointers."""
+    trans = Transcription(name,0.,float(n))
+    trans.setMeta("author","someone"); trans.setMeta("note","free text","elan")
+    ref = trans.create(-1,"ref",0.,float(n))
+    wd = trans.create(-1,"wd",0.,float(n)); wd.setParent(ref)
+    wd.setMeta("speaker","A"); wd.setMeta("ptr",ref,"tech")
+    for a in range(n):
+        rseg = ref.create(-1,"r"+str(a),float(a),a+1.,"ref %d & <x>" % a)
+        for b in range(k):
+            s = a+b/k
+            seg = wd.create(-1,"w%d_%d" % (a,b),s,s+1/k,"wd é %d" % b)
+            seg.setParent(rseg)
+        if a % 5 == 0:
+            rseg.setMeta("first",seg,"tech"); rseg.setMeta("type","x")
+    return trans
+def _sigVal(v):
+    """Replaces pointers by names."""
+    if isinstance(v,dict):
+        return {k:_sigVal(x) for k,x in v.items()}
+    elif isinstance(v,list):
+        return [_sigVal(x) for x in v]
+    elif isinstance(v,Conteneur):
+        return ("->",v.struct.name if v.struct else None,v.name)
+    return v
+def signature(trans):
+    """Returns a comparable view of a Transcription's structure."""
+    l_sig = [(trans.name,trans.start,trans.end,_sigVal(trans.metadata))]
+    for tier in trans:
+        ptier = tier.parent()
+        l_sig.append((tier.name,tier.start,tier.end,tier.index(),
+                      ptier.name if ptier else None,
+                      [c.name for c in tier.children()],
+                      _sigVal(tier.metadata)))
+        for seg in tier:
+            pseg = seg.parent()
+            l_sig.append((seg.name,seg.start,seg.end,seg.content,
+                          seg.index(),pseg.name if pseg else None,
+                          [c.name for c in seg.children()],
+                          _sigVal(seg.metadata)))
+    return l_sig
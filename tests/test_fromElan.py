@@ -0,0 +1,56 @@
+"""EAF import ('fromElan'): header, lazy and filtered modes."""
+from corflow.fromElan import fromElan
+from corflow.toElan import toElan
+from helpers import makeTrans,signature
+
+def _writeEAF(path,trans,enc="utf_8"):
+    """Exports 'trans' with tricky markup, re-encoded as 'enc'.
+    Note: adds a root namespace prefix and, on tiers, a '>' in a value
+          and a prefixed attribute; comments hold '<TIER' and '</TIER>'."""
+    toElan(str(path),trans,rename_segs=False)
+    txt = open(path,encoding="utf_8").read()
+    txt = txt.replace("<ANNOTATION_DOCUMENT ",
+                      "<ANNOTATION_DOCUMENT xmlns:x=\"urn:x\" ",1)
+    txt = txt.replace("<TIER TIER_ID","<!-- <TIER TIER_ID=\"no\"> -->"
+                      "<TIER ANNOTATOR=\"a>b\" x:note='c>d' TIER_ID")
+    txt = txt.replace("<ANNOTATION>","<ANNOTATION><!-- </TIER> -->",1)
+    if enc != "utf_8":
+        txt = txt.replace("encoding=\"UTF-8\"","encoding=\"UTF-16\"",1)
+    with open(path,"wb") as f:
+        f.write(txt.encode(enc))
+def _tiers(trans):
+    """Tier names, parents and metadata."""
+    return [(t.name,t.parent().name if t.parent() else None,t.metadata)
+            for t in trans]
+def test_modes_agree(tmp_path):
+    """'header' and 'lazy' read what 'full' reads."""
+    path = tmp_path/"a.eaf"; _writeEAF(path,makeTrans(10))
+    full = fromElan(str(path))
+    assert full.getName("wd").meta("ANNOTATOR","elan") == "a>b"
+    assert _tiers(fromElan(str(path),mode="header")) == _tiers(full)
+    lazy = fromElan(str(path),mode="lazy")
+    assert _tiers(lazy) == _tiers(full)
+    for tier in lazy:                           # read (bounds come first)
+        tier.elem
+    assert signature(lazy) == signature(full)
+def test_tiers_utf16(tmp_path):
+    """A parent read after its child is known, in UTF-16 files."""
+    for enc in ("utf_16","utf_16_be"):
+        path = tmp_path/(enc+".eaf"); _writeEAF(path,makeTrans(10),enc)
+        full = fromElan(str(path))
+        part = fromElan(str(path),tiers=["wd"])
+        assert signature(part) == signature(full)
+def test_cv_roundtrip(tmp_path):
+    """Controlled vocabularies keep escaped line breaks through an export."""
+    path = tmp_path/"cv.eaf"; _writeEAF(path,makeTrans(5))
+    txt = open(path,encoding="utf_8").read().replace("</ANNOTATION_DOCUMENT>",
+          "<CONTROLLED_VOCABULARY CV_ID=\"cv\"><CV_ENTRY_ML CVE_ID=\"e\" "
+          "X=\"a&#13;b&#10;c&#9;d\"><CVE_VALUE>v</CVE_VALUE></CV_ENTRY_ML>"
+          "</CONTROLLED_VOCABULARY></ANNOTATION_DOCUMENT>")
+    open(path,"w",encoding="utf_8").write(txt)
+    cv = fromElan(str(path)).meta("CONTROLLED_VOCABULARY","elan")
+    assert "X=\"a&#13;b&#10;c&#09;d\"" in cv
+    assert cv.tree()[0].get("X") == "a\rb\nc\td"
+    trans = fromElan(str(path)); toElan(str(tmp_path/"b.eaf"),trans)
+    cv2 = fromElan(str(tmp_path/"b.eaf")).meta("CONTROLLED_VOCABULARY","elan")
+    assert cv2 == cv
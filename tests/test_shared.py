@@ -0,0 +1,22 @@
+"""Shared-memory transfer ('shareTrans()'/'attachTrans()')."""
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from corflow.Transcription import shareTrans,attachTrans
+from helpers import makeTrans,signature
+
+def _share(n):
+    """Worker: builds and shares a Transcription."""
+    return shareTrans(makeTrans(n))
+
+@pytest.mark.parametrize("method",[m for m in ("fork","spawn")
+                                   if m in mp.get_all_start_methods()])
+def test_pool_roundtrip(method):
+    """The block survives the pool's shutdown and rebuilds the original."""
+    with ProcessPoolExecutor(2,mp_context=mp.get_context(method)) as pool:
+        handle = pool.submit(_share,50).result()
+    trans = attachTrans(handle)                 # after the pool is gone
+    assert signature(trans) == signature(makeTrans(50))
+def test_local_roundtrip():
+    trans = makeTrans(10)
+    assert signature(attachTrans(shareTrans(trans))) == signature(trans)
@@ -0,0 +1,21 @@
+"""EAF export ('toElan')."""
+from corflow.toElan import toElan
+from helpers import makeTrans,signature
+
+def _kind(path,tier):
+    """Returns the annotation kind written for a tier."""
+    txt = open(path,encoding="utf_8").read()
+    i = txt.index("TIER_ID=\""+tier+"\"")
+    sub = txt[i:txt.index("</TIER>",i)]
+    return "REF" if "REF_ANNOTATION" in sub else "ALIGNABLE"
+def test_types_follow_times(tmp_path):
+    """Retimed children are re-inferred; the input is left untouched."""
+    trans = makeTrans(20); sig = signature(trans)
+    toElan(str(tmp_path/"a.eaf"),trans,rename_segs=False)
+    assert _kind(tmp_path/"a.eaf","wd") == "REF"    # even split
+    assert signature(trans) == sig
+    for rseg in trans.getName("ref"):               # uneven split
+        l_c = rseg.children()
+        l_c[0].end = l_c[1].start = l_c[0].start+0.05
+    toElan(str(tmp_path/"b.eaf"),trans)
+    assert _kind(tmp_path/"b.eaf","wd") == "ALIGNABLE"
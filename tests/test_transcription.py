@@ -0,0 +1,110 @@
+"""Core model ('Transcription.py') helpers."""
+import re,gc,copy,pickle,threading
+from corflow.Transcription import _noGC
+from helpers import makeTrans,signature
+
+def test_noGC_overlap():
+    """Collection stays off until the last (threaded) user exits."""
+    assert gc.isenabled()
+    ev_in,ev_out = threading.Event(),threading.Event()
+    def _hold():
+        with _noGC():
+            ev_in.set(); ev_out.wait(5)
+    th = threading.Thread(target=_hold); th.start(); ev_in.wait(5)
+    with _noGC():
+        assert not gc.isenabled()
+    assert not gc.isenabled()                   # other thread still inside
+    ev_out.set(); th.join()
+    assert gc.isenabled()
+def test_noGC_disabled():
+    """Collection stays off if it was off before."""
+    gc.disable()
+    try:
+        with _noGC():
+            pass
+        assert not gc.isenabled()
+    finally:
+        gc.enable()
+
+def test_copy():
+    """A copy matches the original, its links all inside the copy."""
+    trans = makeTrans(30); sig = signature(trans)
+    cop = trans.copy()
+    assert signature(cop) == sig
+    for tier,ntier in zip(trans,cop):
+        assert ntier.struct is cop and ntier is not tier
+        ptier = ntier.parent()
+        assert ptier is None or ptier.struct is cop
+        assert all(c.struct is cop for c in ntier.children())
+        assert ntier.metadata is not tier.metadata
+        for seg,nseg in zip(tier,ntier):
+            assert nseg.struct is ntier and nseg.index() == seg.index()
+            pseg = nseg.parent()
+            assert pseg is None or pseg.struct.struct is cop
+            for c in nseg.children():
+                assert c.struct.struct is cop and c.parent() is nseg
+    cop.elem[1].setMeta("speaker","B"); cop.elem[0].elem[0].content = "x"
+    assert signature(trans) == sig                 # original untouched
+    assert cop.copy(empty=True).elem == []
+
+def test_pickle_orphan():
+    """An element dropped from its tier pickles (and copies) detached."""
+    trans = makeTrans(10); wd = trans.getName("wd"); seg = wd.elem[0]
+    trans.setMeta("old",seg,"tech"); wd.fixOverlaps()   # copies segments
+    assert seg.struct is wd and seg not in wd.d_elem
+    def _segs(trans):
+        return [[(s.name,s.start,s.end,s.content) for s in t] for t in trans]
+    for cop in (pickle.loads(pickle.dumps(trans)),copy.deepcopy(trans)):
+        assert _segs(cop) == _segs(trans)
+        oseg = cop.meta("old","tech")
+        assert oseg.name == seg.name and oseg.struct == None
+
+def _oldFixOverlaps(tier,cont="",sort=False):
+    """'Tier.fixOverlaps()' before it appended (inserts at 0, backwards)."""
+    ls = len(tier)
+    if ls < 2:
+        return
+    atier = tier.copy(empty=True)
+    if sort:
+        tier.sortByTime()
+    for a in range(1,ls):
+        s1,s2 = tier.elem[a-1],tier.elem[a]
+        if s1.end > s2.start:
+            if cont and re.search(cont,s1.content):
+                s2.start = s1.end
+            else:
+                s1.end = s2.start
+    for a in range(ls-1,-1,-1):
+        s = tier.elem[a]
+        if s.end <= s.start:
+            continue
+        atier.add(0,s)
+    tier.elem,tier.d_elem = atier.elem,atier.d_elem
+def _overlapping():
+    """'makeTrans()' with overlaps, swallowed segments and unsorted 'wd'."""
+    trans = makeTrans(20)
+    for a,seg in enumerate(trans.getName("wd")):
+        if a % 3 == 1:
+            seg.start -= 0.2; seg.content = "x"+seg.content
+        elif a % 7 == 2:
+            seg.end += 0.5
+        elif a % 11 == 5:
+            seg.start = seg.end = seg.start+0.01
+    wd = trans.getName("wd"); wd.elem[3],wd.elem[4] = wd.elem[4],wd.elem[3]
+    wd.d_elem[wd.elem[3]][0],wd.d_elem[wd.elem[4]][0] = 3,4
+    return trans
+def test_fixOverlaps():
+    """Same segments, order and 'd_elem' indexes as the old algorithm."""
+    for cont,sort in (("",False),("^x",False),("",True),("^x",True)):
+        t_old,t_new = _overlapping(),_overlapping()
+        for tname in ("wd","ref"):
+            _oldFixOverlaps(t_old.getName(tname),cont,sort)
+            t_new.getName(tname).fixOverlaps(cont,sort)
+        assert signature(t_new) == signature(t_old)
+        for old,new in zip(t_old,t_new):
+            assert ([old.d_elem[s][:1] for s in old] ==
+                    [new.d_elem[s][:1] for s in new] ==
+                    [[b] for b in range(len(new))])
+        wd = t_new.getName("wd")                # neighbours only
+        assert (not sort or
+                all(s1.end <= s2.start for s1,s2 in zip(wd.elem,wd.elem[1:])))